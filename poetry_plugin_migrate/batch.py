@@ -0,0 +1,297 @@
+from __future__ import annotations
+
+import hashlib
+import io
+import os
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from tomlkit import TOMLDocument
+
+    from poetry_plugin_migrate.migrator import MigrationCommand, Migrator
+    from poetry_plugin_migrate.templates import TemplateCache
+
+PYPROJECT_TOML = "pyproject.toml"
+
+_PRUNED_DIRECTORIES = frozenset({"node_modules", "__pycache__"})
+
+
+def is_pruned_directory(name: str) -> bool:
+    """Return whether projects below a directory called ``name`` are ignored."""
+    return name.startswith(".") or name in _PRUNED_DIRECTORIES
+
+
+def discover_projects(root: Path) -> list[Path]:
+    """Return every ``pyproject.toml`` below ``root`` in a stable order.
+
+    Hidden directories, virtual environments and well-known dependency caches
+    are not searched; they contain vendored projects that are not owned by the
+    repository being migrated.
+    """
+    projects: list[Path] = []
+    for directory, directory_names, file_names in os.walk(root):
+        directory_names[:] = sorted(
+            name
+            for name in directory_names
+            if not is_pruned_directory(name)
+            and not Path(directory, name, "pyvenv.cfg").exists()
+        )
+        if PYPROJECT_TOML in file_names:
+            projects.append(Path(directory, PYPROJECT_TOML))
+    return projects
+
+
+def parse_shard(value: str) -> tuple[int, int]:
+    """Parse a ``i/N`` shard selector into a one-based index and a count."""
+    index, separator, count = value.partition("/")
+    if not separator or not index.isdigit() or not count.isdigit():
+        raise ValueError(f"Invalid shard {value!r}: expected i/N, for example 1/4")
+    shard = (int(index), int(count))
+    if not 1 <= shard[0] <= shard[1]:
+        raise ValueError(
+            f"Invalid shard {value!r}: the index must be between 1 and the count"
+        )
+    return shard
+
+
+def in_shard(path: Path, root: Path, shard: tuple[int, int]) -> bool:
+    """Return whether ``path`` belongs to ``shard`` of a sharded run.
+
+    The decision hashes the path relative to ``root``, so every node that has
+    the same checkout agrees on the partition without coordinating, wherever
+    the checkout is located.
+    """
+    index, count = shard
+    relative_path = path.relative_to(root).as_posix()
+    digest = hashlib.sha256(relative_path.encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % count == index - 1
+
+
+class ProjectResult:
+    """Outcome of migrating one ``pyproject.toml`` in a batch run."""
+
+    path: Path
+    """Path of the migrated ``pyproject.toml``."""
+
+    status: str
+    """One of ``"migrated"``, ``"unchanged"``, ``"failed"`` or ``"timeout"``."""
+
+    migrated: str | None
+    """Serialized migration result, if migration and validation succeeded."""
+
+    warnings: list[str]
+    """Warnings reported by the migration engine."""
+
+    errors: list[str]
+    """Errors that prevented the result from being written."""
+
+    resumed: bool
+    """Whether the outcome was taken from the journal of an earlier run."""
+
+    migration_seconds: float | None
+    """Wall-clock time of ``Migrator.run``, if the migration engine ran."""
+
+    def __init__(
+        self,
+        path: Path,
+        status: str,
+        *,
+        migrated: str | None = None,
+        warnings: list[str] | None = None,
+        errors: list[str] | None = None,
+        resumed: bool = False,
+        migration_seconds: float | None = None,
+    ) -> None:
+        self.path = path
+        self.status = status
+        self.migrated = migrated
+        self.warnings = warnings or []
+        self.errors = errors or []
+        self.resumed = resumed
+        self.migration_seconds = migration_seconds
+
+
+def decode_source(content: bytes) -> str:
+    """Decode file data like ``Path.read_text`` with universal newlines."""
+    return io.TextIOWrapper(io.BytesIO(content), encoding="utf-8").read()
+
+
+def migrate_project(
+    path: Path,
+    command: MigrationCommand,
+    *,
+    literal: bool,
+    templates: TemplateCache | None = None,
+    content: bytes | None = None,
+) -> ProjectResult:
+    """Migrate one file non-interactively and validate the generated result.
+
+    With ``templates``, projects that share a structural fingerprint with
+    earlier ones are replayed from a template instead of migrated again.
+    ``content`` is the file's data if it has already been read.
+    """
+    from poetry_plugin_migrate.profiling import trace_span
+
+    try:
+        if content is None:
+            with trace_span("read"):
+                content = path.read_bytes()
+        source = decode_source(content)
+    except (OSError, UnicodeDecodeError) as error:
+        return ProjectResult(path, "failed", errors=[str(error)])
+    return migrate_source(path, source, command, literal=literal, templates=templates)
+
+
+def migrate_source(
+    path: Path,
+    source: str,
+    command: MigrationCommand,
+    *,
+    literal: bool,
+    templates: TemplateCache | None = None,
+) -> ProjectResult:
+    """Migrate the contents ``source`` of ``path`` like :func:`migrate_project`.
+
+    The file itself is never read, so ``path`` only labels the result.
+    """
+    from tomlkit import parse
+    from tomlkit.exceptions import TOMLKitError
+
+    from poetry_plugin_migrate.profiling import trace_span
+
+    try:
+        with trace_span("parse"):
+            document = parse(source)
+    except TOMLKitError as error:
+        return ProjectResult(path, "failed", errors=[str(error)])
+
+    if templates is None:
+        return _migrate_document(path, source, document, command, literal=literal)
+
+    from poetry_plugin_migrate.templates import document_skeleton
+
+    start = time.perf_counter()
+    with trace_span("template replay"):
+        skeleton = document_skeleton(document, source)
+        replayed = (
+            templates.replay(path, source, skeleton) if skeleton is not None else None
+        )
+    if replayed is not None:
+        replayed.migration_seconds = time.perf_counter() - start
+        return replayed
+
+    result = _migrate_document(path, source, document, command, literal=literal)
+    if skeleton is not None:
+        templates.learn(
+            skeleton,
+            result,
+            lambda text: _migrate_document(
+                path, text, parse(text), command, literal=literal
+            ),
+        )
+    return result
+
+
+def _migrate_document(
+    path: Path,
+    source: str,
+    document: TOMLDocument,
+    command: MigrationCommand,
+    *,
+    literal: bool,
+    migrator: Migrator | None = None,
+) -> ProjectResult:
+    from poetry_plugin_migrate.profiling import record_allocation_sites, timed
+    from poetry_plugin_migrate.validation import validate_pyproject
+
+    if migrator is None:
+        from poetry_plugin_migrate.migrator import Migrator
+
+        migrator = Migrator(command=command, skip=True, literal=literal)
+    start = time.perf_counter()
+    try:
+        with timed("migration"):
+            migrated_document = migrator.run(document)
+    except (TypeError, ValueError) as error:
+        return ProjectResult(
+            path,
+            "failed",
+            warnings=migrator.warnings,
+            errors=[str(error)],
+            migration_seconds=time.perf_counter() - start,
+        )
+    migration_seconds = time.perf_counter() - start
+    record_allocation_sites()
+
+    validation_errors = validate_pyproject(migrated_document.unwrap())
+    if validation_errors:
+        return ProjectResult(
+            path,
+            "failed",
+            warnings=migrator.warnings,
+            errors=validation_errors,
+            migration_seconds=migration_seconds,
+        )
+
+    if not migrator.changed:
+        return ProjectResult(
+            path,
+            "unchanged",
+            migrated=source,
+            warnings=migrator.warnings,
+            migration_seconds=migration_seconds,
+        )
+
+    migrated = migrated_document.as_string()
+    if migrated == source:
+        return ProjectResult(
+            path,
+            "unchanged",
+            migrated=source,
+            warnings=migrator.warnings,
+            migration_seconds=migration_seconds,
+        )
+    return ProjectResult(
+        path,
+        "migrated",
+        migrated=migrated,
+        warnings=migrator.warnings,
+        migration_seconds=migration_seconds,
+    )
+
+
+def profile_project(
+    path: Path, command: MigrationCommand, *, literal: bool, output: Path
+) -> None:
+    """Run ``Migrator.run`` for ``path`` again under ``cProfile``.
+
+    Only the migration engine is profiled; parsing and validation are left
+    out so the dump points at the engine's hot paths. The statistics are
+    written to ``output`` in the ``pstats`` format.
+    """
+    import cProfile
+    from contextlib import suppress
+
+    from tomlkit import parse
+
+    from poetry_plugin_migrate.migrator import Migrator
+
+    document = parse(path.read_text(encoding="utf-8"))
+    migrator = Migrator(command=command, skip=True, literal=literal)
+    profiler = cProfile.Profile()
+    # Failing migrations are profiled up to the point of failure.
+    with suppress(TypeError, ValueError):
+        profiler.runcall(migrator.run, document)
+    profiler.dump_stats(output)
+
+
+def profile_dump_name(path: Path, root: Path) -> str:
+    """Return a file name for the profile of ``path`` unique within ``root``.
+
+    The relative path is percent-encoded, so distinct paths never share a name.
+    """
+    from urllib.parse import quote
+
+    return f"profile-{quote(path.relative_to(root).as_posix(), safe='')}.pstats"
@@ -1,17 +1,23 @@
 from __future__ import annotations
 
+from pathlib import Path
 from typing import TYPE_CHECKING
 
-from cleo.helpers import option
+from cleo.helpers import argument, option
 from poetry.console.commands.command import Command
 
 from poetry_plugin_migrate.migrator import Migrator
 
 if TYPE_CHECKING:
+    from collections.abc import Iterable
     from typing import ClassVar
 
+    from cleo.io.inputs.argument import Argument
     from cleo.io.inputs.option import Option
 
+    from poetry_plugin_migrate.batch import ProjectResult
+    from poetry_plugin_migrate.isolation import IsolatedMigrator
+
 
 class MigrateCommand(Command):
     name = "migrate"
@@ -47,6 +53,14 @@ class MigrateCommand(Command):
                 "Migration result will be printed to the console."
             ),
         ),
+        option(
+            long_name="what-if",
+            short_name=None,
+            description=(
+                "Migrate with every answer to each migration prompt and print "
+                "the validated outcome of each answer without writing any file."
+            ),
+        ),
         option(
             long_name="no-literal",
             short_name=None,
@@ -55,9 +69,279 @@ class MigrateCommand(Command):
                 "constraint values instead of preferring literal strings."
             ),
         ),
+        option(
+            long_name="recursive",
+            short_name=None,
+            description=(
+                "Migrate every <comment>pyproject.toml</comment> below the project "
+                "directory non-interactively. Originals are kept in one backup archive."
+            ),
+        ),
+        option(
+            long_name="git-ref",
+            short_name=None,
+            description=(
+                "Migrate every <comment>pyproject.toml</comment> of the given git "
+                "ref from the object store without checking it out or changing "
+                "any project. Repeat to audit several refs."
+            ),
+            flag=False,
+            multiple=True,
+        ),
+        option(
+            long_name="shard",
+            short_name=None,
+            description=(
+                "With <info>--recursive</info>, only migrate shard <comment>i/N</comment> "
+                "of the discovered projects, for example <comment>1/4</comment>."
+            ),
+            flag=False,
+        ),
+        option(
+            long_name="report",
+            short_name=None,
+            description=(
+                "With <info>--recursive</info> or <info>--git-ref</info>, write a "
+                "JSON report of every project's outcome to the given file. With "
+                "<info>--what-if</info>, the report lists the outcome of each answer."
+            ),
+            flag=False,
+        ),
+        option(
+            long_name="diff",
+            short_name=None,
+            description=(
+                "With <info>--git-ref</info>, write a unified diff of every "
+                "migrated <comment>pyproject.toml</comment> to the given file."
+            ),
+            flag=False,
+        ),
+        option(
+            long_name="journal",
+            short_name=None,
+            description=(
+                "With <info>--recursive</info>, record each project's outcome in "
+                "the given append-only journal file as soon as it completes."
+            ),
+            flag=False,
+        ),
+        option(
+            long_name="resume",
+            short_name=None,
+            description=(
+                "Skip projects recorded in the <info>--journal</info> file whose "
+                "<comment>pyproject.toml</comment> has not changed since."
+            ),
+        ),
+        option(
+            long_name="timeout",
+            short_name=None,
+            description=(
+                "With <info>--recursive</info>, migrate each project in a worker "
+                "process and stop it after the given number of seconds."
+            ),
+            flag=False,
+        ),
+        option(
+            long_name="memory-limit",
+            short_name=None,
+            description=(
+                "With <info>--recursive</info>, migrate each project in a worker "
+                "process limited to the given number of MiB of address space."
+            ),
+            flag=False,
+        ),
+        option(
+            long_name="io-concurrency",
+            short_name=None,
+            description=(
+                "With <info>--recursive</info>, read, back up and write up to the "
+                "given number of files at once."
+            ),
+            flag=False,
+        ),
+        option(
+            long_name="profile-slow",
+            short_name=None,
+            description=(
+                "With <info>--recursive</info>, profile the migration of every "
+                "project that takes longer than the given number of milliseconds "
+                "and save the <comment>.pstats</comment> dump beside the report."
+            ),
+            flag=False,
+        ),
+        option(
+            long_name="requirement-cache",
+            short_name=None,
+            description=(
+                "Cache rendered PEP 508 requirements and converted dependency "
+                "sections in the given SQLite database, shared by worker "
+                "processes and later runs."
+            ),
+            flag=False,
+        ),
+        option(
+            long_name="trace",
+            short_name=None,
+            description=(
+                "Write Chrome trace-event JSON with a span for each project and "
+                "migration phase to the given file."
+            ),
+            flag=False,
+        ),
+        option(
+            long_name="memory-profile",
+            short_name=None,
+            description=(
+                "Trace allocations and print the peak and net memory of each "
+                "migration phase and the largest allocation sites."
+            ),
+        ),
+        option(
+            long_name="rollback",
+            short_name=None,
+            description=(
+                "Restore the <comment>pyproject.toml</comment> files stored in a "
+                "backup archive created by <info>--recursive</info>."
+            ),
+            flag=False,
+        ),
+        option(
+            long_name="profile",
+            short_name=None,
+            description="Print cache statistics and stage timings after migration.",
+        ),
     ]
 
     def handle(self) -> int:
+        rollback = self.option("rollback")
+        if rollback:
+            return self._handle_rollback(Path(rollback))
+        recursive = self.option("recursive")
+        batch_options = (
+            "shard",
+            "report",
+            "journal",
+            "resume",
+            "timeout",
+            "memory-limit",
+            "io-concurrency",
+            "profile-slow",
+        )
+        git_refs = self.option("git-ref")
+        what_if = self.option("what-if")
+        if git_refs:
+            conflicting = [
+                name
+                for name in ("recursive", "what-if", *batch_options)
+                if name != "report" and self.option(name)
+            ]
+            if conflicting:
+                self.line_error(
+                    "<error>--git-ref cannot be combined with "
+                    + ", ".join(f"--{name}" for name in conflicting)
+                    + ".</error>"
+                )
+                return 1
+        elif self.option("diff"):
+            self.line_error("<error>--diff can only be used with --git-ref.</error>")
+            return 1
+        elif what_if and (
+            conflicting := [
+                name
+                for name in batch_options
+                if name not in {"shard", "report"} and self.option(name)
+            ]
+        ):
+            self.line_error(
+                "<error>--what-if cannot be combined with "
+                + ", ".join(f"--{name}" for name in conflicting)
+                + ".</error>"
+            )
+            return 1
+        elif not recursive and any(self.option(name) for name in batch_options):
+            self.line_error(
+                "<error>"
+                + ", ".join(f"--{name}" for name in batch_options)
+                + " can only be used with --recursive.</error>"
+            )
+            return 1
+        isolating = [name for name in ("timeout", "memory-limit") if self.option(name)]
+        # Worker processes record no spans, timings or allocations.
+        profilers = [
+            name for name in ("trace", "profile", "memory-profile") if self.option(name)
+        ]
+        if isolating and profilers:
+            self.line_error(
+                "<error>"
+                + ", ".join(f"--{name}" for name in isolating)
+                + " cannot be combined with "
+                + ", ".join(f"--{name}" for name in profilers)
+                + ".</error>"
+            )
+            return 1
+        requirement_cache = self.option("requirement-cache")
+        if requirement_cache:
+            import sqlite3
+
+            from poetry_plugin_migrate.profiling import register_cache
+            from poetry_plugin_migrate.requirement_cache import open_requirement_cache
+
+            try:
+                cache = open_requirement_cache(Path(requirement_cache))
+            except (OSError, sqlite3.Error) as error:
+                self.line_error(
+                    f"<error>Opening the requirement cache failed: {error}</error>"
+                )
+                return 1
+            register_cache("persistent requirement cache", cache)
+        trace = self.option("trace")
+        if trace:
+            from poetry_plugin_migrate.profiling import start_trace
+
+            start_trace()
+        memory_profile = self.option("memory-profile")
+        if memory_profile:
+            from poetry_plugin_migrate.profiling import start_memory_profile
+
+            start_memory_profile()
+        try:
+            if git_refs:
+                status = self._handle_git_refs(git_refs)
+            elif what_if:
+                status = self._handle_what_if(recursive=recursive)
+            elif recursive:
+                status = self._handle_recursive()
+            else:
+                status = self._handle_project()
+        finally:
+            if requirement_cache:
+                from poetry_plugin_migrate.requirement_cache import (
+                    close_requirement_cache,
+                )
+
+                close_requirement_cache()
+            # Tracing is process-wide; stop it even if the run failed, keeping
+            # the spans recorded so far.
+            if trace:
+                from poetry_plugin_migrate.profiling import write_trace
+
+                spans = write_trace(Path(trace))
+                self.line(
+                    f"Wrote <comment>{spans}</comment> trace span(s) to <c1>{trace}</>"
+                )
+            if memory_profile:
+                from poetry_plugin_migrate.profiling import stop_memory_profile
+
+                stop_memory_profile()
+        if self.option("profile"):
+            self._write_profile()
+        if memory_profile:
+            self._write_memory_profile()
+        return status
+
+    def _handle_project(self) -> int:
+        """Migrate the current project, prompting unless non-interactive."""
         no_check = self.option("no-check")
         dry_run = self.option("dry-run")
         quiet = self.option("quiet")
@@ -93,21 +377,28 @@ class MigrateCommand(Command):
             literal=not no_literal,
         )
         pyproject_document = self.poetry.pyproject.data
+        from poetry_plugin_migrate.profiling import (
+            record_allocation_sites,
+            timed,
+            trace_span,
+        )
+        from poetry_plugin_migrate.validation import validate_pyproject
+
         try:
-            migrated_document = migrator.run(pyproject_document)
+            with timed("migration"):
+                migrated_document = migrator.run(pyproject_document)
         except (TypeError, ValueError) as error:
             self.line_error(f"<error>Migration aborted: {error}</error>")
             return 1
+        record_allocation_sites()
 
-        from poetry.core.factory import Factory as CoreFactory
-
-        validation = CoreFactory.validate(migrated_document.unwrap(), strict=True)
-        if validation["errors"]:
+        validation_errors = validate_pyproject(migrated_document.unwrap())
+        if validation_errors:
             self.line_error(
                 "<error>Migration aborted because the generated configuration "
                 "is invalid:</error>"
             )
-            for validation_error in validation["errors"]:
+            for validation_error in validation_errors:
                 self.line_error(f"  - {validation_error}")
             return 1
 
@@ -116,9 +407,12 @@ class MigrateCommand(Command):
                 self.line_error(f"<warning>Warning: {warning}</warning>")
             self.line("")
 
-        if (
-            not dry_run
-            and migrated_document.as_string() == pyproject_document.as_string()
+        from poetry_plugin_migrate.writer import atomic_write, render_with_linesep
+
+        migrated = migrated_document.as_string()
+        content = render_with_linesep(migrated).encode("utf-8")
+        if not dry_run and (
+            not migrator.changed or content == pyproject_file_path.read_bytes()
         ):
             self.line("<info>No migration changes were necessary.</info>")
             return 0
@@ -127,12 +421,10 @@ class MigrateCommand(Command):
         self.line("")
 
         if dry_run:
-            self.line(migrated_document.as_string())
+            self.line(migrated)
         else:
             from shutil import copy2
 
-            from poetry.toml import TOMLFile
-
             no_backup = self.option("no-backup")
             if not no_backup:
                 backup = pyproject_file_path.with_name(
@@ -152,11 +444,608 @@ class MigrateCommand(Command):
             self.line("<info>Writing <comment>pyproject.toml</comment></info>")
             self.line("")
 
-            migrated_file = TOMLFile(pyproject_file_path)
-            migrated_file.write(migrated_document)
+            with trace_span("write", path=str(pyproject_file_path)):
+                atomic_write(pyproject_file_path, content)
 
             self.line(
                 "It is recommended to run <info>poetry lock && poetry install</info> after migration."
             )
 
         return 0
+
+    def _handle_recursive(self) -> int:
+        """Migrate all projects below the project directory as one batch."""
+        from contextlib import ExitStack
+
+        from poetry_plugin_migrate.batch import (
+            ProjectResult,
+            discover_projects,
+            in_shard,
+            migrate_project,
+            parse_shard,
+            profile_dump_name,
+            profile_project,
+        )
+        from poetry_plugin_migrate.journal import Journal
+        from poetry_plugin_migrate.profiling import register_cache, trace_span
+        from poetry_plugin_migrate.templates import TemplateCache
+        from poetry_plugin_migrate.writer import BatchWriter
+
+        root = self.get_application().project_directory
+        dry_run = self.option("dry-run")
+
+        io = None
+        if self.option("io-concurrency"):
+            from poetry_plugin_migrate.fileio import FileIOStage
+
+            concurrency = self.option("io-concurrency")
+            if not concurrency.isdigit() or int(concurrency) == 0:
+                self.line_error(
+                    "<error>--io-concurrency must be a positive number of files, "
+                    f"got {concurrency}</error>"
+                )
+                return 1
+            io = FileIOStage(int(concurrency))
+        writer = BatchWriter(root, backup=not self.option("no-backup"), io=io)
+
+        shard = None
+        if self.option("shard"):
+            try:
+                shard = parse_shard(self.option("shard"))
+            except ValueError as error:
+                self.line_error(f"<error>{error}</error>")
+                return 1
+
+        journal = None
+        if self.option("journal"):
+            try:
+                journal = Journal(
+                    Path(self.option("journal")), resume=self.option("resume")
+                )
+            except (OSError, UnicodeDecodeError, TypeError, ValueError) as error:
+                self.line_error(f"<error>Reading the journal failed: {error}</error>")
+                return 1
+        elif self.option("resume"):
+            self.line_error("<error>--resume requires --journal.</error>")
+            return 1
+
+        try:
+            isolated = self._isolated_migrator()
+        except ValueError as error:
+            self.line_error(f"<error>{error}</error>")
+            return 1
+
+        slow_threshold = None
+        if self.option("profile-slow"):
+            try:
+                slow_threshold = float(self.option("profile-slow")) / 1000
+            except ValueError:
+                slow_threshold = -1.0
+            if slow_threshold < 0:
+                self.line_error(
+                    "<error>--profile-slow must be a non-negative number of "
+                    f"milliseconds, got {self.option('profile-slow')}</error>"
+                )
+                return 1
+        report_path = self.option("report")
+        profile_directory = Path(report_path).parent if report_path else root
+
+        projects = discover_projects(root)
+        if shard is not None:
+            discovered = len(projects)
+            projects = [path for path in projects if in_shard(path, root, shard)]
+            self.line(
+                f"Shard <comment>{shard[0]}/{shard[1]}</comment>: "
+                f"{len(projects)} of {discovered} project(s)"
+            )
+        self.line(
+            f"Migrating <comment>{len(projects)}</comment> "
+            f"<comment>pyproject.toml</comment> file(s) below <c1>{root}</c1>..."
+        )
+        self.line("")
+
+        templates = TemplateCache()
+        register_cache("migration templates", templates)
+
+        results = []
+        with ExitStack() as stack:
+            if io is not None:
+                # Entered first, so the stage closes only after the commit.
+                stack.enter_context(io)
+            if journal is not None:
+                stack.enter_context(journal)
+            if isolated is not None:
+                stack.enter_context(isolated)
+            contents: Iterable[tuple[Path, bytes | OSError | None]]
+            if io is not None:
+                # Reads run ahead of the migration.
+                contents = io.read_ahead(projects)
+            else:
+                contents = ((path, None) for path in projects)
+            for path, content in contents:
+                display_path = path.relative_to(root).as_posix()
+                source = content if isinstance(content, bytes) else None
+                if journal is not None and content is None:
+                    try:
+                        source = path.read_bytes()
+                    except OSError:
+                        source = None
+                entry = (
+                    journal.lookup(display_path, source)
+                    if journal is not None and source is not None
+                    else None
+                )
+                if entry is not None and source is not None:
+                    result = ProjectResult(
+                        path,
+                        entry.status,
+                        migrated=entry.migrated,
+                        warnings=entry.warnings,
+                        errors=entry.errors,
+                        resumed=True,
+                    )
+                    results.append(result)
+                    self.line(
+                        f"<info>Skipped</info> <c1>{display_path}</c1> "
+                        f"({entry.status} in journal)"
+                    )
+                    if (
+                        entry.migrated is not None
+                        and entry.is_pending(source)
+                        and not dry_run
+                    ):
+                        # The earlier run ended before writing its result.
+                        writer.stage(path, entry.migrated)
+                    continue
+
+                with trace_span(display_path, "project"):
+                    if isinstance(content, OSError):
+                        result = ProjectResult(path, "failed", errors=[str(content)])
+                    elif isolated is not None:
+                        result = isolated.migrate(path, source)
+                    else:
+                        result = migrate_project(
+                            path,
+                            self,
+                            literal=not self.option("no-literal"),
+                            templates=templates,
+                            content=source,
+                        )
+                results.append(result)
+                self._write_project_result(result, display_path)
+                if (
+                    slow_threshold is not None
+                    and result.migration_seconds is not None
+                    and result.migration_seconds > slow_threshold
+                ):
+                    dump = profile_directory / profile_dump_name(path, root)
+                    stopped = None
+                    if isolated is not None:
+                        # Profile under the same budgets as the migration.
+                        stopped = isolated.profile(path, dump)
+                    else:
+                        profile_project(
+                            path,
+                            self,
+                            literal=not self.option("no-literal"),
+                            output=dump,
+                        )
+                    outcome = (
+                        f"saved profile <c1>{dump}</>"
+                        if stopped is None
+                        else f"profiling stopped: {'; '.join(stopped.errors)}"
+                    )
+                    self.line(
+                        f"  Migration took {result.migration_seconds * 1000:.1f} ms; "
+                        + outcome
+                    )
+                staged = None
+                if (
+                    result.status == "migrated"
+                    and not dry_run
+                    and result.migrated is not None
+                ):
+                    staged = writer.stage(path, result.migrated)
+                # Dry runs write nothing, so migrated projects stay pending.
+                if (
+                    journal is not None
+                    and source is not None
+                    and (result.status != "migrated" or staged is not None)
+                ):
+                    journal.record(display_path, source, result, written=staged)
+
+            failed = sum(result.status in {"failed", "timeout"} for result in results)
+
+            self.line("")
+            if isolated is not None and isolated.recycled:
+                self.line(
+                    f"Replaced <comment>{isolated.recycled}</comment> worker "
+                    "process(es) that exceeded a budget."
+                )
+            if dry_run:
+                self.line("<info>Dry run: no files were written.</info>")
+            elif len(writer) > 0:
+                written = len(writer)
+                archive = writer.commit()
+                if archive is not None:
+                    self.line(f"Created backup archive <c1>{archive}</>")
+                self.line(
+                    f"<info>Wrote <comment>{written}</comment> migrated file(s).</info>"
+                )
+            else:
+                self.line("<info>No migration changes were necessary.</info>")
+
+        if report_path:
+            from poetry_plugin_migrate.reports import build_report, write_report
+
+            write_report(
+                Path(report_path),
+                build_report(root, results, shard=shard, dry_run=dry_run),
+            )
+            self.line(f"Wrote report <c1>{report_path}</>")
+
+        return 1 if failed else 0
+
+    def _handle_git_refs(self, refs: list[str]) -> int:
+        """Migrate the projects of git refs in memory and report the results."""
+        from poetry_plugin_migrate.batch import ProjectResult, migrate_source
+        from poetry_plugin_migrate.gitstore import GitObjectReader, tree_projects
+        from poetry_plugin_migrate.patch import unified_text_diff
+        from poetry_plugin_migrate.profiling import register_cache, trace_span
+        from poetry_plugin_migrate.templates import TemplateCache
+
+        root = self.get_application().project_directory
+        projects = []
+        try:
+            for ref in refs:
+                projects += [
+                    (f"{ref}:{path}", object_id)
+                    for path, object_id in tree_projects(root, ref)
+                ]
+        except (OSError, ValueError) as error:
+            self.line_error(f"<error>{error}</error>")
+            return 1
+        self.line(
+            f"Migrating <comment>{len(projects)}</comment> "
+            f"<comment>pyproject.toml</comment> file(s) from "
+            f"<comment>{len(refs)}</comment> git ref(s)..."
+        )
+        self.line("")
+
+        templates = TemplateCache()
+        register_cache("migration templates", templates)
+
+        # Most files are identical across release branches and tags; each
+        # distinct blob is migrated once.
+        blobs: dict[str, tuple[str, ProjectResult]] = {}
+        results = []
+        diffs = []
+        with GitObjectReader(root) as reader:
+            for display_path, object_id in projects:
+                # Results are labeled relative to the project directory, so
+                # reports name each project by its ref and path.
+                path = root / display_path
+                with trace_span(display_path, "project"):
+                    if object_id in blobs:
+                        source, blob_result = blobs[object_id]
+                        result = ProjectResult(
+                            path,
+                            blob_result.status,
+                            migrated=blob_result.migrated,
+                            warnings=blob_result.warnings,
+                            errors=blob_result.errors,
+                        )
+                    else:
+                        try:
+                            source = reader.read(object_id).decode("utf-8")
+                        except UnicodeDecodeError as error:
+                            source = ""
+                            result = ProjectResult(path, "failed", errors=[str(error)])
+                        else:
+                            result = migrate_source(
+                                path,
+                                source,
+                                self,
+                                literal=not self.option("no-literal"),
+                                templates=templates,
+                            )
+                        blobs[object_id] = (source, result)
+                results.append(result)
+                self._write_project_result(result, display_path)
+                if result.status == "migrated" and result.migrated is not None:
+                    diffs.append(
+                        unified_text_diff(source, result.migrated, display_path)
+                    )
+
+        failed = sum(result.status == "failed" for result in results)
+
+        self.line("")
+        self.line(
+            f"<info>Read <comment>{len(blobs)}</comment> distinct file(s); "
+            "no files were written.</info>"
+        )
+        diff_path = self.option("diff")
+        if diff_path:
+            from poetry_plugin_migrate.writer import atomic_write
+
+            atomic_write(Path(diff_path), "".join(diffs).encode("utf-8"))
+            self.line(
+                f"Wrote <comment>{len(diffs)}</comment> diff(s) to <c1>{diff_path}</>"
+            )
+        report_path = self.option("report")
+        if report_path:
+            from poetry_plugin_migrate.reports import build_report, write_report
+
+            write_report(Path(report_path), build_report(root, results, dry_run=True))
+            self.line(f"Wrote report <c1>{report_path}</>")
+
+        return 1 if failed else 0
+
+    def _handle_what_if(self, *, recursive: bool) -> int:
+        """Print the outcome of each prompt answer without writing any file."""
+        from poetry_plugin_migrate.batch import discover_projects, in_shard, parse_shard
+        from poetry_plugin_migrate.profiling import trace_span
+        from poetry_plugin_migrate.whatif import explore_project
+
+        root = self.get_application().project_directory
+        shard = None
+        if recursive:
+            if self.option("shard"):
+                try:
+                    shard = parse_shard(self.option("shard"))
+                except ValueError as error:
+                    self.line_error(f"<error>{error}</error>")
+                    return 1
+            projects = discover_projects(root)
+            if shard is not None:
+                projects = [path for path in projects if in_shard(path, root, shard)]
+        else:
+            projects = [self.poetry.file.path]
+        self.line(
+            f"Exploring the migration prompts of <comment>{len(projects)}</comment> "
+            f"<comment>pyproject.toml</comment> file(s)..."
+        )
+        self.line("")
+
+        explorations = []
+        for path in projects:
+            display_path = path.relative_to(root).as_posix()
+            with trace_span(display_path, "project"):
+                exploration = explore_project(
+                    path, self, literal=not self.option("no-literal")
+                )
+            explorations.append(exploration)
+            self._write_project_result(exploration.result, display_path)
+            for decision in exploration.decisions:
+                context = "; ".join(
+                    f"{question} {answer}" for question, answer in decision.context
+                )
+                self.line(
+                    f"  <b>{decision.prompt.question}</b>"
+                    + (f" (after {context})" if context else "")
+                )
+                for index, (choice, result) in enumerate(
+                    zip(decision.prompt.choices, decision.outcomes, strict=True)
+                ):
+                    marker = "*" if index == decision.prompt.default else " "
+                    outcome = result.status
+                    if result.warnings:
+                        outcome += f", {len(result.warnings)} warning(s)"
+                    self.line(f"  {marker} {choice}: <info>{outcome}</info>")
+                    for project_error in result.errors:
+                        self.line(f"      - {project_error}")
+
+        runs = sum(exploration.runs for exploration in explorations)
+        self.line("")
+        self.line(
+            f"<info>Explored <comment>{len(projects)}</comment> project(s) with "
+            f"<comment>{runs}</comment> migration(s); no files were written. "
+            "Default answers are marked with *.</info>"
+        )
+        report_path = self.option("report")
+        if report_path:
+            from poetry_plugin_migrate.reports import write_report
+            from poetry_plugin_migrate.whatif import build_what_if_report
+
+            write_report(
+                Path(report_path),
+                build_what_if_report(root, explorations, shard=shard),
+            )
+            self.line(f"Wrote report <c1>{report_path}</>")
+
+        failed = any(
+            exploration.result.status == "failed" for exploration in explorations
+        )
+        return 1 if failed else 0
+
+    def _isolated_migrator(self) -> IsolatedMigrator | None:
+        """Return a budgeted worker if ``--timeout`` or ``--memory-limit`` is set."""
+        timeout_option = self.option("timeout")
+        memory_option = self.option("memory-limit")
+        if not timeout_option and not memory_option:
+            return None
+
+        from poetry_plugin_migrate.isolation import IsolatedMigrator
+
+        timeout = None
+        if timeout_option:
+            try:
+                timeout = float(timeout_option)
+            except ValueError:
+                timeout = 0.0
+            if not timeout > 0:
+                raise ValueError(
+                    f"--timeout must be a positive number of seconds, got {timeout_option}"
+                )
+        memory_limit = None
+        if memory_option:
+            if not memory_option.isdigit() or int(memory_option) == 0:
+                raise ValueError(
+                    f"--memory-limit must be a positive number of MiB, got {memory_option}"
+                )
+            try:
+                import resource  # noqa: F401
+            except ImportError:
+                raise ValueError(
+                    "--memory-limit is not supported on this platform"
+                ) from None
+            memory_limit = int(memory_option) * 1024 * 1024
+        requirement_cache = self.option("requirement-cache")
+        return IsolatedMigrator(
+            literal=not self.option("no-literal"),
+            timeout=timeout,
+            memory_limit=memory_limit,
+            requirement_cache=Path(requirement_cache) if requirement_cache else None,
+        )
+
+    def _write_project_result(self, result: ProjectResult, display_path: str) -> None:
+        """Print the outcome of one project in a recursive run."""
+        if result.status in {"failed", "timeout"}:
+            label = "Failed" if result.status == "failed" else "Stopped"
+            self.line_error(f"<error>{label}</error> <c1>{display_path}</c1>")
+            for project_error in result.errors:
+                self.line_error(f"  - {project_error}")
+        elif result.status == "unchanged":
+            self.line(f"<info>Unchanged</info> <c1>{display_path}</c1>")
+        else:
+            self.line(f"<info>Migrated</info> <c1>{display_path}</c1>")
+        for warning in result.warnings:
+            self.line_error(f"  <warning>Warning: {warning}</warning>")
+
+    def _write_profile(self) -> None:
+        """Print process-wide cache statistics and stage timings."""
+        from poetry_plugin_migrate.profiling import cache_statistics, timing_statistics
+
+        self.line("")
+        self.line("<b>Profile</b>")
+        for name, hits, misses in cache_statistics():
+            calls = hits + misses
+            hit_rate = f"{hits / calls:.1%}" if calls else "n/a"
+            self.line(
+                f"  {name}: <comment>{hits}</comment> hit(s), "
+                f"<comment>{misses}</comment> miss(es), hit rate {hit_rate}"
+            )
+        for name, calls, seconds in timing_statistics():
+            self.line(
+                f"  {name}: <comment>{calls}</comment> call(s), "
+                f"<comment>{seconds * 1000:.1f}</comment> ms total, "
+                f"{seconds * 1000 / calls:.2f} ms per call"
+            )
+
+    def _write_memory_profile(self) -> None:
+        """Print per-phase memory statistics of the finished run."""
+        from poetry_plugin_migrate.profiling import allocation_sites, memory_statistics
+
+        self.line("")
+        self.line("<b>Memory</b>")
+        for name, calls, peak, net in memory_statistics():
+            self.line(
+                f"  {name}: <comment>{calls}</comment> call(s), "
+                f"peak <comment>{_format_bytes(peak)}</comment>, "
+                f"net {'+' if net >= 0 else '-'}{_format_bytes(abs(net))}"
+            )
+        sites = allocation_sites()
+        if sites:
+            self.line("")
+            self.line("<b>Largest allocation sites after migrating a file</b>")
+            for location, size, count in sites:
+                self.line(
+                    f"  {location}: <comment>{_format_bytes(size)}</comment> "
+                    f"in {count} block(s)"
+                )
+
+    def _handle_rollback(self, archive: Path) -> int:
+        """Restore all files stored in a backup archive."""
+        import tarfile
+
+        from poetry_plugin_migrate.writer import restore_backup_archive
+
+        try:
+            restored = restore_backup_archive(archive)
+        except (OSError, tarfile.TarError, ValueError) as error:
+            self.line_error(f"<error>Rollback aborted: {error}</error>")
+            return 1
+
+        for path in restored:
+            self.line(f"Restored <c1>{path}</>")
+        self.line(
+            f"<info>Restored <comment>{len(restored)}</comment> file(s) "
+            f"from <c1>{archive}</>.</info>"
+        )
+        return 0
+
+
+def _format_bytes(size: int) -> str:
+    if size < 1024:
+        return f"{size} B"
+    scaled = size / 1024
+    for unit in ("KiB", "MiB"):
+        if scaled < 1024:
+            return f"{scaled:.1f} {unit}"
+        scaled /= 1024
+    return f"{scaled:.1f} GiB"
+
+
+class MergeReportsCommand(Command):
+    name = "migrate merge-reports"
+    description: str = (
+        "Merge the JSON reports of a sharded <info>migrate --recursive</info> run."
+    )
+
+    arguments: ClassVar[list[Argument]] = [
+        argument("reports", description="The shard reports to merge.", multiple=True)
+    ]
+    options: ClassVar[list[Option]] = [
+        option(
+            long_name="output",
+            short_name="o",
+            description="Write the merged report to the given file.",
+            flag=False,
+        ),
+    ]
+
+    def handle(self) -> int:
+        from poetry_plugin_migrate.reports import (
+            load_report,
+            merge_reports,
+            write_report,
+        )
+
+        try:
+            merged = merge_reports(
+                load_report(Path(report)) for report in self.argument("reports")
+            )
+        except (OSError, TypeError, ValueError) as error:
+            self.line_error(f"<error>Merging reports failed: {error}</error>")
+            return 1
+
+        summary = merged["summary"]
+        assert isinstance(summary, dict)
+        self.line(
+            f"<info>Migrated</info> <comment>{summary['migrated']}</comment>, "
+            f"<info>unchanged</info> <comment>{summary['unchanged']}</comment>, "
+            f"<info>failed</info> <comment>{summary['failed']}</comment>, "
+            f"<info>stopped</info> <comment>{summary['timeout']}</comment> "
+            f"project(s) in {merged['shard_count']} shard(s)."
+        )
+        projects = merged["projects"]
+        assert isinstance(projects, list)
+        for project in projects:
+            if project["status"] in {"failed", "timeout"}:
+                label = "Failed" if project["status"] == "failed" else "Stopped"
+                self.line_error(f"<error>{label}</error> <c1>{project['path']}</c1>")
+
+        output = self.option("output")
+        if output:
+            write_report(Path(output), merged)
+            self.line(f"Wrote merged report <c1>{output}</>")
+
+        missing = merged["missing_shards"]
+        assert isinstance(missing, list)
+        if missing:
+            self.line_error(
+                "<error>Missing report(s) for shard(s) "
+                f"{', '.join(str(index) for index in missing)}.</error>"
+            )
+            return 1
+        return 1 if summary["failed"] or summary["timeout"] else 0
@@ -3,40 +3,129 @@ from __future__ import annotations
 import re
 from collections.abc import Mapping
 from copy import deepcopy
-from typing import TYPE_CHECKING, TypeAlias
+from typing import TYPE_CHECKING, ClassVar, TypeAlias
 
 from packaging.specifiers import InvalidSpecifier, SpecifierSet
 from packaging.utils import canonicalize_name
 from tomlkit import TOMLDocument
-from tomlkit.items import Array, InlineTable, Item, String
+from tomlkit.items import AoT, Array, Item, String
 
 from poetry_plugin_migrate.requirements import (
     UnrepresentableRequirementError,
-    render_pep508_requirement,
+    render_dependency_requirement,
 )
 from poetry_plugin_migrate.toml import (
+    PlainTable,
     TomlTable,
     append_array_value,
     extend_array_preserving_comments,
     is_table,
     make_string,
+    parse_array,
+    plain_get,
     require_array,
     require_item,
+    require_plain_array,
+    require_plain_table,
     require_table,
 )
 
 if TYPE_CHECKING:
+    from collections.abc import Iterable
+
     from poetry.core.packages.dependency import Dependency
 
     from poetry_plugin_migrate.migrator import Migrator
+    from poetry_plugin_migrate.requirement_cache import RequirementCache
 
 
 DependencySpec: TypeAlias = str | Mapping[str, object]
 
 
+def _reusable_section(
+    migrator: Migrator,
+    kind: str,
+    name: str,
+    sections: Iterable[object],
+    specs: Iterable[object],
+) -> tuple[RequirementCache, str] | None:
+    """Return the persistent cache and key of a converted section, if any.
+
+    Only non-interactive migrations reuse sections. Interactively, converting
+    a section can ask for the requirement style, so skipping the conversion
+    would change the prompts.
+    """
+    from poetry_plugin_migrate.requirement_cache import active_requirement_cache
+
+    cache = active_requirement_cache()
+    if cache is None or not migrator.skip:
+        return None
+    sources: list[str | None] = []
+    for section in sections:
+        if section is not None and not isinstance(section, Item):
+            return None
+        sources.append(None if section is None else section.as_string())
+    key = cache.section_key(
+        kind,
+        name,
+        sources,
+        specs,
+        literal=migrator.literal,
+        keep_version_brackets=migrator._keep_pep508_version_brackets(),
+    )
+    return None if key is None else (cache, key)
+
+
+def _constraint_items(raw_constraint: object) -> list[object]:
+    """Return the parsed items of a dependency's constraints.
+
+    Multiple constraints are an array of inline tables or an array of
+    ``[[tool.poetry.dependencies.<name>]]`` tables.
+    """
+    if isinstance(raw_constraint, (Array, AoT)):
+        return list(raw_constraint)
+    return [raw_constraint]
+
+
+def _append_constraints(
+    target: Array, raw_constraint: object, replacements: list[Item]
+) -> None:
+    """Append the converted constraints of one dependency with their comments."""
+    if isinstance(raw_constraint, Array):
+        extend_array_preserving_comments(target, raw_constraint, replacements)
+    elif isinstance(raw_constraint, AoT):
+        for replacement, constraint in zip(replacements, raw_constraint, strict=True):
+            append_array_value(target, replacement, constraint)
+    else:
+        append_array_value(
+            target,
+            replacements[0],
+            require_item(raw_constraint, "dependency constraint"),
+        )
+
+
 class DependencyMigrator:
     """Handles migration of [tool.poetry.dependencies] and extras."""
 
+    PEP508_FIELDS: ClassVar[frozenset[str]] = frozenset(
+        {
+            "version",
+            "git",
+            "branch",
+            "tag",
+            "rev",
+            "file",
+            "path",
+            "url",
+            "subdirectory",
+            "python",
+            "platform",
+            "markers",
+            "extras",
+        }
+    )
+    """Poetry dependency fields represented in a PEP 508 string."""
+
     def __init__(
         self, migrator: Migrator, tool_poetry: TomlTable, project: TomlTable
     ) -> None:
@@ -46,6 +135,9 @@ class DependencyMigrator:
         self.deps = require_table(
             tool_poetry["dependencies"], "tool.poetry.dependencies"
         )
+        self.legacy_deps = require_plain_table(
+            migrator.legacy.get("dependencies"), "tool.poetry.dependencies"
+        )
         project_dependencies = project.get("dependencies")
         self.project_dependencies_preexisting = (
             project_dependencies is not None
@@ -57,8 +149,10 @@ class DependencyMigrator:
             and len(require_table(project_optional, "project.optional-dependencies"))
             > 0
         )
-        legacy_extras = tool_poetry.get("extras")
-        self.legacy_extras_nonempty = is_table(legacy_extras) and len(legacy_extras) > 0
+        legacy_extras = migrator.legacy.get("extras")
+        self.legacy_extras_nonempty = (
+            isinstance(legacy_extras, dict) and len(legacy_extras) > 0
+        )
 
     def run(self) -> None:
         self.keep_version_brackets = self.migrator._keep_pep508_version_brackets()
@@ -138,7 +232,7 @@ class DependencyMigrator:
 
     def _dependency_name_map(self) -> dict[str, str]:
         result: dict[str, str] = {}
-        for name in self.deps:
+        for name in self.legacy_deps:
             if name == "python":
                 continue
             normalized = canonicalize_name(str(name))
@@ -151,10 +245,10 @@ class DependencyMigrator:
         return result
 
     def _extra_references(self) -> dict[str, set[str]]:
-        extras = self.tool_poetry.get("extras")
+        extras = self.migrator.legacy.get("extras")
         if extras is None:
             return {}
-        extras_table = require_table(extras, "tool.poetry.extras")
+        extras_table = require_plain_table(extras, "tool.poetry.extras")
         references: dict[str, set[str]] = {}
         normalized_extra_names: dict[str, str] = {}
         dependency_names = self._dependency_name_map()
@@ -169,7 +263,9 @@ class DependencyMigrator:
                 )
             normalized_extra_names[normalized_extra] = str(extra_name)
 
-            members = require_array(raw_members, f"tool.poetry.extras.{extra_name}")
+            members = require_plain_array(
+                raw_members, f"tool.poetry.extras.{extra_name}"
+            )
             for member in members:
                 if not isinstance(member, str):
                     raise TypeError(
@@ -187,26 +283,41 @@ class DependencyMigrator:
 
     def _unsafe_main_dependencies(self) -> dict[str, set[str]]:
         """Return dependencies that cannot be represented safely in PEP 508."""
+        reusable = _reusable_section(
+            self.migrator,
+            "unsafe dependencies",
+            "",
+            [self.deps, self.tool_poetry.get("extras")],
+            self.legacy_deps.values(),
+        )
+        if reusable is not None:
+            cache, key = reusable
+            cached = cache.lookup_section(key)
+            if isinstance(cached, dict):
+                return {name: set(reasons) for name, reasons in cached.items()}
+        unsafe = self._find_unsafe_main_dependencies()
+        if reusable is not None:
+            cache.store_section(
+                key, {name: sorted(reasons) for name, reasons in unsafe.items()}
+            )
+        return unsafe
+
+    def _find_unsafe_main_dependencies(self) -> dict[str, set[str]]:
         from poetry.core.factory import Factory
         from poetry.core.packages.path_dependency import PathDependency
 
         unsafe: dict[str, set[str]] = {}
         extra_references = self._extra_references()
-        for package_name, raw_constraint in self.deps.items():
+        for package_name, raw_constraint in self.legacy_deps.items():
             if package_name == "python":
                 continue
-            constraints: list[object] = (
-                list(raw_constraint)
-                if isinstance(raw_constraint, Array)
-                else [raw_constraint]
-            )
-            for constraint in constraints:
-                dependency = Factory.create_dependency(
-                    str(package_name),
-                    deepcopy(self._dependency_spec(constraint)),
-                )
+            for constraint in self._plain_constraints(raw_constraint):
+                spec = self._dependency_spec(constraint)
+                dependency = Factory.create_dependency(package_name, spec)
                 try:
-                    render_pep508_requirement(
+                    render_dependency_requirement(
+                        package_name,
+                        spec,
                         dependency,
                         keep_version_brackets=self.keep_version_brackets,
                     )
@@ -220,13 +331,9 @@ class DependencyMigrator:
                 ):
                     unsafe.setdefault(str(package_name), set()).add("relative path")
 
-                remaining = self._without_pep508_fields(
-                    constraint, extra_fields=["optional"]
-                )
-                if is_table(remaining):
-                    fields = {str(field) for field in remaining}
-                    if fields:
-                        unsafe.setdefault(str(package_name), set()).update(fields)
+                fields = self._poetry_only_fields(constraint, extra_fields={"optional"})
+                if fields:
+                    unsafe.setdefault(str(package_name), set()).update(fields)
 
                 normalized_dependency_name = canonicalize_name(str(package_name))
                 referenced = normalized_dependency_name in extra_references
@@ -350,31 +457,22 @@ class DependencyMigrator:
                 normalized_dependency_name = canonicalize_name(member)
                 dependency_name = dependency_names[normalized_dependency_name]
                 raw_constraint = self.deps[dependency_name]
-                constraints = (
-                    list(raw_constraint)
-                    if isinstance(raw_constraint, Array)
-                    else [raw_constraint]
-                )
                 replacements: list[Item] = []
-                for constraint in constraints:
-                    dependency = Factory.create_dependency(
-                        dependency_name,
-                        self._dependency_spec(deepcopy(constraint)),
+                for constraint, plain_constraint in self._constraint_pairs(
+                    dependency_name
+                ):
+                    spec = self._dependency_spec(plain_constraint)
+                    dependency = Factory.create_dependency(dependency_name, spec)
+                    replacements.append(
+                        self._pep508_string(
+                            dependency_name, spec, dependency, constraint
+                        )
                     )
-                    replacements.append(self._pep508_string(dependency, constraint))
                 if normalized_dependency_name in comments_emitted:
                     for replacement in replacements:
                         converted.add_line(replacement)
-                elif isinstance(raw_constraint, Array):
-                    extend_array_preserving_comments(
-                        converted, raw_constraint, replacements
-                    )
                 else:
-                    append_array_value(
-                        converted,
-                        replacements[0],
-                        require_item(raw_constraint, "dependency constraint"),
-                    )
+                    _append_constraints(converted, raw_constraint, replacements)
                 comments_emitted.add(normalized_dependency_name)
             optional_dependencies[extra_name] = converted
 
@@ -386,6 +484,41 @@ class DependencyMigrator:
 
     def _migrate_main_dependencies(self) -> None:
         """Migrate main dependencies to [project.dependencies] or keep dynamic."""
+        # An existing empty array keeps its own formatting, so only a new
+        # array is reused.
+        reusable = (
+            None
+            if "dependencies" in self.project
+            else _reusable_section(
+                self.migrator,
+                "dependencies",
+                "",
+                [self.deps],
+                self.legacy_deps.values(),
+            )
+        )
+        cached = None
+        if reusable is not None:
+            cache, key = reusable
+            cached = cache.lookup_section(key)
+        if isinstance(cached, str):
+            self.project["dependencies"] = parse_array(cached)
+        else:
+            self._convert_main_dependencies()
+            if reusable is not None:
+                cache.store_section(key, self.project["dependencies"].as_string())
+        # Replacing the complete nested table avoids tomlkit's stale index bug
+        # for split declarations such as [tool.poetry.dependencies.foo].
+        python_constraint = self.deps.get("python")
+        del self.tool_poetry["dependencies"]
+        if python_constraint is not None:
+            from tomlkit import table
+
+            remaining = table()
+            remaining["python"] = deepcopy(python_constraint)
+            self.tool_poetry["dependencies"] = remaining
+
+    def _convert_main_dependencies(self) -> None:
         from poetry.core.factory import Factory
         from tomlkit import array
 
@@ -399,100 +532,78 @@ class DependencyMigrator:
         for dependency_name, raw_constraint in tuple(self.deps.items()):
             if dependency_name == "python":
                 continue
-            constraints = (
-                list(raw_constraint)
-                if isinstance(raw_constraint, Array)
-                else [raw_constraint]
-            )
             replacements: list[Item] = []
-            for constraint in constraints:
-                dependency = Factory.create_dependency(
-                    str(dependency_name),
-                    self._dependency_spec(deepcopy(constraint)),
-                )
+            for constraint, plain_constraint in self._constraint_pairs(dependency_name):
+                spec = self._dependency_spec(plain_constraint)
+                dependency = Factory.create_dependency(dependency_name, spec)
                 if not dependency.is_optional():
-                    replacements.append(self._pep508_string(dependency, constraint))
+                    replacements.append(
+                        self._pep508_string(
+                            dependency_name, spec, dependency, constraint
+                        )
+                    )
             if not replacements:
                 continue
-            if isinstance(raw_constraint, Array):
-                extend_array_preserving_comments(
-                    project_deps, raw_constraint, replacements
-                )
-            else:
-                append_array_value(
-                    project_deps,
-                    replacements[0],
-                    require_item(raw_constraint, "dependency constraint"),
-                )
-        # Replacing the complete nested table avoids tomlkit's stale index bug
-        # for split declarations such as [tool.poetry.dependencies.foo].
-        python_constraint = self.deps.get("python")
-        del self.tool_poetry["dependencies"]
-        if python_constraint is not None:
-            from tomlkit import table
-
-            remaining = table()
-            remaining["python"] = deepcopy(python_constraint)
-            self.tool_poetry["dependencies"] = remaining
+            _append_constraints(project_deps, raw_constraint, replacements)
 
     # ------------------------------------------------------------------
     # Utilities
     # ------------------------------------------------------------------
 
+    def _constraint_pairs(self, dependency_name: str) -> list[tuple[object, object]]:
+        """Pair each parsed constraint item with its plain-data snapshot."""
+        constraints = _constraint_items(self.deps[dependency_name])
+        plain_constraints = self._plain_constraints(self.legacy_deps[dependency_name])
+        if len(constraints) != len(plain_constraints):
+            raise TypeError(
+                f"[tool.poetry.dependencies.{dependency_name}] has "
+                f"{len(constraints)} constraint(s) but its snapshot has "
+                f"{len(plain_constraints)}"
+            )
+        return list(zip(constraints, plain_constraints, strict=True))
+
+    @staticmethod
+    def _plain_constraints(value: object) -> list[object]:
+        """Return the constraints of a snapshot value with multiple constraints."""
+        return value if isinstance(value, list) else [value]
+
     @staticmethod
     def _dependency_spec(value: object) -> DependencySpec:
-        """Narrow a TOML dependency value to Poetry's accepted input shape."""
+        """Narrow a snapshot dependency value to Poetry's accepted input shape."""
         if isinstance(value, str):
             return value
-        if is_table(value):
+        if isinstance(value, dict):
             return value
         raise TypeError(
             "Dependency constraints must be strings or tables, "
             f"got {type(value).__name__}"
         )
 
-    @staticmethod
-    def _without_pep508_fields(
-        constraint: object,
-        extra_fields: list[str] | None = None,
-        include_markers: bool = True,
-    ) -> object:
-        """Return Poetry-only fields not representable in the PEP 508 string.
-
-        Rebuild the TOML table instead of popping keys in place. tomlkit 0.15.0
-        can retain separator tokens after removing inline-table entries, yielding
-        invalid output such as ``, , python = ...``.
-        """
-        if not is_table(constraint):
-            return constraint
-        fields = list(extra_fields) if extra_fields else []
-        fields.extend(
-            (
-                "version",
-                "git",
-                "branch",
-                "tag",
-                "rev",
-                "file",
-                "path",
-                "url",
-                "subdirectory",
-            )
-        )
-        if include_markers:
-            fields.extend(("python", "platform", "markers", "extras"))
-        from tomlkit import inline_table, table
-
-        result = inline_table() if isinstance(constraint, InlineTable) else table()
-        for field, value in constraint.items():
-            if field not in fields:
-                result[field] = deepcopy(value)
-        return result
-
-    def _pep508_string(self, dependency: Dependency, source: object) -> String:
+    @classmethod
+    def _poetry_only_fields(
+        cls, constraint: object, extra_fields: frozenset[str] | set[str] = frozenset()
+    ) -> set[str]:
+        """Return Poetry-only fields not representable in the PEP 508 string."""
+        if not isinstance(constraint, dict):
+            return set()
+        return {
+            str(field)
+            for field in constraint
+            if field not in cls.PEP508_FIELDS and field not in extra_fields
+        }
+
+    def _pep508_string(
+        self,
+        name: str,
+        spec: DependencySpec,
+        dependency: Dependency,
+        source: object,
+    ) -> String:
         """Create a PEP 508 string while retaining source-item trivia."""
         result = make_string(
-            render_pep508_requirement(
+            render_dependency_requirement(
+                name,
+                spec,
                 dependency,
                 keep_version_brackets=self.keep_version_brackets,
             ),
@@ -616,7 +727,12 @@ class DependencyGroupMigrator:
             return
 
         dependencies = self._convert_dependencies(
-            "tool.poetry.dev-dependencies", legacy_dev
+            "tool.poetry.dev-dependencies",
+            legacy_dev,
+            require_plain_table(
+                self.migrator.legacy.get("dev-dependencies"),
+                "tool.poetry.dev-dependencies",
+            ),
         )
         if dependencies is None:
             return
@@ -634,6 +750,42 @@ class DependencyGroupMigrator:
 
     def _convert_group(
         self, group_name: str, group: TomlTable
+    ) -> tuple[Array, set[str]] | None:
+        """Convert a group, reusing an earlier conversion of identical source."""
+        dependencies = plain_get(
+            self.migrator.legacy, "group", group_name, "dependencies"
+        )
+        reusable = _reusable_section(
+            self.migrator,
+            "group",
+            group_name,
+            [group],
+            dependencies.values() if isinstance(dependencies, dict) else [],
+        )
+        if reusable is not None:
+            cache, key = reusable
+            cached = cache.lookup_section(key)
+            if isinstance(cached, dict):
+                self.migrator.warnings.extend(cached["warnings"])
+                if cached["array"] is None:
+                    return None
+                return parse_array(cached["array"]), set(cached["consumed"])
+
+        warning_count = len(self.migrator.warnings)
+        converted = self._build_group(group_name, group)
+        if reusable is not None:
+            cache.store_section(
+                key,
+                {
+                    "array": None if converted is None else converted[0].as_string(),
+                    "consumed": [] if converted is None else sorted(converted[1]),
+                    "warnings": self.migrator.warnings[warning_count:],
+                },
+            )
+        return converted
+
+    def _build_group(
+        self, group_name: str, group: TomlTable
     ) -> tuple[Array, set[str]] | None:
         from tomlkit import array, inline_table
 
@@ -670,6 +822,12 @@ class DependencyGroupMigrator:
             converted_dependencies = self._convert_dependencies(
                 f"tool.poetry.group.{group_name}.dependencies",
                 dependencies,
+                require_plain_table(
+                    plain_get(
+                        self.migrator.legacy, "group", group_name, "dependencies"
+                    ),
+                    f"tool.poetry.group.{group_name}.dependencies",
+                ),
                 result,
             )
             if converted_dependencies is None:
@@ -685,6 +843,7 @@ class DependencyGroupMigrator:
         self,
         container_name: str,
         dependencies: TomlTable,
+        plain_dependencies: PlainTable,
         target: Array | None = None,
     ) -> Array | None:
         from poetry.core.factory import Factory
@@ -695,18 +854,12 @@ class DependencyGroupMigrator:
         result.multiline(True)
 
         for dependency_name, raw_constraint in dependencies.items():
-            constraints: list[object] = (
-                list(raw_constraint)
-                if isinstance(raw_constraint, Array)
-                else [raw_constraint]
-            )
             replacements: list[Item] = []
-            for raw_item in constraints:
-                constraint = deepcopy(raw_item)
-                dependency = Factory.create_dependency(
-                    dependency_name,
-                    DependencyMigrator._dependency_spec(constraint),
-                )
+            for constraint in DependencyMigrator._plain_constraints(
+                plain_dependencies[dependency_name]
+            ):
+                spec = DependencyMigrator._dependency_spec(constraint)
+                dependency = Factory.create_dependency(dependency_name, spec)
                 if (
                     isinstance(dependency, PathDependency)
                     and not dependency.path.is_absolute()
@@ -716,20 +869,18 @@ class DependencyGroupMigrator:
                     )
                     return None
 
-                remaining_constraint = DependencyMigrator._without_pep508_fields(
-                    constraint
-                )
-                if is_table(remaining_constraint) and len(remaining_constraint) > 0:
-                    fields = ", ".join(
-                        sorted(str(field) for field in remaining_constraint)
-                    )
+                poetry_only_fields = DependencyMigrator._poetry_only_fields(constraint)
+                if poetry_only_fields:
+                    fields = ", ".join(sorted(poetry_only_fields))
                     self.migrator.warnings.append(
                         f"[{container_name}.{dependency_name}] uses Poetry-only fields ({fields}); group kept."
                     )
                     return None
 
                 try:
-                    pep508 = render_pep508_requirement(
+                    pep508 = render_dependency_requirement(
+                        dependency_name,
+                        spec,
                         dependency,
                         keep_version_brackets=self.migrator._keep_pep508_version_brackets(),
                     )
@@ -741,13 +892,6 @@ class DependencyGroupMigrator:
                 converted = make_string(pep508, literal=self.migrator.literal)
                 replacements.append(converted)
 
-            if isinstance(raw_constraint, Array):
-                extend_array_preserving_comments(result, raw_constraint, replacements)
-            else:
-                append_array_value(
-                    result,
-                    replacements[0],
-                    require_item(raw_constraint, "dependency constraint"),
-                )
+            _append_constraints(result, raw_constraint, replacements)
 
         return result
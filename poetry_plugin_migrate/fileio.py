@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import TYPE_CHECKING, TypeVar
+
+from poetry_plugin_migrate.profiling import trace_span
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable, Iterator, Sequence
+    from concurrent.futures import Future
+    from pathlib import Path
+    from types import TracebackType
+
+    from typing_extensions import Self
+
+T = TypeVar("T")
+
+DEFAULT_IO_CONCURRENCY = 8
+
+
+def read_file(path: Path) -> bytes:
+    """Return the contents of ``path`` inside an I/O trace span."""
+    with trace_span("read", "io", path=str(path)):
+        return path.read_bytes()
+
+
+class FileIOStage:
+    """Overlap blocking file operations of a batch run on an asyncio loop.
+
+    The event loop runs in a background thread and hands every operation to a
+    pool of ``concurrency`` I/O threads. Reads, backups and atomic writes of
+    many files therefore wait for the filesystem at the same time, while the
+    CPU-bound migration keeps running in the calling thread or in its worker
+    processes. On network filesystems, where each open, stat, write and
+    rename is a round trip to the server, this hides most of the per-file
+    latency. The loop and its threads start with the first operation.
+    """
+
+    concurrency: int
+    """Maximum number of file operations in flight."""
+
+    def __init__(self, concurrency: int = DEFAULT_IO_CONCURRENCY) -> None:
+        if concurrency < 1:
+            raise ValueError(
+                f"The I/O concurrency must be at least one file, got {concurrency}"
+            )
+        self.concurrency = concurrency
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+        self._executor: ThreadPoolExecutor | None = None
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    def submit(self, function: Callable[[], T]) -> Future[T]:
+        """Schedule ``function`` and return a future of its result."""
+        return asyncio.run_coroutine_threadsafe(self._call(function), self._start())
+
+    def read_ahead(
+        self, paths: Iterable[Path]
+    ) -> Iterator[tuple[Path, bytes | OSError]]:
+        """Yield the contents of each of ``paths`` in order.
+
+        Up to twice ``concurrency`` files are read ahead of the one being
+        consumed, so a caller that migrates each file overlaps that work with
+        the next reads. A file that cannot be read yields its error.
+        """
+        remaining = iter(paths)
+        pending: deque[tuple[Path, Future[bytes]]] = deque()
+
+        def fill() -> None:
+            for path in remaining:
+                pending.append((path, self.submit(partial(read_file, path))))
+                if len(pending) >= 2 * self.concurrency:
+                    return
+
+        fill()
+        while pending:
+            path, future = pending.popleft()
+            fill()
+            content: bytes | OSError
+            try:
+                content = future.result()
+            except OSError as error:
+                content = error
+            yield path, content
+
+    def run_all(self, functions: Sequence[Callable[[], T]]) -> list[T | BaseException]:
+        """Run ``functions`` concurrently and return each result or error in order."""
+        if not functions:
+            return []
+        return asyncio.run_coroutine_threadsafe(
+            self._gather(functions), self._start()
+        ).result()
+
+    def drain(self) -> None:
+        """Cancel operations that have not started and wait for running ones."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def close(self) -> None:
+        """Finish running operations and stop the event loop and its threads."""
+        self.drain()
+        if self._loop is not None and self._thread is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._loop.close()
+        self._loop = None
+        self._thread = None
+
+    def _start(self) -> asyncio.AbstractEventLoop:
+        if self._loop is None:
+            self._loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(
+                target=self._loop.run_forever, name="poetry-migrate-io", daemon=True
+            )
+            self._thread.start()
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                self.concurrency, thread_name_prefix="poetry-migrate-io"
+            )
+        return self._loop
+
+    async def _call(self, function: Callable[[], T]) -> T:
+        return await asyncio.get_running_loop().run_in_executor(
+            self._executor, function
+        )
+
+    async def _gather(
+        self, functions: Sequence[Callable[[], T]]
+    ) -> list[T | BaseException]:
+        return await asyncio.gather(
+            *(self._call(function) for function in functions), return_exceptions=True
+        )
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import subprocess
+from typing import IO, TYPE_CHECKING
+
+from poetry_plugin_migrate.batch import PYPROJECT_TOML, is_pruned_directory
+
+if TYPE_CHECKING:
+    from pathlib import Path
+    from types import TracebackType
+
+    from typing_extensions import Self
+
+# Symbolic links are stored as blobs holding the link target.
+_SYMLINK_MODE = b"120000"
+
+
+def tree_projects(repository: Path, ref: str) -> list[tuple[str, str]]:
+    """Return the path and blob id of every ``pyproject.toml`` in ``ref``.
+
+    Paths are relative to the top of the repository. Directories are pruned
+    like :func:`~poetry_plugin_migrate.batch.discover_projects` prunes them,
+    except that virtual environments cannot be recognized without their files.
+    """
+    if not ref or ref.startswith("-"):
+        raise ValueError(f"Invalid git ref {ref!r}")
+    try:
+        listing = subprocess.run(
+            ["git", "ls-tree", "-r", "-z", "--full-tree", ref],
+            cwd=repository,
+            capture_output=True,
+            check=True,
+        ).stdout
+    except subprocess.CalledProcessError as error:
+        message = error.stderr.decode("utf-8", "replace").strip()
+        raise ValueError(f"Cannot list git ref {ref!r}: {message}") from None
+
+    projects = []
+    for entry in listing.split(b"\0"):
+        if not entry:
+            continue
+        metadata, _, raw_path = entry.partition(b"\t")
+        mode, kind, object_id = metadata.split(b" ")
+        if kind != b"blob" or mode == _SYMLINK_MODE:
+            continue
+        *directories, name = raw_path.decode("utf-8", "surrogateescape").split("/")
+        if name == PYPROJECT_TOML and not any(
+            is_pruned_directory(directory) for directory in directories
+        ):
+            projects.append(("/".join([*directories, name]), object_id.decode()))
+    return projects
+
+
+class GitObjectReader:
+    """Read blobs through one long-running ``git cat-file --batch`` process.
+
+    The process starts with the first read, so a reader that is never used
+    costs nothing.
+    """
+
+    repository: Path
+    """Directory inside the repository whose object store is read."""
+
+    def __init__(self, repository: Path) -> None:
+        self.repository = repository
+        self._process: subprocess.Popen[bytes] | None = None
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    def read(self, object_id: str) -> bytes:
+        """Return the contents of the blob ``object_id``."""
+        stdin, stdout = self._streams()
+        stdin.write(object_id.encode() + b"\n")
+        stdin.flush()
+        header = stdout.readline()
+        if not header:
+            self.close()
+            raise RuntimeError("git cat-file exited while reading objects")
+        fields = header.split()
+        if len(fields) != 3:
+            raise ValueError(
+                f"Cannot read git object {object_id}: {header.decode().strip()}"
+            )
+        _, kind, size = fields
+        # The contents are followed by a line feed.
+        content = stdout.read(int(size) + 1)[:-1]
+        if kind != b"blob":
+            raise ValueError(f"Git object {object_id} is a {kind.decode()}, not a blob")
+        return content
+
+    def close(self) -> None:
+        """Stop the ``git cat-file`` process, if one is running."""
+        if self._process is None:
+            return
+        if self._process.stdin is not None:
+            self._process.stdin.close()
+        self._process.wait()
+        if self._process.stdout is not None:
+            self._process.stdout.close()
+        self._process = None
+
+    def _streams(self) -> tuple[IO[bytes], IO[bytes]]:
+        if self._process is None:
+            self._process = subprocess.Popen(
+                ["git", "cat-file", "--batch"],
+                cwd=self.repository,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+            )
+        assert self._process.stdin is not None
+        assert self._process.stdout is not None
+        return self._process.stdin, self._process.stdout
@@ -0,0 +1,271 @@
+from __future__ import annotations
+
+import multiprocessing
+from contextlib import suppress
+from importlib import import_module
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from poetry_plugin_migrate.batch import ProjectResult, migrate_project, profile_project
+from poetry_plugin_migrate.profiling import ENGINE_MODULES
+from poetry_plugin_migrate.requirement_cache import (
+    close_requirement_cache,
+    open_requirement_cache,
+)
+from poetry_plugin_migrate.templates import TemplateCache
+
+if TYPE_CHECKING:
+    from multiprocessing.connection import Connection
+    from multiprocessing.process import BaseProcess
+    from types import TracebackType
+
+    from typing_extensions import Self
+
+    WorkerConnection = Connection[object, object]
+
+_READY = "ready"
+_MEMORY_EXCEEDED = "memory"
+_PROFILED = "profiled"
+_MIGRATE = "migrate"
+_PROFILE = "profile"
+
+
+class _WorkerError:
+    """An exception raised in the worker, sent back in place of a result."""
+
+    message: str
+    """The exception's type and message."""
+
+    def __init__(self, error: Exception) -> None:
+        self.message = f"{type(error).__name__}: {error}"
+
+
+class _NonInteractiveCommand:
+    """Console stand-in for workers, which always migrate without prompts."""
+
+    def line(self, text: str) -> None:
+        pass
+
+    def confirm(self, question: str, default: bool = False) -> bool:
+        raise RuntimeError("Isolated migrations cannot prompt")
+
+    def choice(
+        self,
+        question: str,
+        choices: list[str],
+        default: int,
+        attempts: int | None = None,
+        multiple: bool = False,
+    ) -> object:
+        raise RuntimeError("Isolated migrations cannot prompt")
+
+
+def _serve(
+    connection: WorkerConnection,
+    literal: bool,
+    memory_limit: int | None,
+    requirement_cache: Path | None,
+) -> None:
+    """Serve the requests received over ``connection`` until ``None`` arrives.
+
+    A request migrates a file, or profiles its migration into a dump file.
+    """
+    # Import before the memory limit applies, so the budget covers the work on
+    # each file rather than the interpreter's startup.
+    for module in ENGINE_MODULES:
+        import_module(module)
+    if requirement_cache is not None:
+        open_requirement_cache(requirement_cache)
+    if memory_limit is not None:
+        import resource
+
+        resource.setrlimit(resource.RLIMIT_AS, (memory_limit, memory_limit))
+    command = _NonInteractiveCommand()
+    templates = TemplateCache()
+    connection.send(_READY)
+    while isinstance(request := connection.recv(), tuple):
+        kind, path, argument = request
+        result: ProjectResult | _WorkerError | str
+        try:
+            if kind == _PROFILE:
+                profile_project(path, command, literal=literal, output=argument)
+                result = _PROFILED
+            else:
+                result = migrate_project(
+                    path,
+                    command,
+                    literal=literal,
+                    templates=templates,
+                    content=argument,
+                )
+        except MemoryError:
+            result = _MEMORY_EXCEEDED
+        except Exception as error:  # noqa: BLE001
+            # Report bugs as failures instead of losing the worker.
+            result = _WorkerError(error)
+        connection.send(result)
+        if result == _MEMORY_EXCEEDED:
+            # The heap may be fragmented beyond use; let the parent replace us.
+            return
+    close_requirement_cache()
+
+
+class IsolatedMigrator:
+    """Migrate projects in a worker process bounded by per-file budgets.
+
+    A project that exceeds the wall-clock budget or exhausts the worker's
+    address-space limit is reported with the ``"timeout"`` status. Its worker
+    is killed and a fresh one is started for the next project, so one
+    pathological file cannot stall the batch. An exception raised by the
+    migration, or a worker that dies, is reported with the ``"failed"`` status.
+    """
+
+    timeout: float | None
+    """Wall-clock seconds a single project may take, or ``None``."""
+
+    memory_limit: int | None
+    """Address-space limit of the worker process in bytes, or ``None``."""
+
+    requirement_cache: Path | None
+    """Persistent requirement cache shared with the worker, or ``None``."""
+
+    literal: bool
+    """Whether generated strings prefer TOML literal strings."""
+
+    recycled: int
+    """Number of workers replaced after exceeding a budget."""
+
+    def __init__(
+        self,
+        *,
+        literal: bool,
+        timeout: float | None = None,
+        memory_limit: int | None = None,
+        requirement_cache: Path | None = None,
+    ) -> None:
+        self.literal = literal
+        self.timeout = timeout
+        self.memory_limit = memory_limit
+        self.requirement_cache = requirement_cache
+        self.recycled = 0
+        self._context = multiprocessing.get_context("spawn")
+        self._process: BaseProcess | None = None
+        self._connection: WorkerConnection | None = None
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    def migrate(self, path: Path, content: bytes | None = None) -> ProjectResult:
+        """Migrate ``path`` in the worker, enforcing the budgets.
+
+        ``content`` is the file's data if the caller has already read it.
+        """
+        result = self._call(path, (_MIGRATE, path, content))
+        if not isinstance(result, ProjectResult):
+            raise TypeError(f"Unexpected worker result {result!r}")
+        return result
+
+    def profile(self, path: Path, output: Path) -> ProjectResult | None:
+        """Profile the migration of ``path`` in the worker into ``output``.
+
+        The run is held to the same budgets as a migration. Return ``None``
+        once the dump is written, or the result that stopped it.
+        """
+        result = self._call(path, (_PROFILE, path, output))
+        if result == _PROFILED:
+            return None
+        if not isinstance(result, ProjectResult):
+            raise TypeError(f"Unexpected worker result {result!r}")
+        return result
+
+    def _call(self, path: Path, request: tuple[str, Path, object]) -> object:
+        """Send ``request`` about ``path`` and return the worker's reply.
+
+        A request that does not complete is answered with a failed or stopped
+        result in place of the reply.
+        """
+        connection = self._worker()
+        connection.send(request)
+        if not connection.poll(self.timeout):
+            self._recycle()
+            return ProjectResult(
+                path,
+                "timeout",
+                errors=[f"Exceeded the time budget of {self.timeout:g} seconds"],
+            )
+        try:
+            reply = connection.recv()
+        except EOFError:
+            exit_code = self._process.exitcode if self._process else None
+            self._stop()
+            return ProjectResult(
+                path,
+                "failed",
+                errors=[f"The worker process exited with code {exit_code}"],
+            )
+        if reply == _MEMORY_EXCEEDED:
+            self._recycle()
+            return ProjectResult(
+                path,
+                "timeout",
+                errors=[f"Exceeded the memory budget of {self.memory_limit} bytes"],
+            )
+        if isinstance(reply, _WorkerError):
+            return ProjectResult(path, "failed", errors=[reply.message])
+        return reply
+
+    def close(self) -> None:
+        """Stop the worker process, if one is running."""
+        if self._connection is not None and self._process is not None:
+            with suppress(OSError):
+                self._connection.send(None)
+            self._process.join(5)
+        self._stop()
+
+    def _worker(self) -> WorkerConnection:
+        if self._connection is None:
+            parent, child = self._context.Pipe()
+            process = self._context.Process(
+                target=_serve,
+                args=(child, self.literal, self.memory_limit, self.requirement_cache),
+                name="poetry-migrate-worker",
+                daemon=True,
+            )
+            process.start()
+            child.close()
+            # Startup imports are not part of any project's time budget.
+            try:
+                ready = parent.recv()
+            except EOFError:
+                ready = None
+            if ready != _READY:
+                process.join()
+                parent.close()
+                raise RuntimeError(
+                    f"The migration worker exited with code {process.exitcode} "
+                    "while starting"
+                )
+            self._process, self._connection = process, parent
+        return self._connection
+
+    def _recycle(self) -> None:
+        self.recycled += 1
+        self._stop()
+
+    def _stop(self) -> None:
+        if self._process is not None:
+            if self._process.is_alive():
+                self._process.kill()
+            self._process.join()
+            self._process = None
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
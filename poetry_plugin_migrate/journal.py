@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from pathlib import Path
+    from types import TracebackType
+    from typing import IO
+
+    from typing_extensions import Self
+
+    from poetry_plugin_migrate.batch import ProjectResult
+
+
+def content_hash(content: bytes) -> str:
+    """Return the digest the journal identifies file contents by."""
+    return hashlib.sha256(content).hexdigest()
+
+
+class JournalEntry:
+    """Outcome of one project recorded by an earlier batch run."""
+
+    path: str
+    """Path of the project's ``pyproject.toml`` relative to the batch root."""
+
+    digest: str
+    """Hash of the file contents the project was migrated from."""
+
+    status: str
+    """Status of the recorded :class:`~poetry_plugin_migrate.batch.ProjectResult`."""
+
+    warnings: list[str]
+    """Warnings reported when the project was migrated."""
+
+    errors: list[str]
+    """Errors reported when the project was migrated."""
+
+    migrated: str | None
+    """Migrated contents of a migrated project."""
+
+    written_digest: str | None
+    """Hash of the file contents a migrated project is written with."""
+
+    def __init__(
+        self,
+        path: str,
+        digest: str,
+        status: str,
+        *,
+        warnings: list[str] | None = None,
+        errors: list[str] | None = None,
+        migrated: str | None = None,
+        written_digest: str | None = None,
+    ) -> None:
+        self.path = path
+        self.digest = digest
+        self.status = status
+        self.warnings = warnings or []
+        self.errors = errors or []
+        self.migrated = migrated
+        self.written_digest = written_digest
+
+    def is_pending(self, content: bytes) -> bool:
+        """Return whether the migrated result still has to replace ``content``."""
+        return self.migrated is not None and self.digest == content_hash(content)
+
+
+def read_journal(path: Path) -> dict[str, JournalEntry]:
+    """Return the latest entry for every project recorded in a journal.
+
+    A run that is killed while appending can leave an incomplete last line,
+    which is ignored. Any other malformed line is an error.
+    """
+    entries: dict[str, JournalEntry] = {}
+    lines = path.read_text(encoding="utf-8").splitlines()
+    for number, line in enumerate(lines, start=1):
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as error:
+            if number == len(lines):
+                break
+            raise ValueError(
+                f"Line {number} of journal {path} is not valid JSON"
+            ) from error
+        if not isinstance(record, dict) or not all(
+            isinstance(record.get(key), str) for key in ("path", "hash", "status")
+        ):
+            raise TypeError(
+                f"Line {number} of journal {path} must be a table with "
+                "path, hash and status strings"
+            )
+        if not all(
+            isinstance(record.get(key), (str, type(None)))
+            for key in ("migrated", "written_hash")
+        ):
+            raise TypeError(
+                f"Line {number} of journal {path} must have migrated and "
+                "written_hash strings, if any"
+            )
+        entries[record["path"]] = JournalEntry(
+            record["path"],
+            record["hash"],
+            record["status"],
+            warnings=list(record.get("warnings", [])),
+            errors=list(record.get("errors", [])),
+            migrated=record.get("migrated"),
+            written_digest=record.get("written_hash"),
+        )
+    return entries
+
+
+class Journal:
+    """Append-only record of completed projects in a batch run.
+
+    Each line is written and flushed to disk as soon as a project completes,
+    so an interrupted run keeps everything it finished. Entries store the
+    hash of the input and, for migrated projects, the migrated contents and
+    the hash of the file they are written as. A resumed run skips a project
+    while the file still has either contents. Migrated files are only written
+    at the end of a run, so a project whose result was never written is
+    staged again from the journal instead of being migrated again.
+    """
+
+    path: Path
+    """Location of the journal file."""
+
+    completed: dict[str, JournalEntry]
+    """Entries of earlier runs that a resumed run may skip."""
+
+    def __init__(self, path: Path, *, resume: bool = False) -> None:
+        self.path = path
+        self.completed = read_journal(path) if resume and path.exists() else {}
+        self._file: IO[str] | None = None
+        self._resume = resume
+
+    def __enter__(self) -> Self:
+        if self._resume and self.path.exists():
+            contents = self.path.read_bytes()
+            complete = contents[: contents.rfind(b"\n") + 1]
+            if complete != contents:
+                # Drop an incomplete line left by an interrupted run.
+                with self.path.open("r+b") as journal_file:
+                    journal_file.truncate(len(complete))
+        self._file = self.path.open(
+            "a" if self._resume else "w", encoding="utf-8", newline="\n"
+        )
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def lookup(self, path: str, content: bytes) -> JournalEntry | None:
+        """Return the entry for ``path`` if it was recorded for ``content``.
+
+        ``content`` matches both the input of the recorded run and the file
+        that run writes for a migrated project.
+        """
+        entry = self.completed.get(path)
+        if entry is not None and content_hash(content) in {
+            entry.digest,
+            entry.written_digest,
+        }:
+            return entry
+        return None
+
+    def record(
+        self,
+        path: str,
+        content: bytes,
+        result: ProjectResult,
+        *,
+        written: bytes | None = None,
+    ) -> None:
+        """Append the outcome of ``path``, migrated from ``content``.
+
+        ``written`` are the bytes a migrated project is written with; the
+        migrated result is then kept so a resumed run can write it.
+        """
+        if self._file is None:
+            raise RuntimeError("The journal must be opened before recording")
+        record: dict[str, object] = {
+            "path": path,
+            "hash": content_hash(content),
+            "status": result.status,
+            "warnings": result.warnings,
+            "errors": result.errors,
+        }
+        if written is not None:
+            record["migrated"] = result.migrated
+            record["written_hash"] = content_hash(written)
+        self._file.write(json.dumps(record) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
@@ -1,7 +1,8 @@
 from __future__ import annotations
 
 from collections import Counter
-from collections.abc import Callable
+from collections.abc import Callable, Hashable
+from functools import lru_cache
 from typing import ClassVar, Protocol
 
 from poetry.core.constraints.version import VersionConstraint, parse_constraint
@@ -9,15 +10,20 @@ from tomlkit import TOMLDocument
 from tomlkit.container import Container
 from tomlkit.items import Array, Item, Table
 
+from poetry_plugin_migrate.profiling import register_cache, trace_span
 from poetry_plugin_migrate.toml import (
+    PlainTable,
     TomlTable,
     comment_counts,
     is_table,
     make_string,
+    plain_get,
+    plain_snapshot,
     require_array,
     require_item,
     require_table,
     restore_missing_comments,
+    value_key,
 )
 
 
@@ -40,11 +46,33 @@ class MigrationCommand(Protocol):
 
 TableTransformer = Callable[[str, TomlTable], object]
 ArrayTransformer = Callable[[int, list[object]], object]
+FieldMigration = Callable[[TomlTable, TomlTable], None]
 
 
 _UNSET = object()
 
 
+@lru_cache(maxsize=1024)
+def canonical_license_expression(license_value: str) -> str | None:
+    """Return the canonical SPDX expression, or ``None`` for legacy text.
+
+    Most projects of one organization share a few license values, so the
+    result is memoized for the whole process.
+    """
+    from packaging.licenses import (
+        InvalidLicenseExpression,
+        canonicalize_license_expression,
+    )
+
+    try:
+        return str(canonicalize_license_expression(license_value))
+    except InvalidLicenseExpression:
+        return None
+
+
+register_cache("license canonicalization", canonical_license_expression)
+
+
 class SkipField(Exception):  # noqa: N818
     """Marker used in migration to skip field."""
 
@@ -109,6 +137,16 @@ class Migrator:
     warnings: list[str]
     """List of warnings encountered during migration."""
 
+    legacy: PlainTable
+    """Plain-data snapshot of the source [tool.poetry] table for decisions."""
+
+    changed: bool
+    """Whether the last run may have changed the document.
+
+    ``False`` means the engine decided up front that nothing needs to change
+    and returned the input document itself.
+    """
+
     CONSTRAINT_PRESETS: ClassVar[list[str]] = [
         ">=2.0",
         ">=2.0,<3.0",
@@ -123,11 +161,47 @@ class Migrator:
     ]
     """Poetry constraints compatible with dependency-group migration."""
 
+    DIRECT_FIELDS: ClassVar[tuple[str, ...]] = (
+        "name",
+        "description",
+        "license",
+        "keywords",
+    )
+    """Same-named fields moved to [project], in output order."""
+
+    FIELD_MIGRATIONS: ClassVar[tuple[tuple[str, frozenset[str]], ...]] = (
+        # Phase 1: Direct field moves
+        ("_migrate_direct_fields", frozenset(DIRECT_FIELDS)),
+        (
+            "_migrate_urls",
+            frozenset({"homepage", "repository", "documentation", "urls"}),
+        ),
+        ("_migrate_plugins", frozenset({"plugins"})),
+        ("_migrate_scripts", frozenset({"scripts"})),
+        # Phase 2: User-prompted fields
+        ("_migrate_version", frozenset({"version"})),
+        ("_migrate_classifiers", frozenset({"classifiers"})),
+        ("_migrate_readme", frozenset({"readme"})),
+        # Phase 3: Value transforms
+        ("_migrate_persons", frozenset({"authors", "maintainers"})),
+    )
+    """Field migration methods in execution order, with the fields they read.
+
+    A method runs only when one of its fields is present in [tool.poetry].
+    """
+
+    PROJECT_FIELDS: ClassVar[frozenset[str]] = frozenset(
+        {"dependencies"}.union(*(fields for _, fields in FIELD_MIGRATIONS))
+    )
+    """Every [tool.poetry] field that can move to [project]."""
+
     def __init__(self, command: MigrationCommand, skip: bool, literal: bool) -> None:
         self.warnings = []
         self.skip = skip
         self.command = command
         self.literal = literal
+        self.legacy = {}
+        self.changed = False
         self._keep_version_brackets: bool | None = None
 
     def _keep_pep508_version_brackets(self) -> bool:
@@ -157,6 +231,7 @@ class Migrator:
         update_value: object = _UNSET,
         target_value: object = _UNSET,
         remove_source: bool = True,
+        array_index: set[Hashable] | None = None,
     ) -> bool:
         """
         Move field from one container to another container.
@@ -165,6 +240,9 @@ class Migrator:
 
         If `update_value` is set, copies the value to `to_container` instead of moving it,
         then updates the value in `from_container`.
+
+        `array_index` holds the `value_key` of every value in an array `to_container`.
+        It replaces the linear membership scan and is kept up to date.
         """
         try:
             field_value: object = from_container[field]
@@ -193,7 +271,13 @@ class Migrator:
                 to_container[field] = value_to_move
 
         else:
-            if value_to_move in to_container:
+            if array_index is None:
+                is_duplicate = value_to_move in to_container
+            else:
+                key = value_key(value_to_move)
+                is_duplicate = key in array_index
+                array_index.add(key)
+            if is_duplicate:
                 self.warnings.append(
                     f"Value {value_to_move} is already in [{to_container_key}] "
                     f"and will be removed from [{from_container_key}]."
@@ -242,6 +326,13 @@ class Migrator:
         from_sub_container = from_container[sub_container_name]
 
         if is_table(from_sub_container):
+            # Every moved value is checked against the values already in an
+            # array target, so index them once instead of scanning per value.
+            array_index = (
+                {value_key(value) for value in to_container}
+                if isinstance(to_container, Array)
+                else None
+            )
             original_keys = tuple(from_sub_container.keys())
             moved_keys: list[str] = []
             updates: dict[str, object] = {}
@@ -283,6 +374,7 @@ class Migrator:
                     update_value=update_value,
                     target_value=target_value,
                     remove_source=False,
+                    array_index=array_index,
                 )
 
                 if not moved:
@@ -335,13 +427,13 @@ class Migrator:
             # values through tomlkit's public list API, which discards
             # standalone comments. If values are skipped or deduplicated, the
             # final comment audit retains otherwise orphaned text instead.
-            unique_items: list[object] = []
-            can_preserve_groups = len(items_to_keep) == 0
-            for item in items_to_move:
-                if item in to_container or item in unique_items:
-                    can_preserve_groups = False
-                    break
-                unique_items.append(item)
+            target_keys = {value_key(value) for value in to_container}
+            item_keys = [value_key(item) for item in items_to_move]
+            can_preserve_groups = (
+                len(items_to_keep) == 0
+                and target_keys.isdisjoint(item_keys)
+                and len(set(item_keys)) == len(item_keys)
+            )
             if can_preserve_groups and all(
                 isinstance(item, Item) for item in items_to_move
             ):
@@ -360,8 +452,9 @@ class Migrator:
                 del from_container[sub_container_name]
                 return
 
-            for item in items_to_move:
-                if item not in to_container:
+            for item, key in zip(items_to_move, item_keys, strict=True):
+                if key not in target_keys:
+                    target_keys.add(key)
                     to_container.append(item)
 
             if len(items_to_keep) == 0:
@@ -442,79 +535,92 @@ class Migrator:
 
         from copy import deepcopy
 
-        new_document: TOMLDocument = deepcopy(pyproject_document)
-        original_comments = comment_counts(new_document)
-
-        original_tool_poetry = self._get_tool_poetry(new_document)
-        if original_tool_poetry is None:
-            return new_document
+        # Decisions read a plain-data snapshot taken once. tomlkit items of
+        # the copied document are only touched where edits happen.
+        with trace_span("snapshot"):
+            snapshot = plain_snapshot(pyproject_document)
+        legacy = plain_get(snapshot, "tool", "poetry")
+        if not isinstance(legacy, dict):
+            self.warnings.append(
+                "[tool.poetry] section not found. Related migration skipped."
+            )
+            self.changed = False
+            return pyproject_document
+        self.legacy = legacy
 
         migrate_project = not (
-            original_tool_poetry.get("package-mode") is False
-            and "project" not in new_document
-            and not (
-                "name" in original_tool_poetry and "version" in original_tool_poetry
-            )
+            legacy.get("package-mode") is False
+            and "project" not in snapshot
+            and not ("name" in legacy and "version" in legacy)
         )
 
         # tomlkit represents tables whose declarations are separated by other
         # top-level tables with an OutOfOrderTableProxy. Deleting keys through
         # that proxy can invalidate its table indexes after one backing table
         # becomes empty. Consolidate only [tool.poetry] before any mutation so
-        # all later operations use an ordinary Table.
-        if self._will_mutate_tool_poetry(original_tool_poetry, migrate_project):
-            self._consolidate_tool_poetry(new_document)
+        # all later operations use an ordinary Table. One pass over the source
+        # keys decides both whether that is needed and which field migrations
+        # run below.
+        present_fields = self.PROJECT_FIELDS.intersection(legacy)
+        project_fields = present_fields if migrate_project else frozenset()
+        if self.skip and not self._needs_migration(
+            snapshot, project_fields, migrate_project
+        ):
+            return self._skip_unchanged(pyproject_document, migrate_project)
+
+        self.changed = True
+        with trace_span("copy"):
+            new_document: TOMLDocument = deepcopy(pyproject_document)
+            original_comments = comment_counts(new_document)
+        if self._will_mutate_tool_poetry(legacy, project_fields):
+            with trace_span("consolidate [tool.poetry]"):
+                self._consolidate_tool_poetry(new_document)
 
         tool_poetry = self._get_tool_poetry(new_document)
         if tool_poetry is None:
             return new_document
 
         if not migrate_project:
-            self.warnings.append(
-                "[tool.poetry.package-mode] is false and no complete package "
-                "metadata is available. PEP 621 [project] migration was skipped; "
-                "independent dependency-group and tool metadata migration continues."
-            )
-            if "group" in tool_poetry or "dev-dependencies" in tool_poetry:
+            self._warn_project_migration_skipped()
+            if "group" in legacy or "dev-dependencies" in legacy:
                 from poetry_plugin_migrate.dependencies import DependencyGroupMigrator
 
-                DependencyGroupMigrator(self, new_document, tool_poetry).run()
-            self._migrate_requires_poetry(tool_poetry)
-            self._migrate_build_system(new_document)
+                with trace_span("dependency groups"):
+                    DependencyGroupMigrator(self, new_document, tool_poetry).run()
+            with trace_span("build metadata"):
+                self._migrate_requires_poetry(tool_poetry)
+                self._migrate_build_system(new_document)
             return self._finalize_document(new_document, original_comments)
 
         project = self._ensure_project_table(new_document)
         original_dynamic_overlaps = self._static_dynamic_overlaps(project)
 
-        # Phase 1: Direct field moves
-        self._migrate_direct_fields(tool_poetry, project)
-        self._migrate_urls(tool_poetry, project)
-        self._migrate_plugins(tool_poetry, project)
-        self._migrate_scripts(tool_poetry, project)
-
-        # Phase 2: User-prompted fields
-        self._migrate_version(tool_poetry, project)
-        self._migrate_classifiers(tool_poetry, project)
-        self._migrate_readme(tool_poetry, project)
-
-        # Phase 3: Value transforms
-        self._migrate_persons(tool_poetry, project)
+        # Phases 1-3: Direct field moves, user-prompted fields and value
+        # transforms
+        for method_name, fields in self.FIELD_MIGRATIONS:
+            if not fields.isdisjoint(present_fields):
+                migrate_fields: FieldMigration = getattr(self, method_name)
+                with trace_span(method_name):
+                    migrate_fields(tool_poetry, project)
 
         # Phase 4: Dependencies (delegated)
-        if "dependencies" in tool_poetry:
+        if "dependencies" in legacy:
             from poetry_plugin_migrate.dependencies import DependencyMigrator
 
-            DependencyMigrator(self, tool_poetry, project).run()
+            with trace_span("dependencies"):
+                DependencyMigrator(self, tool_poetry, project).run()
 
         # Phase 4b: PEP 735 groups. Optional standard groups require Poetry >=2.2.1.
-        if "group" in tool_poetry or "dev-dependencies" in tool_poetry:
+        if "group" in legacy or "dev-dependencies" in legacy:
             from poetry_plugin_migrate.dependencies import DependencyGroupMigrator
 
-            DependencyGroupMigrator(self, new_document, tool_poetry).run()
+            with trace_span("dependency groups"):
+                DependencyGroupMigrator(self, new_document, tool_poetry).run()
 
         # Phase 5: Metadata updates
-        self._migrate_requires_poetry(tool_poetry)
-        self._migrate_build_system(new_document)
+        with trace_span("build metadata"):
+            self._migrate_requires_poetry(tool_poetry)
+            self._migrate_build_system(new_document)
 
         # Clean up empty dependencies array
         project_dependencies = project.get("dependencies")
@@ -553,9 +659,13 @@ class Migrator:
         ):
             from poetry_plugin_migrate.toml import reorder_standard_tables
 
-            new_document = reorder_standard_tables(new_document)
+            with trace_span("reorder tables"):
+                new_document = reorder_standard_tables(new_document)
 
-        restored_comments = restore_missing_comments(new_document, original_comments)
+        with trace_span("restore comments"):
+            restored_comments = restore_missing_comments(
+                new_document, original_comments
+            )
         if restored_comments:
             self.warnings.append(
                 f"Restored {len(restored_comments)} comment(s) at the end of the "
@@ -565,42 +675,94 @@ class Migrator:
 
         return new_document
 
+    def _warn_project_migration_skipped(self) -> None:
+        self.warnings.append(
+            "[tool.poetry.package-mode] is false and no complete package "
+            "metadata is available. PEP 621 [project] migration was skipped; "
+            "independent dependency-group and tool metadata migration continues."
+        )
+
+    def _needs_migration(
+        self,
+        snapshot: PlainTable,
+        project_fields: frozenset[str],
+        migrate_project: bool,
+    ) -> bool:
+        """Return whether the migration phases can change a document.
+
+        This is only decisive without prompts: the requires-poetry, build
+        requirement and table order prompts all default to no change. Beyond
+        fields that move, the phases also add a missing [project] table,
+        remove empty dependency and dynamic arrays, and warn about Poetry
+        groups that are not tables or collide with a standard group name.
+        """
+        legacy = self.legacy
+        if self._will_mutate_tool_poetry(legacy, project_fields):
+            return True
+
+        if migrate_project:
+            project = snapshot.get("project")
+            if not isinstance(project, dict):
+                return True
+            if project.get("dependencies") == [] or project.get("dynamic") == []:
+                return True
+
+        groups = legacy.get("group")
+        if groups is not None:
+            if not isinstance(groups, dict) or not groups:
+                return True
+            if not all(isinstance(group, dict) for group in groups.values()):
+                return True
+            dependency_groups = snapshot.get("dependency-groups")
+            if dependency_groups is not None:
+                if not isinstance(dependency_groups, dict):
+                    return True
+                from packaging.utils import canonicalize_name
+
+                existing = {canonicalize_name(name) for name in dependency_groups}
+                if any(canonicalize_name(name) in existing for name in groups):
+                    return True
+        return False
+
+    def _skip_unchanged(
+        self, pyproject_document: TOMLDocument, migrate_project: bool
+    ) -> TOMLDocument:
+        """Return an already-migrated document without copying it.
+
+        The requires-poetry and build requirement steps do not edit anything
+        without prompts, but they still validate their inputs. Run them on
+        the original document so invalid values fail exactly as in a full
+        migration.
+        """
+        if not migrate_project:
+            self._warn_project_migration_skipped()
+        tool_poetry = self._get_tool_poetry(pyproject_document)
+        if tool_poetry is not None:
+            self._migrate_requires_poetry(tool_poetry)
+        self._migrate_build_system(pyproject_document)
+        self.changed = False
+        return pyproject_document
+
     def _will_mutate_tool_poetry(
-        self, tool_poetry: TomlTable, migrate_project: bool
+        self, tool_poetry: PlainTable, project_fields: frozenset[str]
     ) -> bool:
         """Return whether migration needs to edit the split Poetry table.
 
-        Consolidation necessarily joins physically separated declarations. Do
-        it only before a real edit so an already-modern project is not
-        reformatted merely because the command inspected it.
+        ``project_fields`` are the present fields that will move to [project];
+        it is empty when PEP 621 migration is skipped. Consolidation
+        necessarily joins physically separated declarations. Do it only before
+        a real edit so an already-modern project is not reformatted merely
+        because the command inspected it.
         """
-        project_fields = {
-            "name",
-            "description",
-            "license",
-            "keywords",
-            "homepage",
-            "repository",
-            "documentation",
-            "urls",
-            "plugins",
-            "scripts",
-            "version",
-            "classifiers",
-            "readme",
-            "authors",
-            "maintainers",
-            "dependencies",
-        }
-        if migrate_project and any(field in tool_poetry for field in project_fields):
+        if project_fields:
             return True
         if "dev-dependencies" in tool_poetry:
             return True
 
         groups = tool_poetry.get("group")
-        if is_table(groups):
+        if isinstance(groups, dict):
             for group in groups.values():
-                if is_table(group) and (
+                if isinstance(group, dict) and (
                     "dependencies" in group or "include-groups" in group
                 ):
                     return True
@@ -637,23 +799,28 @@ class Migrator:
             for key, item in backing_table.value.body:
                 target.append(key, item)
 
-        def remove_table(container: Container, table_to_remove: Table) -> bool:
-            for index, (_key, item) in enumerate(list(container.body)):
-                if item is table_to_remove:
-                    # A container can hold more than one out-of-order table
-                    # with the same key. Removing by key would also remove the
-                    # consolidated target, so remove this exact body item.
-                    container._remove_at(index)
-                    return True
-                if isinstance(item, Table) and remove_table(
-                    item.value, table_to_remove
-                ):
-                    return True
-            return False
-
+        # Locate every later backing table in one walk of the document. A
+        # container can hold more than one out-of-order table with the same
+        # key, and removing by key would also remove the consolidated target,
+        # so each exact body item is recorded by identity. Removal replaces
+        # the body entry with a placeholder and does not shift later entries,
+        # so all recorded positions stay valid for the whole batch.
+        pending = {id(table) for table in backing_tables[1:]}
+        locations: dict[int, tuple[Container, int]] = {}
+        containers: list[Container] = [doc]
+        while containers and len(locations) < len(pending):
+            container = containers.pop()
+            for index, (_key, item) in enumerate(container.body):
+                if id(item) in pending:
+                    locations[id(item)] = (container, index)
+                elif isinstance(item, Table):
+                    containers.append(item.value)
+
+        if len(locations) < len(pending):
+            raise RuntimeError("Could not consolidate split [tool.poetry] table")
         for backing_table in backing_tables[1:]:
-            if not remove_table(doc, backing_table):
-                raise RuntimeError("Could not consolidate split [tool.poetry] table")
+            container, index = locations[id(backing_table)]
+            container._remove_at(index)
 
     # ------------------------------------------------------------------
     # Infrastructure helpers
@@ -739,8 +906,11 @@ class Migrator:
     def _migrate_direct_fields(
         self, tool_poetry: TomlTable, project: TomlTable
     ) -> None:
-        """Migrate same-named fields that need no value validation."""
-        for field in ("name", "description"):
+        """Migrate same-named fields; only the license needs value validation."""
+        for field in self.DIRECT_FIELDS:
+            if field == "license":
+                self._migrate_license(tool_poetry, project)
+                continue
             self._move(
                 field,
                 tool_poetry,
@@ -748,14 +918,6 @@ class Migrator:
                 from_container_key="tool.poetry",
                 to_container_key="project",
             )
-        self._migrate_license(tool_poetry, project)
-        self._move(
-            "keywords",
-            tool_poetry,
-            project,
-            from_container_key="tool.poetry",
-            to_container_key="project",
-        )
 
     def _migrate_license(self, tool_poetry: TomlTable, project: TomlTable) -> None:
         """Move only license values that are already valid SPDX expressions."""
@@ -766,20 +928,12 @@ class Migrator:
         if isinstance(dynamic, Array) and "license" in dynamic:
             return
 
-        from packaging.licenses import (
-            InvalidLicenseExpression,
-            canonicalize_license_expression,
-        )
-
         license_value = tool_poetry["license"]
         canonical_value: object = license_value
         valid_expression = False
         if isinstance(license_value, str):
-            try:
-                canonical_license = canonicalize_license_expression(license_value)
-            except InvalidLicenseExpression:
-                pass
-            else:
+            canonical_license = canonical_license_expression(str(license_value))
+            if canonical_license is not None:
                 valid_expression = True
                 if canonical_license != license_value:
                     canonical_value = make_string(
@@ -0,0 +1,17 @@
+from __future__ import annotations
+
+from difflib import unified_diff
+
+
+def unified_text_diff(original: str, updated: str, label: str) -> str:
+    """Return a unified diff of ``original`` and ``updated`` for ``label``."""
+    lines = unified_diff(
+        original.splitlines(keepends=True),
+        updated.splitlines(keepends=True),
+        fromfile=f"a/{label}",
+        tofile=f"b/{label}",
+    )
+    return "".join(
+        line if line.endswith("\n") else f"{line}\n\\ No newline at end of file\n"
+        for line in lines
+    )
@@ -1,13 +1,20 @@
 from poetry.console.application import Application
 from poetry.plugins.application_plugin import ApplicationPlugin
 
-from poetry_plugin_migrate.command import MigrateCommand
+from poetry_plugin_migrate.command import MergeReportsCommand, MigrateCommand
 
 
 def factory() -> MigrateCommand:
     return MigrateCommand()
 
 
+def merge_reports_factory() -> MergeReportsCommand:
+    return MergeReportsCommand()
+
+
 class MigrateApplicationPlugin(ApplicationPlugin):
     def activate(self, application: Application) -> None:
         application.command_loader.register_factory("migrate", factory)
+        application.command_loader.register_factory(
+            "migrate merge-reports", merge_reports_factory
+        )
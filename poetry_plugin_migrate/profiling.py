@@ -0,0 +1,232 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from importlib import import_module
+from typing import TYPE_CHECKING, Protocol
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+    from pathlib import Path
+
+
+# Modules the migration engine imports lazily. Loading them up front keeps
+# one-off import costs out of per-file measurements and budgets.
+ENGINE_MODULES = (
+    "poetry.core.factory",
+    "poetry_plugin_migrate.batch",
+    "poetry_plugin_migrate.dependencies",
+    "poetry_plugin_migrate.patch",
+    "poetry_plugin_migrate.validation",
+)
+
+
+class CacheStatisticsProvider(Protocol):
+    """A memoized function exposing ``functools.lru_cache`` statistics."""
+
+    def cache_info(self) -> tuple[int, int, int | None, int]: ...
+
+
+_caches: dict[str, CacheStatisticsProvider] = {}
+_timings: dict[str, list[float]] = {}
+_trace_events: list[dict[str, object]] | None = None
+_memory: dict[str, list[int]] = {}
+_memory_frames: list[list[int]] = []
+_memory_active = False
+_allocation_snapshot: tracemalloc.Snapshot | None = None
+_allocation_snapshot_size = 0
+
+
+def register_cache(name: str, cache: CacheStatisticsProvider) -> None:
+    """Report a process-wide memo in the ``--profile`` output."""
+    _caches[name] = cache
+
+
+def cache_statistics() -> list[tuple[str, int, int]]:
+    """Return ``(name, hits, misses)`` for every registered memo."""
+    result: list[tuple[str, int, int]] = []
+    for name, cache in _caches.items():
+        hits, misses, _maxsize, _size = cache.cache_info()
+        result.append((name, hits, misses))
+    return result
+
+
+@contextmanager
+def timed(name: str) -> Iterator[None]:
+    """Add the wall-clock time of the block to the ``--profile`` stage ``name``."""
+    start = time.perf_counter()
+    try:
+        with trace_span(name, "stage"):
+            yield
+    finally:
+        timing = _timings.setdefault(name, [0, 0.0])
+        timing[0] += 1
+        timing[1] += time.perf_counter() - start
+
+
+def timing_statistics() -> list[tuple[str, int, float]]:
+    """Return ``(name, calls, seconds)`` for every timed stage."""
+    return [(name, int(calls), seconds) for name, (calls, seconds) in _timings.items()]
+
+
+def start_trace() -> None:
+    """Record :func:`trace_span` blocks from now on, discarding earlier ones."""
+    global _trace_events
+    _trace_events = []
+
+
+@contextmanager
+def trace_span(name: str, category: str = "phase", **args: object) -> Iterator[None]:
+    """Record the block as a complete trace event while tracing is active.
+
+    Spans are tagged with the process and thread that ran them, and nest in a
+    trace viewer by time. While a memory profile is active, phases and stages
+    also record their allocations; I/O spans run concurrently on other
+    threads and never do. Outside a traced or memory-profiled run this does
+    nothing.
+    """
+    events = _trace_events
+    memory = _memory_active and category not in {"project", "io"}
+    if events is None and not memory:
+        yield
+        return
+    start = time.perf_counter_ns()
+    if memory:
+        _enter_memory_span()
+    try:
+        yield
+    finally:
+        if memory:
+            _exit_memory_span(name)
+        if events is not None:
+            events.append(
+                {
+                    "name": name,
+                    "cat": category,
+                    "ph": "X",
+                    "ts": start / 1000,
+                    "dur": (time.perf_counter_ns() - start) / 1000,
+                    "pid": os.getpid(),
+                    "tid": threading.get_native_id(),
+                    "args": args,
+                }
+            )
+
+
+def write_trace(path: Path) -> int:
+    """Write the recorded spans as Chrome trace-event JSON and stop tracing.
+
+    The file opens in ``chrome://tracing`` and the Perfetto UI. Returns the
+    number of spans written.
+    """
+    global _trace_events
+    from poetry_plugin_migrate.writer import atomic_write
+
+    events = _trace_events or []
+    _trace_events = None
+    metadata: dict[str, object] = {
+        "name": "process_name",
+        "ph": "M",
+        "pid": os.getpid(),
+        "args": {"name": "poetry migrate"},
+    }
+    trace = {"traceEvents": [metadata, *events], "displayTimeUnit": "ms"}
+    atomic_write(path, json.dumps(trace).encode("utf-8"))
+    return len(events)
+
+
+def start_memory_profile(frames: int = 1) -> None:
+    """Trace allocations per phase from now on, discarding earlier results.
+
+    ``frames`` is the traceback depth ``tracemalloc`` stores per allocation.
+    The engine's modules are imported first, so import-time allocations do
+    not show up as allocation sites.
+    """
+    global _memory_active, _allocation_snapshot, _allocation_snapshot_size
+    for module in ENGINE_MODULES:
+        import_module(module)
+    _memory.clear()
+    _memory_frames.clear()
+    _allocation_snapshot = None
+    _allocation_snapshot_size = 0
+    tracemalloc.start(frames)
+    _memory_active = True
+
+
+def stop_memory_profile() -> None:
+    """Stop tracing allocations; the collected statistics remain available."""
+    global _memory_active
+    _memory_active = False
+    tracemalloc.stop()
+
+
+def memory_statistics() -> list[tuple[str, int, int, int]]:
+    """Return ``(name, calls, peak, net)`` in bytes for every measured phase.
+
+    ``peak`` is the largest growth above the allocations live when one call
+    started, including nested phases. ``net`` is the sum of what all calls
+    left allocated when they finished.
+    """
+    return [(name, calls, peak, net) for name, (calls, peak, net) in _memory.items()]
+
+
+def record_allocation_sites() -> None:
+    """Keep a snapshot of live allocations if it is the largest one so far.
+
+    Call this while a migration's documents are still referenced, so the
+    snapshot shows what a single file holds at its largest.
+    """
+    global _allocation_snapshot, _allocation_snapshot_size
+    if not _memory_active:
+        return
+    current, _peak = tracemalloc.get_traced_memory()
+    if current > _allocation_snapshot_size:
+        _allocation_snapshot = tracemalloc.take_snapshot()
+        _allocation_snapshot_size = current
+
+
+def allocation_sites(limit: int = 10) -> list[tuple[str, int, int]]:
+    """Return ``(location, size, count)`` of the largest recorded allocation sites."""
+    if _allocation_snapshot is None:
+        return []
+    # Lazily imported modules are traced too; their loading is not migration work.
+    snapshot = _allocation_snapshot.filter_traces(
+        [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+            tracemalloc.Filter(False, "<frozen abc>"),
+        ]
+    )
+    return [
+        (
+            f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+            stat.size,
+            stat.count,
+        )
+        for stat in snapshot.statistics("lineno")[:limit]
+    ]
+
+
+def _enter_memory_span() -> None:
+    current, peak = tracemalloc.get_traced_memory()
+    if _memory_frames:
+        # The peak is reset for the nested span; keep what the parent reached.
+        _memory_frames[-1][1] = max(_memory_frames[-1][1], peak)
+    tracemalloc.reset_peak()
+    _memory_frames.append([current, current])
+
+
+def _exit_memory_span(name: str) -> None:
+    current, peak = tracemalloc.get_traced_memory()
+    start, running_peak = _memory_frames.pop()
+    span_peak = max(running_peak, peak)
+    if _memory_frames:
+        _memory_frames[-1][1] = max(_memory_frames[-1][1], span_peak)
+    statistics = _memory.setdefault(name, [0, 0, 0])
+    statistics[0] += 1
+    statistics[1] = max(statistics[1], span_peak - start)
+    statistics[2] += current - start
@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import json
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+    from pathlib import Path
+
+    from poetry_plugin_migrate.batch import ProjectResult
+
+REPORT_VERSION = 1
+
+Report = dict[str, object]
+
+_STATUSES = ("migrated", "unchanged", "failed", "timeout")
+
+
+def build_report(
+    root: Path,
+    results: Iterable[ProjectResult],
+    *,
+    shard: tuple[int, int] | None = None,
+    dry_run: bool = False,
+) -> Report:
+    """Return the JSON-compatible report of a recursive run.
+
+    Project paths are relative to ``root`` so reports from nodes with
+    different checkout locations can be merged.
+    """
+    projects: list[dict[str, object]] = [
+        {
+            "path": result.path.relative_to(root).as_posix(),
+            "status": result.status,
+            "warnings": list(result.warnings),
+            "errors": list(result.errors),
+            "resumed": result.resumed,
+            "migration_ms": None
+            if result.migration_seconds is None
+            else round(result.migration_seconds * 1000, 3),
+        }
+        for result in results
+    ]
+    return {
+        "version": REPORT_VERSION,
+        "shard": None if shard is None else {"index": shard[0], "count": shard[1]},
+        "dry_run": dry_run,
+        "projects": projects,
+        "summary": _summarize(projects),
+    }
+
+
+def write_report(path: Path, report: Report) -> None:
+    """Write ``report`` as JSON, replacing ``path`` atomically."""
+    from poetry_plugin_migrate.writer import atomic_write
+
+    atomic_write(path, (json.dumps(report, indent=2) + "\n").encode("utf-8"))
+
+
+def load_report(path: Path) -> Report:
+    """Read a report written by :func:`write_report`."""
+    report = json.loads(path.read_text(encoding="utf-8"))
+    if not isinstance(report, dict):
+        raise TypeError(f"{path} does not contain a migration report")
+    if report.get("version") != REPORT_VERSION:
+        raise ValueError(f"{path} is not a version {REPORT_VERSION} migration report")
+    return report
+
+
+def merge_reports(reports: Iterable[Report]) -> Report:
+    """Combine the reports of every shard of one run into a fleet summary.
+
+    All reports must come from the same shard count, and each shard and each
+    project may only be reported once. Shards without a report are listed in
+    ``missing_shards`` so an incomplete fleet run is not mistaken for a
+    complete one.
+    """
+    projects: dict[str, dict[str, object]] = {}
+    shard_count: int | None = None
+    seen_shards: set[int] = set()
+    dry_run = False
+    for report in reports:
+        shard = report.get("shard")
+        if shard is None:
+            raise ValueError("Only reports of sharded runs can be merged")
+        if not isinstance(shard, dict):
+            raise TypeError("[shard] must be a table")
+        index, count = shard.get("index"), shard.get("count")
+        if not isinstance(index, int) or not isinstance(count, int):
+            raise TypeError("[shard] must contain integer index and count values")
+        if not 1 <= index <= count:
+            raise ValueError(
+                f"Invalid shard {index}/{count}: the index must be between 1 and "
+                "the count"
+            )
+        if shard_count is None:
+            shard_count = count
+        elif count != shard_count:
+            raise ValueError(
+                f"Cannot merge reports of {shard_count} and {count} shards"
+            )
+        if index in seen_shards:
+            raise ValueError(f"Shard {index}/{count} is reported more than once")
+        seen_shards.add(index)
+        dry_run = dry_run or report.get("dry_run") is True
+
+        entries = report.get("projects")
+        if not isinstance(entries, list):
+            raise TypeError("[projects] must be an array")
+        for entry in entries:
+            if not isinstance(entry, dict) or not isinstance(entry.get("path"), str):
+                raise TypeError("[projects] entries must be tables with a path")
+            if entry["path"] in projects:
+                raise ValueError(f"{entry['path']} is reported by more than one shard")
+            projects[entry["path"]] = entry
+
+    if shard_count is None:
+        raise ValueError("No reports to merge")
+
+    merged = [projects[path] for path in sorted(projects)]
+    return {
+        "version": REPORT_VERSION,
+        "shard": None,
+        "dry_run": dry_run,
+        "shard_count": shard_count,
+        "missing_shards": sorted(set(range(1, shard_count + 1)) - seen_shards),
+        "projects": merged,
+        "summary": _summarize(merged),
+    }
+
+
+def _summarize(projects: list[dict[str, object]]) -> dict[str, int]:
+    summary = dict.fromkeys(_STATUSES, 0)
+    for project in projects:
+        status = project.get("status")
+        if not isinstance(status, str) or status not in summary:
+            raise ValueError(f"Unknown project status {status!r}")
+        summary[status] += 1
+    return summary
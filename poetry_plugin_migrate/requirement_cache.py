@@ -0,0 +1,267 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import time
+from contextlib import suppress
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Mapping
+    from pathlib import Path
+    from types import TracebackType
+
+    from typing_extensions import Self
+
+DEFAULT_MAX_ENTRIES = 100_000
+
+# Pending results and recency updates are written in one transaction.
+_FLUSH_SIZE = 256
+
+# Dependencies on local paths render differently depending on the filesystem.
+_FILESYSTEM_FIELDS = frozenset({"path", "file"})
+
+_SCHEMA = """\
+CREATE TABLE IF NOT EXISTS requirements (
+    key TEXT PRIMARY KEY,
+    requirement TEXT,
+    error TEXT,
+    used REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS requirements_used ON requirements (used);
+"""
+
+_active: RequirementCache | None = None
+
+
+def _engine_versions() -> str:
+    from importlib.metadata import PackageNotFoundError, version
+
+    from poetry.core import __version__ as core_version
+
+    try:
+        plugin_version = version("poetry-plugin-migrate")
+    except PackageNotFoundError:
+        plugin_version = "unknown"
+    return f"{plugin_version}/{core_version}"
+
+
+class RequirementCache:
+    """Persistent SQLite cache of rendered PEP 508 requirements.
+
+    Entries are keyed by the dependency name, its normalized specification,
+    the bracket style and the plugin and poetry-core versions, so upgrading
+    either never reuses stale output. Requirements that cannot be rendered
+    safely are cached with their error. Converted dependency sections are
+    kept in the same table under keys of their own, see :meth:`section_key`.
+    The database uses WAL journaling, so
+    worker processes and concurrent runs can share one file. Once it holds
+    more than ``max_entries`` results, the least recently used are evicted.
+
+    The cache never fails a migration: if the database is busy or unusable,
+    lookups miss and pending results are dropped.
+    """
+
+    path: Path
+    """Location of the SQLite database."""
+
+    max_entries: int
+    """Number of results kept in the database."""
+
+    hits: int
+    """Number of lookups answered by the cache."""
+
+    misses: int
+    """Number of lookups the cache could not answer."""
+
+    def __init__(self, path: Path, *, max_entries: int = DEFAULT_MAX_ENTRIES) -> None:
+        if max_entries < 1:
+            raise ValueError(
+                f"The requirement cache must hold at least one entry, got {max_entries}"
+            )
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._versions = _engine_versions()
+        self._memo: dict[str, tuple[str | None, str | None]] = {}
+        self._pending: dict[str, tuple[str | None, str | None]] = {}
+        self._used: set[str] = set()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(path, timeout=30, isolation_level=None)
+        try:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            self._connection.executescript(_SCHEMA)
+        except sqlite3.Error:
+            self._connection.close()
+            raise
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    def cache_info(self) -> tuple[int, int, int | None, int]:
+        return self.hits, self.misses, self.max_entries, len(self._memo)
+
+    def key(
+        self,
+        name: str,
+        spec: str | Mapping[str, object],
+        *,
+        keep_version_brackets: bool,
+    ) -> str | None:
+        """Return the cache key of a dependency, or ``None`` if it is not cacheable."""
+        if not isinstance(spec, str) and not _FILESYSTEM_FIELDS.isdisjoint(spec):
+            return None
+        return json.dumps(
+            [self._versions, name, spec, keep_version_brackets],
+            sort_keys=True,
+            separators=(",", ":"),
+            default=str,
+        )
+
+    def section_key(
+        self,
+        kind: str,
+        name: str,
+        sources: Iterable[str | None],
+        specs: Iterable[object],
+        *,
+        literal: bool,
+        keep_version_brackets: bool,
+    ) -> str | None:
+        """Return the cache key of a converted dependency section.
+
+        The key covers the exact source text of the section, so the comments
+        and formatting carried into the converted result are part of it.
+        ``specs`` are the plain dependency values of the section; sections
+        with local path dependencies are not cacheable.
+        """
+        for spec in specs:
+            for constraint in spec if isinstance(spec, list) else [spec]:
+                if isinstance(constraint, dict) and not _FILESYSTEM_FIELDS.isdisjoint(
+                    constraint
+                ):
+                    return None
+        digest = hashlib.sha256(
+            json.dumps(
+                [
+                    self._versions,
+                    kind,
+                    name,
+                    list(sources),
+                    literal,
+                    keep_version_brackets,
+                ],
+                separators=(",", ":"),
+            ).encode("utf-8")
+        ).hexdigest()
+        return f"section:{digest}"
+
+    def lookup_section(self, key: str) -> object | None:
+        """Return the converted section stored for ``key``."""
+        entry = self.lookup(key)
+        if entry is None or entry[0] is None:
+            return None
+        section: object = json.loads(entry[0])
+        return section
+
+    def store_section(self, key: str, section: object) -> None:
+        """Record the JSON-compatible converted ``section`` for ``key``."""
+        self.store(key, json.dumps(section, separators=(",", ":")), None)
+
+    def lookup(self, key: str) -> tuple[str | None, str | None] | None:
+        """Return the cached ``(requirement, error)`` pair for ``key``."""
+        entry = self._memo.get(key)
+        if entry is None:
+            try:
+                row = self._connection.execute(
+                    "SELECT requirement, error FROM requirements WHERE key = ?", (key,)
+                ).fetchone()
+            except sqlite3.Error:
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            entry = self._memo[key] = (row[0], row[1])
+        self.hits += 1
+        self._used.add(key)
+        self._flush_if_full()
+        return entry
+
+    def store(self, key: str, requirement: str | None, error: str | None) -> None:
+        """Record the rendered ``requirement`` or the ``error`` for ``key``."""
+        self._memo[key] = self._pending[key] = (requirement, error)
+        self._flush_if_full()
+
+    def flush(self) -> None:
+        """Write pending results and recency updates, then evict old entries."""
+        if not self._pending and not self._used:
+            return
+        now = time.time()
+        with suppress(sqlite3.Error):
+            self._connection.execute("BEGIN IMMEDIATE")
+            with self._connection:
+                self._connection.executemany(
+                    "INSERT OR REPLACE INTO requirements VALUES (?, ?, ?, ?)",
+                    [
+                        (key, requirement, error, now)
+                        for key, (requirement, error) in self._pending.items()
+                    ],
+                )
+                self._connection.executemany(
+                    "UPDATE requirements SET used = ? WHERE key = ?",
+                    [(now, key) for key in self._used - self._pending.keys()],
+                )
+                (count,) = self._connection.execute(
+                    "SELECT COUNT(*) FROM requirements"
+                ).fetchone()
+                if count > self.max_entries:
+                    self._connection.execute(
+                        "DELETE FROM requirements WHERE key IN "
+                        "(SELECT key FROM requirements ORDER BY used LIMIT ?)",
+                        (count - self.max_entries,),
+                    )
+        self._pending.clear()
+        self._used.clear()
+
+    def close(self) -> None:
+        """Flush pending results and close the database."""
+        self.flush()
+        self._connection.close()
+
+    def _flush_if_full(self) -> None:
+        if len(self._pending) + len(self._used) >= _FLUSH_SIZE:
+            self.flush()
+
+
+def open_requirement_cache(
+    path: Path, *, max_entries: int = DEFAULT_MAX_ENTRIES
+) -> RequirementCache:
+    """Open the cache at ``path`` and use it for every rendered requirement."""
+    global _active
+    close_requirement_cache()
+    _active = RequirementCache(path, max_entries=max_entries)
+    return _active
+
+
+def active_requirement_cache() -> RequirementCache | None:
+    """Return the cache opened by :func:`open_requirement_cache`, if any."""
+    return _active
+
+
+def close_requirement_cache() -> None:
+    """Flush and close the active cache, if one is open."""
+    global _active
+    if _active is not None:
+        _active.close()
+        _active = None
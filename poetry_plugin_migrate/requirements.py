@@ -1,14 +1,29 @@
 from __future__ import annotations
 
+import re
+from typing import TYPE_CHECKING
+
 from packaging.requirements import InvalidRequirement, Requirement
 from poetry.core.packages.dependency import Dependency
 from poetry.core.version.requirements import parse_requirement
 
+if TYPE_CHECKING:
+    from collections.abc import Mapping
+
 
 class UnrepresentableRequirementError(ValueError):
     """Raised when a Poetry dependency cannot be migrated without semantic loss."""
 
 
+_NAME = re.compile(r"[A-Za-z0-9](?:[A-Za-z0-9._-]*[A-Za-z0-9])?")
+_RELEASE = r"(?:0|[1-9][0-9]*)(?:\.(?:0|[1-9][0-9]*)){0,3}"
+_CLAUSE = re.compile(
+    rf"(?P<operator>\^|~|==|!=|>=|<=|>|<)?(?P<release>{_RELEASE})(?P<wildcard>\.\*)?"
+)
+_LOWER_BOUNDS = frozenset({">=", ">"})
+_UPPER_BOUNDS = frozenset({"<", "<="})
+
+
 def render_pep508_requirement(
     dependency: Dependency, *, keep_version_brackets: bool
 ) -> str:
@@ -20,7 +35,87 @@ def render_pep508_requirement(
     arbitrary requirement text. Direct references and unconstrained
     dependencies are already unaffected by the legacy syntax and are retained
     byte-for-byte.
+
+    Plain registry dependencies with a simple version constraint are rendered
+    by :func:`render_version_requirement` without parsing; everything else
+    takes the validated round trip below.
     """
+    rendered = _render_plain_version(
+        dependency, keep_version_brackets=keep_version_brackets
+    )
+    if rendered is not None:
+        return rendered
+    return _render_round_trip(dependency, keep_version_brackets=keep_version_brackets)
+
+
+def render_dependency_requirement(
+    name: str,
+    spec: str | Mapping[str, object],
+    dependency: Dependency,
+    *,
+    keep_version_brackets: bool,
+) -> str:
+    """Render ``dependency``, created from ``name`` and ``spec``, as PEP 508.
+
+    The result equals :func:`render_pep508_requirement`. While a persistent
+    requirement cache is open, round trips are looked up by ``name`` and
+    ``spec`` first, and new results are added to the cache.
+    """
+    from poetry_plugin_migrate.requirement_cache import active_requirement_cache
+
+    rendered = _render_plain_version(
+        dependency, keep_version_brackets=keep_version_brackets
+    )
+    if rendered is not None:
+        return rendered
+    cache = active_requirement_cache()
+    key = (
+        cache.key(name, spec, keep_version_brackets=keep_version_brackets)
+        if cache is not None
+        else None
+    )
+    if cache is None or key is None:
+        return _render_round_trip(
+            dependency, keep_version_brackets=keep_version_brackets
+        )
+    entry = cache.lookup(key)
+    if entry is not None:
+        requirement, error = entry
+        if requirement is None:
+            raise UnrepresentableRequirementError(error)
+        return requirement
+
+    try:
+        requirement = _render_round_trip(
+            dependency, keep_version_brackets=keep_version_brackets
+        )
+    except UnrepresentableRequirementError as error:
+        cache.store(key, None, str(error))
+        raise
+    cache.store(key, requirement, None)
+    return requirement
+
+
+def _render_plain_version(
+    dependency: Dependency, *, keep_version_brackets: bool
+) -> str | None:
+    if (
+        type(dependency) is Dependency
+        and dependency.source_type is None
+        and not dependency.features
+        and not dependency.in_extras
+        and dependency.python_versions == "*"
+        and dependency.marker.is_any()
+    ):
+        return render_version_requirement(
+            dependency.pretty_name,
+            dependency.pretty_constraint,
+            keep_version_brackets=keep_version_brackets,
+        )
+    return None
+
+
+def _render_round_trip(dependency: Dependency, *, keep_version_brackets: bool) -> str:
     raw = dependency.to_pep_508()
     try:
         original = Requirement(raw)
@@ -58,6 +153,86 @@ def render_pep508_requirement(
     return candidate
 
 
+def render_version_requirement(
+    name: str, constraint: str, *, keep_version_brackets: bool
+) -> str | None:
+    """Render a bare Poetry version constraint without building a dependency.
+
+    Only release versions with caret, tilde, wildcard and comparison operators
+    and a ``>=A,<B`` style range are handled; ``None`` is returned for every
+    other constraint so callers fall back to :func:`render_pep508_requirement`.
+    The output is byte-identical to that fallback for every handled input.
+    """
+    if _NAME.fullmatch(name) is None:
+        return None
+    if constraint == "*":
+        return name
+
+    clauses = constraint.split(",")
+    if len(clauses) == 1:
+        specifier = _render_clause(clauses[0])
+    elif len(clauses) == 2:
+        specifier = _render_range(clauses[0], clauses[1])
+    else:
+        return None
+    if specifier is None:
+        return None
+    if keep_version_brackets:
+        return f"{name} ({specifier})"
+    return f"{name}{specifier}"
+
+
+def _render_clause(clause: str) -> str | None:
+    match = _CLAUSE.fullmatch(clause)
+    if match is None:
+        return None
+    operator = match["operator"] or "=="
+    release = match["release"]
+    if match["wildcard"]:
+        if operator not in {"==", "!="}:
+            return None
+        return f"{operator}{release}.*"
+
+    if operator not in {"^", "~"}:
+        return f"{operator}{release}"
+
+    parts = [int(part) for part in release.split(".")]
+    if len(parts) > 3:
+        return None
+    if operator == "^":
+        # The first non-zero component is bumped; a precision of one or an
+        # all-zero version bumps the last given component instead.
+        bumped = next(
+            (index for index, part in enumerate(parts) if part != 0), len(parts) - 1
+        )
+    else:
+        bumped = 0 if len(parts) == 1 else 1
+    upper = [*parts[:bumped], parts[bumped] + 1] + [0] * (len(parts) - bumped - 1)
+    return f">={release},<{'.'.join(map(str, upper))}"
+
+
+def _render_range(lower: str, upper: str) -> str | None:
+    lower_match = _CLAUSE.fullmatch(lower)
+    upper_match = _CLAUSE.fullmatch(upper)
+    if (
+        lower_match is None
+        or upper_match is None
+        or lower_match["wildcard"]
+        or upper_match["wildcard"]
+        or lower_match["operator"] not in _LOWER_BOUNDS
+        or upper_match["operator"] not in _UPPER_BOUNDS
+    ):
+        return None
+    if _release_key(lower_match["release"]) >= _release_key(upper_match["release"]):
+        return None
+    return f"{lower},{upper}"
+
+
+def _release_key(release: str) -> tuple[int, ...]:
+    parts = [int(part) for part in release.split(".")]
+    return (*parts, *[0] * (4 - len(parts)))
+
+
 def _same_pep508_semantics(source: Dependency, target: Dependency) -> bool:
     """Compare every dependency field representable in a PEP 508 string."""
     from urllib.parse import urlsplit
@@ -0,0 +1,219 @@
+from __future__ import annotations
+
+import hashlib
+import re
+from copy import copy
+from typing import TYPE_CHECKING
+
+from tomlkit.items import String, StringType, Table
+
+from poetry_plugin_migrate.toml import is_table
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from pathlib import Path
+
+    from tomlkit import TOMLDocument
+
+    from poetry_plugin_migrate.batch import ProjectResult
+
+_NAME = re.compile(r"[A-Z0-9]|[A-Z0-9][A-Z0-9._-]*[A-Z0-9]", re.IGNORECASE)
+# Characters that read the same in basic and literal strings.
+_PLAIN_TEXT = re.compile(r"[^\"'\\\x00-\x1f\x7f]*")
+
+# [tool.poetry] strings that usually are the only difference between projects
+# generated from one template. The engine moves them to [project] without
+# reading them, so one migration of a document with placeholders serves every
+# project of that template. Each placeholder is a valid value for its field,
+# so the migrated placeholder document passes the same validation.
+TEMPLATE_PLACEHOLDERS = {
+    "name": "poetry-migrate-template-name",
+    "version": "0.0.0.post7153917",
+    "description": "poetry-migrate-template-description",
+}
+
+
+def _is_slot_value(field: str, value: str) -> bool:
+    if _PLAIN_TEXT.fullmatch(value) is None:
+        return False
+    if field == "name":
+        return _NAME.fullmatch(value) is not None
+    if field == "version":
+        from packaging.version import InvalidVersion, Version
+
+        try:
+            Version(value)
+        except InvalidVersion:
+            return False
+    return True
+
+
+class Skeleton:
+    """A document with its template slots replaced by placeholders."""
+
+    text: str
+    """Serialized document with placeholders instead of slot values."""
+
+    digest: str
+    """Structural fingerprint of the document, the hash of ``text``."""
+
+    values: dict[str, str]
+    """Slot values of the document by placeholder."""
+
+    def __init__(self, text: str, values: dict[str, str]) -> None:
+        self.text = text
+        self.digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        self.values = values
+
+
+def document_skeleton(document: TOMLDocument, source: str) -> Skeleton | None:
+    """Return the skeleton of ``document``, parsed from ``source``.
+
+    A slot is only abstracted while [project] does not define the same field,
+    because the engine compares the two values. Every other value remains in
+    the skeleton, so documents share a fingerprint only if the migration can
+    differ in nothing but the slot values. ``None`` means the document cannot
+    be replayed from a template.
+    """
+    tool = document.get("tool")
+    tool_poetry = tool.get("poetry") if is_table(tool) else None
+    if not isinstance(tool_poetry, Table):
+        return None
+    project = document.get("project")
+
+    slots: dict[str, String] = {}
+    for field, placeholder in TEMPLATE_PLACEHOLDERS.items():
+        if placeholder in source:
+            return None
+        if field not in tool_poetry or (is_table(project) and field in project):
+            continue
+        item = tool_poetry.item(field)
+        if (
+            isinstance(item, String)
+            and item.type in (StringType.SLB, StringType.SLL)
+            and _is_slot_value(field, item.value)
+        ):
+            slots[field] = item
+
+    values: dict[str, str] = {}
+    try:
+        for field, item in slots.items():
+            placeholder = TEMPLATE_PLACEHOLDERS[field]
+            tool_poetry[field] = String(
+                item.type, placeholder, placeholder, copy(item.trivia)
+            )
+            values[placeholder] = item.value
+        text = document.as_string()
+    finally:
+        # Restore the parsed items, so the document is migrated unchanged if
+        # no template applies.
+        for field, item in slots.items():
+            tool_poetry[field] = item
+    return Skeleton(text, values)
+
+
+class MigrationTemplate:
+    """Migration result of a skeleton, replayable for each of its documents."""
+
+    migrated: str
+    """Migrated skeleton, with the placeholders of the slots."""
+
+    warnings: list[str]
+    """Warnings of the migration, with the placeholders of the slots."""
+
+    def __init__(self, migrated: str, warnings: list[str]) -> None:
+        self.migrated = migrated
+        self.warnings = warnings
+
+    def render(self, values: dict[str, str]) -> tuple[str, list[str]]:
+        """Return the migrated text and warnings for the given slot values."""
+        return _fill(self.migrated, values), [
+            _fill(warning, values) for warning in self.warnings
+        ]
+
+
+def _fill(text: str, values: dict[str, str]) -> str:
+    for placeholder, value in values.items():
+        text = text.replace(placeholder, value)
+    return text
+
+
+class TemplateCache:
+    """Replay migrations for documents that share a structural fingerprint.
+
+    A template is only built when a fingerprint is seen a second time, so
+    trees without templated projects only pay for computing fingerprints.
+    The template is checked against that second project's real migration;
+    fingerprints whose template disagrees are never replayed.
+    """
+
+    hits: int
+    """Number of projects migrated by replaying a template."""
+
+    misses: int
+    """Number of projects with a fingerprint but no usable template."""
+
+    def __init__(self) -> None:
+        self.hits = 0
+        self.misses = 0
+        self._seen: set[str] = set()
+        self._templates: dict[str, MigrationTemplate | None] = {}
+
+    def cache_info(self) -> tuple[int, int, int | None, int]:
+        return self.hits, self.misses, None, len(self._templates)
+
+    def replay(
+        self, path: Path, source: str, skeleton: Skeleton
+    ) -> ProjectResult | None:
+        """Return the replayed result for ``path``, if a template exists."""
+        template = self._templates.get(skeleton.digest)
+        if template is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+
+        from poetry_plugin_migrate.batch import ProjectResult
+
+        migrated, warnings = template.render(skeleton.values)
+        if migrated == source:
+            return ProjectResult(path, "unchanged", migrated=source, warnings=warnings)
+        return ProjectResult(
+            path,
+            "migrated",
+            migrated=migrated,
+            warnings=warnings,
+        )
+
+    def learn(
+        self,
+        skeleton: Skeleton,
+        result: ProjectResult,
+        migrate: Callable[[str], ProjectResult],
+    ) -> None:
+        """Build a template from the second result seen for a fingerprint.
+
+        ``migrate`` runs the real migration for a source text; it is called
+        once for the skeleton.
+        """
+        if skeleton.digest in self._templates:
+            return
+        if skeleton.digest not in self._seen:
+            self._seen.add(skeleton.digest)
+            return
+
+        template = None
+        if result.status in ("migrated", "unchanged") and result.migrated is not None:
+            skeleton_result = migrate(skeleton.text)
+            if (
+                skeleton_result.status in ("migrated", "unchanged")
+                and skeleton_result.migrated is not None
+            ):
+                candidate = MigrationTemplate(
+                    skeleton_result.migrated, skeleton_result.warnings
+                )
+                if candidate.render(skeleton.values) == (
+                    result.migrated,
+                    result.warnings,
+                ):
+                    template = candidate
+        self._templates[skeleton.digest] = template
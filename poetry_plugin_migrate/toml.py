@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from collections import Counter
+from collections.abc import Hashable
 from copy import deepcopy
 from typing import TypeAlias, TypeGuard
 
@@ -19,11 +20,13 @@ from tomlkit.items import (
     Table,
     Trivia,
     Whitespace,
+    _ArrayItemGroup,
 )
 
 TomlTable: TypeAlias = AbstractTable | OutOfOrderTableProxy
 BodyEntry: TypeAlias = tuple[Key | None, Item]
 DocumentBlock: TypeAlias = tuple[str, list[BodyEntry]]
+PlainTable: TypeAlias = dict[str, object]
 
 
 def make_string(value: str, *, literal: bool) -> String:
@@ -122,21 +125,36 @@ def extend_array_preserving_comments(
     if len(source) != len(replacements):
         raise ValueError("Every source array value requires one replacement")
 
-    transformed = deepcopy(source)
-    for index, replacement in enumerate(replacements):
-        # Replacing through Array.__setitem__ transfers formatting from the
-        # scalar source value into the replacement (for example, it removes
-        # spaces inside a generated inline table). Replace only the parsed
-        # group's value so the surrounding array trivia is retained while the
-        # generated item's own formatting remains intact.
-        group = transformed._value[transformed._index_map[index]]
-        group.value = replacement
-
     if target._value and isinstance(target._value[-1].value, Null):
         target._value.pop()
+    value_index = len(target)
     list.extend(target, replacements)
-    target._value.extend(transformed._value)
-    target._reindex()
+
+    pending_replacements = iter(replacements)
+    for group in source._value:
+        # Copy only the group's whitespace and comment items. The source value
+        # is replaced, so cloning it would be wasted work. Assigning the
+        # replacement to the group directly, rather than through
+        # Array.__setitem__, avoids transferring formatting from the scalar
+        # source value into the replacement (for example, removing spaces
+        # inside a generated inline table).
+        value = group.value
+        if value is None or isinstance(value, Null):
+            value = deepcopy(value)
+        else:
+            value = next(pending_replacements)
+            # Maintain the value-to-group index incrementally instead of
+            # reindexing the complete target array for every source.
+            target._index_map[value_index] = len(target._value)
+            value_index += 1
+        target._value.append(
+            _ArrayItemGroup(
+                value=value,
+                indent=deepcopy(group.indent),
+                comma=deepcopy(group.comma),
+                comment=deepcopy(group.comment),
+            )
+        )
 
 
 def _reorder_tool_namespace(
@@ -332,8 +350,68 @@ def require_array(value: object, path: str) -> Array:
     return value
 
 
+def parse_array(text: str) -> Array:
+    """Parse the serialized ``text`` of an array back into an array item."""
+    from tomlkit import parse
+
+    return require_array(parse(f"array = {text}\n")["array"], "array")
+
+
 def require_item(value: object, path: str) -> Item:
     """Narrow a parsed TOML value to a trivia-bearing item."""
     if not isinstance(value, Item):
         raise TypeError(f"[{path}] must be a TOML item, got {type(value).__name__}")
     return value
+
+
+def value_key(value: object) -> Hashable:
+    """Return a hashable key that compares equal exactly when ``value`` does.
+
+    Tables become frozensets of their items and arrays become tuples, so
+    membership in a set of keys agrees with ``in`` on a tomlkit array without
+    comparing against every element.
+    """
+    if isinstance(value, Item):
+        value = value.unwrap()
+    if isinstance(value, dict):
+        return frozenset((key, value_key(item)) for key, item in value.items())
+    if isinstance(value, list):
+        return tuple(value_key(item) for item in value)
+    if not isinstance(value, Hashable):
+        raise TypeError(f"Unexpected array value type {type(value).__name__}")
+    return value
+
+
+def plain_snapshot(document: TOMLDocument) -> PlainTable:
+    """Return a read-only plain-data view of a document for migration decisions.
+
+    Lookups through tomlkit containers and ``OutOfOrderTableProxy`` are much
+    slower than dictionary access. Decision logic reads this snapshot, taken
+    once, and only formatting-preserving edits touch tomlkit items.
+    """
+    snapshot: PlainTable = document.unwrap()
+    return snapshot
+
+
+def plain_get(table: PlainTable, *path: str) -> object:
+    """Return a nested snapshot value, or ``None`` if any table is missing."""
+    value: object = table
+    for key in path:
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value
+
+
+def require_plain_table(value: object, path: str) -> PlainTable:
+    """Narrow a snapshot value to a table or fail with useful context."""
+    if not isinstance(value, dict):
+        raise TypeError(f"[{path}] must be a table, got {type(value).__name__}")
+    return value
+
+
+def require_plain_array(value: object, path: str) -> list[object]:
+    """Narrow a snapshot value to an array or fail with useful context."""
+    if not isinstance(value, list):
+        raise TypeError(f"[{path}] must be an array, got {type(value).__name__}")
+    return value
@@ -0,0 +1,24 @@
+from __future__ import annotations
+
+from poetry.core import json as core_json
+
+from poetry_plugin_migrate.profiling import register_cache, timed
+
+# poetry-core compiles each JSON schema once per process and keeps the
+# compiled validator, so all documents of a run share it. Its statistics show
+# that reuse in the ``--profile`` output.
+_validator_cache = getattr(core_json, "_get_validator", None)
+if _validator_cache is not None and hasattr(_validator_cache, "cache_info"):
+    register_cache("schema validator compilation", _validator_cache)
+
+
+def validate_pyproject(data: dict[str, object]) -> list[str]:
+    """Return the errors of strict Poetry validation of a migrated document.
+
+    ``data`` must be a plain mapping, for example from ``TOMLDocument.unwrap``;
+    poetry-core adds defaults to it while validating.
+    """
+    from poetry.core.factory import Factory as CoreFactory
+
+    with timed("validation"):
+        return CoreFactory.validate(data, strict=True)["errors"]
@@ -0,0 +1,270 @@
+from __future__ import annotations
+
+from collections import deque
+from typing import TYPE_CHECKING
+
+from poetry_plugin_migrate.migrator import Migrator
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+    from pathlib import Path
+
+    from poetry_plugin_migrate.batch import ProjectResult
+    from poetry_plugin_migrate.migrator import MigrationCommand
+    from poetry_plugin_migrate.reports import Report
+
+_CONFIRM_CHOICES = ("yes", "no")
+
+
+def _plain_text(text: str) -> str:
+    from cleo.formatters.formatter import Formatter
+
+    return Formatter().remove_format(text)
+
+
+class Prompt:
+    """A migration prompt reached while migrating a project."""
+
+    question: str
+    """Question without console markup."""
+
+    choices: list[str]
+    """Possible answers without console markup."""
+
+    default: int
+    """Index of the answer used by non-interactive migrations."""
+
+    def __init__(self, question: str, choices: list[str], default: int) -> None:
+        self.question = question
+        self.choices = choices
+        self.default = default
+
+
+class ScriptedMigrator(Migrator):
+    """Migrator that answers prompts from a script and records every prompt.
+
+    ``answers`` maps the position of a prompt within the run to the index of
+    the chosen answer. Prompts that are not scripted use their default, so an
+    empty script reproduces a non-interactive migration of a project that
+    needs one.
+    """
+
+    answers: dict[int, int]
+    """Chosen answer index by prompt position."""
+
+    prompts: list[Prompt]
+    """Prompts reached so far, in the order they were asked."""
+
+    def __init__(
+        self,
+        command: MigrationCommand,
+        literal: bool,
+        answers: dict[int, int] | None = None,
+    ) -> None:
+        # Prompts never reach the command. Migrating without ``skip`` also
+        # explores projects whose defaults would leave them unchanged.
+        super().__init__(command=command, skip=False, literal=literal)
+        self.answers = answers or {}
+        self.prompts = []
+
+    def _prompt(
+        self, question: str, default: bool = False, additional_info: str | None = None
+    ) -> bool:
+        choices = list(_CONFIRM_CHOICES)
+        return self._answer(question, choices, 0 if default else 1) == 0
+
+    def _choice(
+        self,
+        question: str,
+        choices: list[str],
+        default: int,
+        attempts: int | None = None,
+        additional_info: str | None = None,
+    ) -> str:
+        return choices[self._answer(question, choices, default)]
+
+    def _answer(self, question: str, choices: list[str], default: int) -> int:
+        index = self.answers.get(len(self.prompts), default)
+        self.prompts.append(
+            Prompt(
+                _plain_text(question),
+                [_plain_text(choice) for choice in choices],
+                default,
+            )
+        )
+        return index
+
+
+class Decision:
+    """Every answer to one prompt and the outcome of the migration with it."""
+
+    prompt: Prompt
+    """The prompt whose answers were explored."""
+
+    context: list[tuple[str, str]]
+    """Non-default ``(question, answer)`` pairs that lead to the prompt."""
+
+    outcomes: list[ProjectResult]
+    """Validated migration result for each answer, in the order of the choices."""
+
+    def __init__(
+        self,
+        prompt: Prompt,
+        context: list[tuple[str, str]],
+        outcomes: list[ProjectResult],
+    ) -> None:
+        self.prompt = prompt
+        self.context = context
+        self.outcomes = outcomes
+
+
+class Exploration:
+    """Outcome of every prompt answer of one project."""
+
+    result: ProjectResult
+    """Result of the migration with default answers."""
+
+    decisions: list[Decision]
+    """Explored prompts in the order they were reached."""
+
+    runs: int
+    """Number of migrations the exploration needed."""
+
+    def __init__(
+        self, result: ProjectResult, decisions: list[Decision], runs: int
+    ) -> None:
+        self.result = result
+        self.decisions = decisions
+        self.runs = runs
+
+
+def explore_project(
+    path: Path, command: MigrationCommand, *, literal: bool
+) -> Exploration:
+    """Migrate ``path`` with every answer to each prompt the migration reaches.
+
+    The file is read and parsed once, and every migration starts from the same
+    parsed document. A run with default answers discovers the prompts. Each
+    other answer is then explored by one more run that changes only that
+    answer; prompts that such a run reaches for the first time are explored in
+    turn with that answer kept. Answers to unrelated prompts are therefore not
+    combined, so the number of runs grows with the number of answers instead
+    of the number of combinations.
+
+    Every outcome is validated like a batch migration.
+    """
+    from tomlkit import parse
+    from tomlkit.exceptions import TOMLKitError
+
+    from poetry_plugin_migrate.batch import ProjectResult, _migrate_document
+    from poetry_plugin_migrate.profiling import trace_span
+
+    try:
+        with trace_span("read"):
+            source = path.read_text(encoding="utf-8")
+        with trace_span("parse"):
+            document = parse(source)
+    except (OSError, UnicodeDecodeError, TOMLKitError) as error:
+        return Exploration(ProjectResult(path, "failed", errors=[str(error)]), [], 0)
+
+    def run(answers: dict[int, int]) -> tuple[ScriptedMigrator, ProjectResult]:
+        migrator = ScriptedMigrator(command, literal, answers)
+        with trace_span("what-if run", answers=str(answers)):
+            result = _migrate_document(
+                path, source, document, command, literal=literal, migrator=migrator
+            )
+        return migrator, result
+
+    migrator, baseline = run({})
+    runs = 1
+    decisions = []
+    explored: set[tuple[str, int]] = set()
+    pending: deque[tuple[dict[int, int], ScriptedMigrator, ProjectResult]] = deque(
+        [({}, migrator, baseline)]
+    )
+    while pending:
+        answers, migrator, result = pending.popleft()
+        # Earlier prompts were asked exactly like in the run this one forked from.
+        first = max(answers, default=-1) + 1
+        occurrences: dict[str, int] = {}
+        for position, prompt in enumerate(migrator.prompts):
+            occurrence = occurrences.get(prompt.question, 0)
+            occurrences[prompt.question] = occurrence + 1
+            key = (prompt.question, occurrence)
+            if position < first or key in explored:
+                continue
+            explored.add(key)
+            outcomes = []
+            for index in range(len(prompt.choices)):
+                if index == prompt.default:
+                    outcomes.append(result)
+                    continue
+                forked_answers = {**answers, position: index}
+                forked_migrator, outcome = run(forked_answers)
+                runs += 1
+                outcomes.append(outcome)
+                pending.append((forked_answers, forked_migrator, outcome))
+            context = [
+                (
+                    migrator.prompts[answered].question,
+                    migrator.prompts[answered].choices[index],
+                )
+                for answered, index in sorted(answers.items())
+            ]
+            decisions.append(Decision(prompt, context, outcomes))
+    return Exploration(baseline, decisions, runs)
+
+
+def build_what_if_report(
+    root: Path,
+    explorations: Iterable[Exploration],
+    *,
+    shard: tuple[int, int] | None = None,
+) -> Report:
+    """Return the JSON-compatible report of a what-if run."""
+    from poetry_plugin_migrate.reports import REPORT_VERSION
+
+    def outcome(result: ProjectResult) -> dict[str, object]:
+        return {
+            "status": result.status,
+            "warnings": list(result.warnings),
+            "errors": list(result.errors),
+        }
+
+    return {
+        "version": REPORT_VERSION,
+        "what_if": True,
+        "shard": None if shard is None else {"index": shard[0], "count": shard[1]},
+        "projects": [
+            {
+                "path": exploration.result.path.relative_to(root).as_posix(),
+                **outcome(exploration.result),
+                "runs": exploration.runs,
+                "prompts": [
+                    {
+                        "question": decision.prompt.question,
+                        "after": [
+                            {"question": question, "answer": answer}
+                            for question, answer in decision.context
+                        ],
+                        "answers": [
+                            {
+                                "answer": choice,
+                                "default": index == decision.prompt.default,
+                                **outcome(result),
+                            }
+                            for index, (choice, result) in enumerate(
+                                zip(
+                                    decision.prompt.choices,
+                                    decision.outcomes,
+                                    strict=True,
+                                )
+                            )
+                        ],
+                    }
+                    for decision in exploration.decisions
+                ],
+            }
+            for exploration in explorations
+        ],
+    }
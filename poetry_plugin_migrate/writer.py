@@ -0,0 +1,240 @@
+from __future__ import annotations
+
+import os
+import re
+import tarfile
+import tempfile
+from datetime import datetime, timezone
+from functools import partial
+from io import BytesIO
+from pathlib import Path, PurePosixPath
+from typing import TYPE_CHECKING, TypeVar
+
+from poetry_plugin_migrate.profiling import trace_span
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from poetry_plugin_migrate.fileio import FileIOStage
+
+BACKUP_ARCHIVE_PREFIX = "pyproject-backup-"
+BACKUP_ARCHIVE_SUFFIX = ".tar.gz"
+
+T = TypeVar("T")
+
+
+def render_with_linesep(content: str, linesep: str = os.linesep) -> str:
+    """Apply the line separator ``tomlkit.toml_file.TOMLFile`` writes with."""
+    if linesep == "\n":
+        return content.replace("\r\n", "\n")
+    if linesep == "\r\n":
+        return re.sub(r"(?<!\r)\n", "\r\n", content)
+    return content
+
+
+def atomic_write(path: Path, content: bytes, *, mode: int | None = None) -> None:
+    """Replace ``path`` with ``content`` without exposing a partial file.
+
+    The data is written to a temporary file in the same directory, flushed to
+    disk and moved over the target with ``os.replace``. An interrupted write
+    therefore leaves either the old or the new file, never a mixture. The
+    target's permission bits are retained; callers that already know them
+    pass ``mode`` to save looking them up.
+    """
+    descriptor, temporary_name = tempfile.mkstemp(
+        prefix=f".{path.name}.", suffix=".tmp", dir=path.parent
+    )
+    temporary_path = Path(temporary_name)
+    try:
+        with os.fdopen(descriptor, "wb") as temporary_file:
+            temporary_file.write(content)
+            temporary_file.flush()
+            os.fsync(temporary_file.fileno())
+        if mode is None and path.exists():
+            mode = path.stat().st_mode
+        if mode is not None:
+            temporary_path.chmod(mode & 0o7777)
+        temporary_path.replace(path)
+    except BaseException:
+        temporary_path.unlink(missing_ok=True)
+        raise
+
+
+class Original:
+    """A staged file as it was before the batch replaced it."""
+
+    path: Path
+    """Location of the file."""
+
+    content: bytes
+    """Data of the file."""
+
+    stat: os.stat_result
+    """Status of the file, read together with its data."""
+
+    def __init__(self, path: Path, content: bytes, stat: os.stat_result) -> None:
+        self.path = path
+        self.content = content
+        self.stat = stat
+
+    @property
+    def mode(self) -> int:
+        return self.stat.st_mode
+
+
+def _read_original(path: Path) -> Original:
+    with trace_span("read", "io", path=str(path)), path.open("rb") as file:
+        return Original(path, file.read(), os.fstat(file.fileno()))
+
+
+def _replace(
+    path: Path, content: bytes, original: Original, replaced: list[Original]
+) -> None:
+    with trace_span("write", "io", path=str(path)):
+        atomic_write(path, content, mode=original.mode)
+    replaced.append(original)
+
+
+class BatchWriter:
+    """Stage migrated files and replace them together after one backup.
+
+    Originals of every staged file are stored in a single compressed tar
+    archive below ``root`` before any file is replaced. Each replacement is
+    atomic. If a replacement fails, files already replaced in this run are
+    restored from the in-memory originals before the error propagates.
+
+    With an ``io`` stage, the originals are read and the files replaced
+    concurrently on it instead of one after another.
+    """
+
+    root: Path
+    """Directory that archive member names are relative to."""
+
+    backup: bool
+    """Whether to write a backup archive before replacing files."""
+
+    io: FileIOStage | None
+    """Stage that runs the reads and writes concurrently, if any."""
+
+    def __init__(
+        self, root: Path, *, backup: bool = True, io: FileIOStage | None = None
+    ) -> None:
+        self.root = root
+        self.backup = backup
+        self.io = io
+        self._staged: list[tuple[Path, bytes]] = []
+
+    def __len__(self) -> int:
+        return len(self._staged)
+
+    def stage(self, path: Path, content: str) -> bytes:
+        """Queue ``content`` to replace ``path`` and return the bytes to write."""
+        data = render_with_linesep(content).encode("utf-8")
+        self._staged.append((path, data))
+        return data
+
+    def commit(self) -> Path | None:
+        """Back up and replace every staged file, returning the archive path."""
+        if not self._staged:
+            return None
+
+        originals = self._run(
+            [partial(_read_original, path) for path, _ in self._staged]
+        )
+        archive = self._write_archive(originals) if self.backup else None
+
+        replaced: list[Original] = []
+        try:
+            self._run(
+                [
+                    partial(_replace, path, content, original, replaced)
+                    for (path, content), original in zip(
+                        self._staged, originals, strict=True
+                    )
+                ]
+            )
+        except BaseException:
+            if self.io is not None:
+                # Let writes still in flight finish, so each is rolled back.
+                self.io.drain()
+            for original in reversed(replaced):
+                atomic_write(original.path, original.content, mode=original.mode)
+            raise
+        finally:
+            self._staged.clear()
+        return archive
+
+    def _run(self, operations: list[Callable[[], T]]) -> list[T]:
+        if self.io is None:
+            return [operation() for operation in operations]
+        results = self.io.run_all(operations)
+        # Surface the first failure, like the serial loop would.
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        return [result for result in results if not isinstance(result, BaseException)]
+
+    def _write_archive(self, originals: list[Original]) -> Path:
+        buffer = BytesIO()
+        with tarfile.open(fileobj=buffer, mode="w:gz") as tar:
+            for original in originals:
+                path, content, stat = original.path, original.content, original.stat
+                member = tarfile.TarInfo(path.relative_to(self.root).as_posix())
+                member.size = len(content)
+                member.mtime = int(stat.st_mtime)
+                member.mode = stat.st_mode & 0o7777
+                tar.addfile(member, BytesIO(content))
+
+        timestamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        name = f"{BACKUP_ARCHIVE_PREFIX}{timestamp}"
+        index = 0
+        while True:
+            archive = self.root / f"{name}{BACKUP_ARCHIVE_SUFFIX}"
+            try:
+                # Exclusive creation never overwrites an earlier run's backup.
+                with archive.open("xb") as archive_file:
+                    archive_file.write(buffer.getvalue())
+                    archive_file.flush()
+                    os.fsync(archive_file.fileno())
+            except FileExistsError:
+                index += 1
+                name = f"{BACKUP_ARCHIVE_PREFIX}{timestamp}.{index}"
+                continue
+            except BaseException:
+                archive.unlink(missing_ok=True)
+                raise
+            return archive
+
+
+def restore_backup_archive(archive: Path) -> list[Path]:
+    """Restore every file stored in a backup archive and return their paths.
+
+    Member names are resolved relative to the directory containing the archive,
+    which is where :class:`BatchWriter` creates it. Only regular files named
+    ``pyproject.toml`` inside that directory are accepted; the archive is
+    validated completely before any file is replaced.
+    """
+    root = archive.parent
+    restores: list[tuple[Path, bytes]] = []
+    with tarfile.open(archive, "r:gz") as tar:
+        for member in tar.getmembers():
+            name = PurePosixPath(member.name)
+            if (
+                not member.isfile()
+                or name.is_absolute()
+                or ".." in name.parts
+                or name.name != "pyproject.toml"
+            ):
+                raise ValueError(
+                    f"Unexpected member {member.name!r} in backup archive {archive}"
+                )
+            extracted = tar.extractfile(member)
+            if extracted is None:
+                raise ValueError(
+                    f"Could not read {member.name!r} from backup archive {archive}"
+                )
+            restores.append((root.joinpath(*name.parts), extracted.read()))
+
+    for path, content in restores:
+        atomic_write(path, content)
+    return [path for path, _ in restores]
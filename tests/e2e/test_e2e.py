@@ -1,6 +1,8 @@
 from __future__ import annotations
 
+import json
 import re
+import shutil
 from typing import TYPE_CHECKING
 
 import pytest
@@ -9,7 +11,7 @@ from poetry.console.application import Application
 from poetry.factory import Factory
 from tomlkit import parse
 
-from poetry_plugin_migrate.command import MigrateCommand
+from poetry_plugin_migrate.command import MergeReportsCommand, MigrateCommand
 from poetry_plugin_migrate.toml import require_table
 
 if TYPE_CHECKING:
@@ -231,3 +233,711 @@ dummy-test = "^4.0"
     assert coverage_run["branch"] is True
     assert pytest_options["addopts"] == "-q"
     assert Factory().create_poetry(project).package.name == "dummy-layout-project"
+
+
+def test_recursive_migration_writes_one_backup_archive_and_rolls_back(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    legacy_source = """\
+[tool.poetry]
+name = "dummy-legacy"
+version = "1.0.0"
+description = ""
+authors = []
+
+[tool.poetry.dependencies]
+python = ">=3.10"
+dummy-runtime = "^2.0"
+"""
+    modern_source = """\
+[project]
+name = "dummy-modern"
+version = "1.0.0"
+"""
+    legacy = tmp_path / "packages" / "legacy" / "pyproject.toml"
+    modern = tmp_path / "packages" / "modern" / "pyproject.toml"
+    vendored = tmp_path / ".venv" / "vendored" / "pyproject.toml"
+    for path, source in (
+        (legacy, legacy_source),
+        (modern, modern_source),
+        (vendored, legacy_source),
+    ):
+        path.parent.mkdir(parents=True)
+        path.write_text(source)
+    monkeypatch.chdir(tmp_path)
+    app = Application()
+    app.add(MigrateCommand())
+    tester = ApplicationTester(app)
+
+    status = tester.execute("migrate --recursive --profile")
+
+    assert status == 0
+    output = tester.io.fetch_output()
+    assert "license canonicalization:" in output
+    assert "schema validator compilation:" in output
+    assert re.search(r"validation: \d+ call\(s\), [\d.]+ ms total", output)
+    assert re.search(r"migration: \d+ call\(s\), [\d.]+ ms total", output)
+    assert "Migrated packages/legacy/pyproject.toml" in output
+    assert "Unchanged packages/modern/pyproject.toml" in output
+    assert "[project]" in legacy.read_text()
+    assert modern.read_text() == modern_source
+    assert vendored.read_text() == legacy_source
+    assert not list(tmp_path.rglob("*.bak*"))
+    archives = list(tmp_path.glob("pyproject-backup-*.tar.gz"))
+    assert len(archives) == 1
+
+    status = tester.execute(f"migrate --rollback {archives[0]}")
+
+    assert status == 0
+    assert legacy.read_text() == legacy_source
+
+
+def test_recursive_dry_run_and_failures_do_not_write(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    legacy_source = """\
+[tool.poetry]
+name = "dummy-legacy"
+version = "1.0.0"
+description = ""
+authors = []
+"""
+    broken_source = "[tool.poetry\n"
+    legacy = tmp_path / "legacy" / "pyproject.toml"
+    broken = tmp_path / "broken" / "pyproject.toml"
+    for path, source in ((legacy, legacy_source), (broken, broken_source)):
+        path.parent.mkdir(parents=True)
+        path.write_text(source)
+    monkeypatch.chdir(tmp_path)
+    app = Application()
+    app.add(MigrateCommand())
+    tester = ApplicationTester(app)
+
+    status = tester.execute("migrate --recursive --dry-run")
+
+    assert status == 1
+    assert "Failed broken/pyproject.toml" in tester.io.fetch_error()
+    assert legacy.read_text() == legacy_source
+    assert broken.read_text() == broken_source
+    assert not list(tmp_path.glob("pyproject-backup-*"))
+
+
+def test_sharded_recursive_runs_merge_into_one_report(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    legacy_source = """\
+[tool.poetry]
+name = "dummy-legacy"
+version = "1.0.0"
+description = ""
+authors = []
+"""
+    projects = [tmp_path / f"p{index}" / "pyproject.toml" for index in range(6)]
+    for path in projects:
+        path.parent.mkdir(parents=True)
+        path.write_text(legacy_source)
+    monkeypatch.chdir(tmp_path)
+    app = Application()
+    app.add(MigrateCommand())
+    app.add(MergeReportsCommand())
+    tester = ApplicationTester(app)
+
+    for index in (1, 2):
+        status = tester.execute(
+            f"migrate --recursive --no-backup --shard {index}/2 "
+            f"--report shard-{index}.json"
+        )
+        assert status == 0
+
+    assert all("[project]" in path.read_text() for path in projects)
+
+    status = tester.execute(
+        "migrate merge-reports shard-1.json shard-2.json --output fleet.json"
+    )
+
+    assert status == 0
+    assert "Migrated 6, unchanged 0, failed 0, stopped 0 project(s) in 2 shard(s)." in (
+        tester.io.fetch_output()
+    )
+    fleet = json.loads((tmp_path / "fleet.json").read_text())
+    assert [project["path"] for project in fleet["projects"]] == [
+        f"p{index}/pyproject.toml" for index in range(6)
+    ]
+
+    status = tester.execute("migrate merge-reports shard-1.json")
+
+    assert status == 1
+    assert "Missing report(s) for shard(s) 2." in tester.io.fetch_error()
+
+
+def test_resumed_recursive_run_skips_journaled_projects(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    legacy_source = """\
+[tool.poetry]
+name = "dummy-legacy"
+version = "1.0.0"
+description = ""
+authors = []
+"""
+    legacy = tmp_path / "legacy" / "pyproject.toml"
+    broken = tmp_path / "broken" / "pyproject.toml"
+    for path, source in ((legacy, legacy_source), (broken, "[tool.poetry\n")):
+        path.parent.mkdir(parents=True)
+        path.write_text(source)
+    monkeypatch.chdir(tmp_path)
+    app = Application()
+    app.add(MigrateCommand())
+    tester = ApplicationTester(app)
+
+    # A dry run writes nothing, so its migrated projects remain pending.
+    status = tester.execute("migrate --recursive --dry-run --journal journal.jsonl")
+
+    assert status == 1
+    assert len((tmp_path / "journal.jsonl").read_text().splitlines()) == 1
+
+    status = tester.execute(
+        "migrate --recursive --no-backup --journal journal.jsonl --resume"
+    )
+
+    output = tester.io.fetch_output()
+    assert status == 1
+    assert "Skipped broken/pyproject.toml (failed in journal)" in output
+    assert "Migrated legacy/pyproject.toml" in output
+    assert "[project]" in legacy.read_text()
+
+    status = tester.execute(
+        "migrate --recursive --no-backup --journal journal.jsonl --resume"
+    )
+
+    output = tester.io.fetch_output()
+    assert status == 1
+    assert "Skipped legacy/pyproject.toml (migrated in journal)" in output
+    assert "Skipped broken/pyproject.toml (failed in journal)" in output
+
+    broken.write_text(legacy_source)
+    status = tester.execute(
+        "migrate --recursive --no-backup --journal journal.jsonl --resume"
+    )
+
+    assert status == 0
+    assert "Migrated broken/pyproject.toml" in tester.io.fetch_output()
+
+
+def test_resume_writes_results_of_a_run_that_died_before_writing(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    from poetry_plugin_migrate.writer import BatchWriter
+
+    legacy_source = """\
+[tool.poetry]
+name = "dummy-legacy"
+version = "1.0.0"
+description = ""
+authors = []
+"""
+    projects = [tmp_path / f"p{index}" / "pyproject.toml" for index in range(3)]
+    for path in projects:
+        path.parent.mkdir()
+        path.write_text(legacy_source)
+    monkeypatch.chdir(tmp_path)
+    app = Application()
+    app.add(MigrateCommand())
+    tester = ApplicationTester(app)
+    commit = BatchWriter.commit
+
+    def crash(_writer: BatchWriter) -> None:
+        raise OSError("killed")
+
+    monkeypatch.setattr(BatchWriter, "commit", crash)
+    status = tester.execute("migrate --recursive --no-backup --journal journal.jsonl")
+
+    assert status == 1
+    assert all(path.read_text() == legacy_source for path in projects)
+
+    def no_migration(*_args: object, **_kwargs: object) -> None:
+        raise AssertionError("journaled projects must not be migrated again")
+
+    monkeypatch.setattr(BatchWriter, "commit", commit)
+    monkeypatch.setattr("poetry_plugin_migrate.batch.migrate_project", no_migration)
+    status = tester.execute(
+        "migrate --recursive --no-backup --journal journal.jsonl --resume"
+    )
+
+    assert status == 0
+    output = tester.io.fetch_output()
+    assert output.count("(migrated in journal)") == 3
+    assert "Wrote 3 migrated file(s)." in output
+    migrated = [path.read_text() for path in projects]
+    assert all("[project]" in text for text in migrated)
+
+    status = tester.execute(
+        "migrate --recursive --no-backup --journal journal.jsonl --resume"
+    )
+
+    assert status == 0
+    output = tester.io.fetch_output()
+    assert output.count("(migrated in journal)") == 3
+    assert "No migration changes were necessary." in output
+    assert [path.read_text() for path in projects] == migrated
+
+
+def test_recursive_trace_nests_phases_in_project_spans(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    project = tmp_path / "legacy" / "pyproject.toml"
+    project.parent.mkdir()
+    project.write_text(
+        """\
+[tool.poetry]
+name = "dummy-legacy"
+version = "1.0.0"
+description = ""
+authors = []
+
+[tool.poetry.dependencies]
+python = ">=3.10"
+dummy-runtime = "^2.0"
+"""
+    )
+    monkeypatch.chdir(tmp_path)
+    app = Application()
+    app.add(MigrateCommand())
+    tester = ApplicationTester(app)
+
+    status = tester.execute("migrate --recursive --no-backup --trace trace.json")
+
+    assert status == 0
+    events = json.loads((tmp_path / "trace.json").read_text())["traceEvents"]
+    spans = {event["name"]: event for event in events if event["ph"] == "X"}
+    project_span = spans["legacy/pyproject.toml"]
+    assert project_span["cat"] == "project"
+    for name in ("parse", "migration", "dependencies", "validation"):
+        span = spans[name]
+        assert project_span["ts"] <= span["ts"]
+        assert span["ts"] + span["dur"] <= project_span["ts"] + project_span["dur"]
+        assert span["pid"] == project_span["pid"]
+    assert spans["write"]["args"] == {"path": str(project)}
+
+
+def test_io_stage_pipelines_reads_and_writes_of_a_batch(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    legacy_source = """\
+[tool.poetry]
+name = "dummy-legacy"
+version = "1.0.0"
+description = ""
+authors = []
+"""
+    projects = [tmp_path / f"p{index:02}" / "pyproject.toml" for index in range(12)]
+    for path in projects:
+        path.parent.mkdir()
+        path.write_text(legacy_source)
+    broken = tmp_path / "p05" / "pyproject.toml"
+    broken.write_text("[tool.poetry\n")
+    monkeypatch.chdir(tmp_path)
+    app = Application()
+    app.add(MigrateCommand())
+    tester = ApplicationTester(app)
+
+    status = tester.execute("migrate --recursive --io-concurrency 0")
+
+    assert status == 1
+    assert (
+        "--io-concurrency must be a positive number of files, got 0"
+        in tester.io.fetch_error()
+    )
+
+    status = tester.execute(
+        "migrate --recursive --io-concurrency 4 --journal journal.jsonl "
+        "--trace trace.json"
+    )
+
+    assert status == 1
+    output = tester.io.fetch_output()
+    # Results are reported in discovery order although reads run ahead.
+    assert [
+        line.split()[1] for line in output.splitlines() if line.startswith("Migrated")
+    ] == [path.relative_to(tmp_path).as_posix() for path in projects if path != broken]
+    assert "Failed p05/pyproject.toml" in tester.io.fetch_error()
+    assert all("[project]" in path.read_text() for path in projects if path != broken)
+    assert len((tmp_path / "journal.jsonl").read_text().splitlines()) == 12
+    (archive,) = tmp_path.glob("pyproject-backup-*.tar.gz")
+    status = tester.execute(f"migrate --rollback {archive}")
+    assert status == 0
+    assert all(path.read_text() == legacy_source for path in projects if path != broken)
+    events = json.loads((tmp_path / "trace.json").read_text())["traceEvents"]
+    io_spans = [event for event in events if event.get("cat") == "io"]
+    assert sorted(event["name"] for event in io_spans) == ["read"] * 23 + ["write"] * 11
+
+
+def test_io_stage_is_closed_when_the_commit_fails(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    import threading
+
+    from poetry_plugin_migrate.writer import BatchWriter
+
+    project = tmp_path / "legacy" / "pyproject.toml"
+    project.parent.mkdir()
+    project.write_text(
+        '[tool.poetry]\nname = "dummy-legacy"\nversion = "1.0.0"\n'
+        'description = ""\nauthors = []\n'
+    )
+
+    def failing_commit(_writer: BatchWriter) -> None:
+        raise OSError("disk full")
+
+    monkeypatch.setattr(BatchWriter, "commit", failing_commit)
+    monkeypatch.chdir(tmp_path)
+    app = Application()
+    app.add(MigrateCommand())
+    tester = ApplicationTester(app)
+
+    status = tester.execute("migrate --recursive --io-concurrency 2")
+
+    assert status == 1
+    assert "disk full" in tester.io.fetch_error()
+    assert not [
+        thread
+        for thread in threading.enumerate()
+        if thread.name.startswith("poetry-migrate-io")
+    ]
+
+
+def test_trace_is_written_and_stopped_when_the_run_raises(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    from poetry_plugin_migrate import profiling
+
+    def failing_run(_command: MigrateCommand) -> int:
+        with profiling.trace_span("discovery"):
+            pass
+        raise OSError("stale file handle")
+
+    monkeypatch.setattr(MigrateCommand, "_handle_recursive", failing_run)
+    monkeypatch.chdir(tmp_path)
+    app = Application()
+    app.add(MigrateCommand())
+    tester = ApplicationTester(app)
+
+    status = tester.execute("migrate --recursive --trace trace.json")
+
+    assert status == 1
+    assert "stale file handle" in tester.io.fetch_error()
+    events = json.loads((tmp_path / "trace.json").read_text())["traceEvents"]
+    assert [event["name"] for event in events if event["ph"] == "X"] == ["discovery"]
+    assert profiling._trace_events is None
+
+
+def test_memory_profile_reports_phases_and_allocation_sites(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    project = tmp_path / "legacy" / "pyproject.toml"
+    project.parent.mkdir()
+    project.write_text(
+        """\
+[tool.poetry]
+name = "dummy-legacy"
+version = "1.0.0"
+description = ""
+authors = []
+
+[tool.poetry.dependencies]
+python = ">=3.10"
+dummy-runtime = "^2.0"
+"""
+    )
+    monkeypatch.chdir(tmp_path)
+    app = Application()
+    app.add(MigrateCommand())
+    tester = ApplicationTester(app)
+
+    status = tester.execute("migrate --recursive --dry-run --memory-profile")
+
+    assert status == 0
+    output = tester.io.fetch_output()
+    assert "Memory" in output
+    assert re.search(r"copy: 1 call\(s\), peak \d+(\.\d)? [KMG]?i?B", output)
+    assert "Largest allocation sites after migrating a file" in output
+
+
+def test_recursive_timeout_stops_projects_without_writing_them(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    legacy_source = """\
+[tool.poetry]
+name = "dummy-legacy"
+version = "1.0.0"
+description = ""
+authors = []
+"""
+    project = tmp_path / "legacy" / "pyproject.toml"
+    project.parent.mkdir()
+    project.write_text(legacy_source)
+    monkeypatch.chdir(tmp_path)
+    app = Application()
+    app.add(MigrateCommand())
+    tester = ApplicationTester(app)
+
+    status = tester.execute("migrate --recursive --timeout 0.001 --report report.json")
+
+    assert status == 1
+    assert "Stopped legacy/pyproject.toml" in tester.io.fetch_error()
+    assert "Replaced 1 worker process(es)" in tester.io.fetch_output()
+    assert project.read_text() == legacy_source
+    report = json.loads((tmp_path / "report.json").read_text())
+    assert report["summary"]["timeout"] == 1
+
+    status = tester.execute("migrate --recursive --timeout 0")
+
+    assert status == 1
+    assert "--timeout must be a positive number" in tester.io.fetch_error()
+
+    status = tester.execute("migrate --recursive --timeout 60 --trace trace.json")
+
+    assert status == 1
+    assert "--timeout cannot be combined with --trace." in tester.io.fetch_error()
+    assert not (tmp_path / "trace.json").exists()
+
+    status = tester.execute(
+        "migrate --recursive --timeout 60 --memory-limit 1024 --profile "
+        "--memory-profile"
+    )
+
+    assert status == 1
+    assert (
+        "--timeout, --memory-limit cannot be combined with --profile, "
+        "--memory-profile." in tester.io.fetch_error()
+    )
+
+
+def test_slow_projects_are_profiled_beside_the_report(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    import pstats
+
+    project = tmp_path / "packages" / "legacy" / "pyproject.toml"
+    project.parent.mkdir(parents=True)
+    project.write_text(
+        """\
+[tool.poetry]
+name = "dummy-legacy"
+version = "1.0.0"
+description = ""
+authors = []
+"""
+    )
+    (tmp_path / "reports").mkdir()
+    monkeypatch.chdir(tmp_path)
+    app = Application()
+    app.add(MigrateCommand())
+    tester = ApplicationTester(app)
+
+    status = tester.execute(
+        "migrate --recursive --dry-run --profile-slow 0 --report reports/report.json"
+    )
+
+    assert status == 0
+    dump = tmp_path / "reports" / "profile-packages%2Flegacy%2Fpyproject.toml.pstats"
+    assert f"saved profile {dump.relative_to(tmp_path)}" in tester.io.fetch_output()
+    functions = pstats.Stats(str(dump)).stats  # type: ignore[attr-defined]
+    assert any(name == "run" and "migrator" in file for file, _, name in functions)
+    report = json.loads((tmp_path / "reports" / "report.json").read_text())
+    assert report["projects"][0]["migration_ms"] > 0
+
+    dump.unlink()
+    status = tester.execute(
+        "migrate --recursive --dry-run --profile-slow 0 --timeout 60 "
+        "--report reports/report.json"
+    )
+
+    assert status == 0
+    assert f"saved profile {dump.relative_to(tmp_path)}" in tester.io.fetch_output()
+    functions = pstats.Stats(str(dump)).stats  # type: ignore[attr-defined]
+    assert any(name == "run" and "migrator" in file for file, _, name in functions)
+
+
+@pytest.mark.skipif(shutil.which("git") is None, reason="requires git")
+def test_git_refs_are_migrated_from_the_object_store(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    import subprocess
+
+    legacy_source = """\
+[tool.poetry]
+name = "dummy-legacy"
+version = "1.0.0"
+description = ""
+authors = []
+"""
+
+    def git(*args: str) -> None:
+        subprocess.run(
+            [
+                "git",
+                "-c",
+                "user.name=Dummy",
+                "-c",
+                "user.email=dummy@example.com",
+                *args,
+            ],
+            cwd=tmp_path,
+            check=True,
+            capture_output=True,
+        )
+
+    for name in ("legacy", "copy"):
+        path = tmp_path / name / "pyproject.toml"
+        path.parent.mkdir()
+        path.write_text(legacy_source)
+    git("init", "--quiet")
+    git("add", "--all")
+    git("commit", "--quiet", "--message", "legacy")
+    git("tag", "v1")
+    (tmp_path / "legacy" / "pyproject.toml").write_text("[tool.poetry\n")
+    git("commit", "--quiet", "--all", "--message", "broken")
+    monkeypatch.chdir(tmp_path)
+    app = Application()
+    app.add(MigrateCommand())
+    tester = ApplicationTester(app)
+
+    status = tester.execute(
+        "migrate --git-ref v1 --git-ref HEAD --report report.json --diff migrate.diff"
+    )
+
+    assert status == 1
+    output = tester.io.fetch_output()
+    assert "Migrated v1:copy/pyproject.toml" in output
+    assert "Migrated HEAD:copy/pyproject.toml" in output
+    assert "Failed HEAD:legacy/pyproject.toml" in tester.io.fetch_error()
+    assert "Read 2 distinct file(s); no files were written." in output
+    assert (tmp_path / "copy" / "pyproject.toml").read_text() == legacy_source
+    report = json.loads((tmp_path / "report.json").read_text())
+    assert [project["path"] for project in report["projects"]] == [
+        "v1:copy/pyproject.toml",
+        "v1:legacy/pyproject.toml",
+        "HEAD:copy/pyproject.toml",
+        "HEAD:legacy/pyproject.toml",
+    ]
+    assert report["summary"]["migrated"] == 3
+    diff = (tmp_path / "migrate.diff").read_text()
+    assert diff.count("+[project]") == 3
+    assert "--- a/v1:legacy/pyproject.toml\n+++ b/v1:legacy/pyproject.toml\n" in diff
+
+    status = tester.execute("migrate --git-ref v1 --recursive")
+
+    assert status == 1
+    assert "--git-ref cannot be combined with --recursive" in tester.io.fetch_error()
+
+    status = tester.execute("migrate --git-ref missing")
+
+    assert status == 1
+    assert "Cannot list git ref 'missing'" in tester.io.fetch_error()
+
+
+def test_requirement_cache_is_shared_by_workers_and_later_runs(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    import sqlite3
+    from contextlib import closing
+
+    project = tmp_path / "legacy" / "pyproject.toml"
+    project.parent.mkdir()
+    project.write_text(
+        """\
+[tool.poetry]
+name = "dummy-legacy"
+version = "1.0.0"
+description = ""
+authors = []
+
+[tool.poetry.dependencies]
+python = ">=3.10"
+dummy-runtime = { version = "^2.0", extras = ["speed"] }
+"""
+    )
+    monkeypatch.chdir(tmp_path)
+    app = Application()
+    app.add(MigrateCommand())
+    tester = ApplicationTester(app)
+
+    status = tester.execute(
+        "migrate --recursive --dry-run --timeout 60 --requirement-cache cache.sqlite"
+    )
+
+    assert status == 0
+    with closing(sqlite3.connect(tmp_path / "cache.sqlite")) as connection:
+        rows = connection.execute(
+            "SELECT requirement FROM requirements WHERE key NOT LIKE 'section:%'"
+        ).fetchall()
+        sections = connection.execute(
+            "SELECT COUNT(*) FROM requirements WHERE key LIKE 'section:%'"
+        ).fetchone()
+    assert rows == [("dummy-runtime[speed]>=2.0,<3.0",)]
+    # The safety check and the converted [project.dependencies] array.
+    assert sections == (2,)
+
+    status = tester.execute(
+        "migrate --recursive --dry-run --profile --requirement-cache cache.sqlite"
+    )
+
+    assert status == 0
+    # Both sections are reused, so no requirement is looked up again.
+    assert "persistent requirement cache: 2 hit(s), 0 miss(es)" in (
+        tester.io.fetch_output()
+    )
+
+
+def test_what_if_reports_each_answer_without_writing(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    legacy_source = """\
+[tool.poetry]
+name = "dummy-legacy"
+version = "1.0.0"
+description = ""
+authors = []
+
+[tool.poetry.dependencies]
+python = ">=3.10"
+"""
+    project = tmp_path / "legacy" / "pyproject.toml"
+    project.parent.mkdir()
+    project.write_text(legacy_source)
+    monkeypatch.chdir(tmp_path)
+    app = Application()
+    app.add(MigrateCommand())
+    tester = ApplicationTester(app)
+
+    status = tester.execute("migrate --recursive --what-if --report report.json")
+
+    assert status == 0
+    output = tester.io.fetch_output()
+    assert "Migrated legacy/pyproject.toml" in output
+    assert "How to migrate [tool.poetry.dependencies.python]?" in output
+    assert "* Copy value to [project.requires-python]: migrated" in output
+    assert "no files were written" in output
+    assert project.read_text() == legacy_source
+    assert not list(tmp_path.glob("pyproject-backup-*"))
+    report = json.loads((tmp_path / "report.json").read_text())
+    (project_report,) = report["projects"]
+    assert project_report["path"] == "legacy/pyproject.toml"
+    python_prompt = next(
+        prompt
+        for prompt in project_report["prompts"]
+        if prompt["question"] == "How to migrate [tool.poetry.dependencies.python]?"
+    )
+    assert [answer["default"] for answer in python_prompt["answers"]] == [
+        False,
+        False,
+        True,
+        False,
+    ]
+    assert all(answer["status"] == "migrated" for answer in python_prompt["answers"])
+
+    status = tester.execute("migrate --recursive --what-if --journal journal.jsonl")
+
+    assert status == 1
+    assert "--what-if cannot be combined with --journal" in tester.io.fetch_error()
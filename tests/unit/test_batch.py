@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from poetry_plugin_migrate.batch import (
+    decode_source,
+    in_shard,
+    parse_shard,
+    profile_dump_name,
+)
+
+
+def test_parse_shard_accepts_one_based_index() -> None:
+    assert parse_shard("1/4") == (1, 4)
+    assert parse_shard("4/4") == (4, 4)
+
+
+@pytest.mark.parametrize("value", ["0/4", "5/4", "1", "a/b", "-1/2", "1/0"])
+def test_parse_shard_rejects_invalid_values(value: str) -> None:
+    with pytest.raises(ValueError, match="Invalid shard"):
+        parse_shard(value)
+
+
+def test_shards_partition_projects_independent_of_root() -> None:
+    relative_paths = [f"packages/p{index}/pyproject.toml" for index in range(200)]
+
+    def assignment(root: Path) -> list[int]:
+        return [
+            next(
+                index
+                for index in range(1, 5)
+                if in_shard(root / relative_path, root, (index, 4))
+            )
+            for relative_path in relative_paths
+        ]
+
+    shards = assignment(Path("/node-a/checkout"))
+
+    assert shards == assignment(Path("/node-b/elsewhere"))
+    assert all(
+        sum(in_shard(Path("/r", path), Path("/r"), (index, 4)) for index in range(1, 5))
+        == 1
+        for path in relative_paths
+    )
+    assert set(shards) == {1, 2, 3, 4}
+
+
+def test_profile_dump_names_are_unique_per_project_path() -> None:
+    root = Path("/checkout")
+
+    assert (
+        profile_dump_name(root / "a" / "b" / "pyproject.toml", root)
+        == "profile-a%2Fb%2Fpyproject.toml.pstats"
+    )
+    assert profile_dump_name(root / "pyproject.toml", root) == (
+        "profile-pyproject.toml.pstats"
+    )
+    assert profile_dump_name(
+        root / "a__b" / "pyproject.toml", root
+    ) != profile_dump_name(root / "a" / "b" / "pyproject.toml", root)
+    assert profile_dump_name(
+        root / "a%2Fb" / "pyproject.toml", root
+    ) != profile_dump_name(root / "a" / "b" / "pyproject.toml", root)
+
+
+def test_decode_source_matches_reading_text(tmp_path: Path) -> None:
+    path = tmp_path / "pyproject.toml"
+    path.write_bytes(b'[project]\r\nname = "d\xc3\xbcmmy"\r\n')
+
+    assert decode_source(path.read_bytes()) == path.read_text(encoding="utf-8")
@@ -0,0 +1,271 @@
+"""Guard the growth rate of the TOML helpers and dependency migrators.
+
+Each operation runs at several input sizes. Instead of timing it, the test
+counts the Python and builtin function calls it makes, which is deterministic
+on any machine and under any load. The exponent of the count is fitted on a
+log-log scale and must stay within the operation's declared complexity class,
+so a new quadratic path in a linear helper fails here. Loops that make no
+calls per iteration are invisible to the count; every helper guarded here
+does per-item work through calls.
+"""
+
+from __future__ import annotations
+
+import math
+import sys
+from collections import Counter
+from functools import lru_cache
+from typing import TYPE_CHECKING
+
+import pytest
+from tomlkit import TOMLDocument, array, parse, string, table
+from tomlkit.items import Item
+
+from poetry_plugin_migrate.dependencies import (
+    DependencyGroupMigrator,
+    DependencyMigrator,
+)
+from poetry_plugin_migrate.migrator import Migrator
+from poetry_plugin_migrate.toml import (
+    append_array_value,
+    comment_counts,
+    extend_array_preserving_comments,
+    plain_get,
+    plain_snapshot,
+    reorder_standard_tables,
+    require_plain_table,
+    require_table,
+    restore_missing_comments,
+)
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Sequence
+    from types import FrameType
+
+    Operation = Callable[[], object]
+
+
+class StubCommand:
+    def line(self, _message: str = "") -> None:
+        pass
+
+    def confirm(self, _question: str, default: bool = False) -> bool:
+        return default
+
+    def choice(
+        self,
+        _question: str,
+        choices: list[str],
+        default: int,
+        _attempts: int | None = None,
+        _multiple: bool = False,
+    ) -> str:
+        return choices[default]
+
+
+# Upper bounds of the fitted exponent. The margin absorbs lower-order terms
+# without admitting the next class.
+LINEAR = 1.3
+QUADRATIC = 2.2
+
+
+def growth_exponent(sizes: Sequence[int], costs: Sequence[float]) -> float:
+    """Return the least-squares slope of ``log(cost)`` over ``log(size)``."""
+    xs = [math.log(size) for size in sizes]
+    ys = [math.log(cost) for cost in costs]
+    mean_x = sum(xs) / len(xs)
+    mean_y = sum(ys) / len(ys)
+    return sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys, strict=True)) / sum(
+        (x - mean_x) ** 2 for x in xs
+    )
+
+
+def count_calls(prepare: Callable[[int], Operation], size: int) -> int:
+    """Return the number of function calls of a run on freshly prepared input.
+
+    A first run fills the engine's caches for this input, so every size is
+    counted with warm caches regardless of the order the tests run in.
+    """
+    prepare(size)()
+    operation = prepare(size)
+    calls = 0
+
+    def profile(_frame: FrameType, event: str, _arg: object) -> None:
+        nonlocal calls
+        if event in {"call", "c_call"}:
+            calls += 1
+
+    previous = sys.getprofile()
+    sys.setprofile(profile)
+    try:
+        operation()
+    finally:
+        sys.setprofile(previous)
+    return calls
+
+
+# Operations that do not modify their input share one parsed document per size.
+
+
+@lru_cache
+def commented_document(size: int) -> TOMLDocument:
+    return parse(
+        "".join(f"# c{i}\n[t{i}]\na = [1, # x{i}\n  2]\n" for i in range(size))
+    )
+
+
+@lru_cache
+def interleaved_document(size: int) -> TOMLDocument:
+    return parse(
+        "".join(f"[t{i}]\na = 1\n\n[tool.x{i}]\nb = 2\n\n" for i in range(size))
+        + '[project]\nname = "a"\n'
+    )
+
+
+def prepare_comment_counts(size: int) -> Operation:
+    document = commented_document(size)
+    return lambda: comment_counts(document)
+
+
+def prepare_restore_missing_comments(size: int) -> Operation:
+    document = parse("[t]\na = 1\n")
+    expected = Counter({f"# lost {i}": 1 for i in range(size)})
+    return lambda: restore_missing_comments(document, expected)
+
+
+def prepare_reorder_standard_tables(size: int) -> Operation:
+    document = interleaved_document(size)
+    return lambda: reorder_standard_tables(document)
+
+
+def prepare_extend_array(size: int) -> Operation:
+    source = parse(
+        "a = [\n" + "".join(f'  "v{i}",  # c{i}\n' for i in range(size)) + "]\n"
+    )["a"]
+    replacements: list[Item] = [string(f"r{i}") for i in range(size)]
+    return lambda: extend_array_preserving_comments(array(), source, replacements)
+
+
+def prepare_plain_snapshot(size: int) -> Operation:
+    document = commented_document(size)
+    return lambda: plain_snapshot(document)
+
+
+def prepare_append_array_values(size: int) -> Operation:
+    source = parse('a = "x"  # kept\n')["a"]
+    values = [string(f"r{i}") for i in range(size)]
+
+    def append_all() -> None:
+        target = array()
+        for value in values:
+            append_array_value(target, value, source)
+
+    return append_all
+
+
+def prepare_dependency_migrator(size: int) -> Operation:
+    document = parse(
+        '[tool.poetry]\nname = "a"\nversion = "1"\n\n'
+        '[tool.poetry.dependencies]\npython = "^3.10"\n'
+        + "".join(f'pkg{i} = "^1.{i}"  # c{i}\n' for i in range(size))
+    )
+    migrator = Migrator(StubCommand(), skip=True, literal=False)
+    migrator.legacy = require_plain_table(
+        plain_get(plain_snapshot(document), "tool", "poetry"), "tool.poetry"
+    )
+    project = table()
+    document["project"] = project
+    tool_poetry = require_table(document["tool"]["poetry"], "tool.poetry")
+    return DependencyMigrator(migrator, tool_poetry, project).run
+
+
+def prepare_dependency_groups(size: int) -> Operation:
+    document = parse(
+        '[tool.poetry]\nname = "a"\nversion = "1"\n\n'
+        + "".join(
+            f'[tool.poetry.group.g{i}.dependencies]\npkg{i} = "^1.0"\n\n'
+            for i in range(size)
+        )
+    )
+    migrator = Migrator(StubCommand(), skip=True, literal=False)
+    migrator.legacy = require_plain_table(
+        plain_get(plain_snapshot(document), "tool", "poetry"), "tool.poetry"
+    )
+    tool_poetry = require_table(document["tool"]["poetry"], "tool.poetry")
+    return DependencyGroupMigrator(migrator, document, tool_poetry).run
+
+
+def prepare_dependency_group_members(size: int) -> Operation:
+    document = parse(
+        '[tool.poetry]\nname = "a"\nversion = "1"\n\n'
+        "[tool.poetry.group.dev.dependencies]\n"
+        + "".join(f'pkg{i} = "^1.0"\n' for i in range(size))
+    )
+    migrator = Migrator(StubCommand(), skip=True, literal=False)
+    migrator.legacy = require_plain_table(
+        plain_get(plain_snapshot(document), "tool", "poetry"), "tool.poetry"
+    )
+    tool_poetry = require_table(document["tool"]["poetry"], "tool.poetry")
+    return DependencyGroupMigrator(migrator, document, tool_poetry).run
+
+
+def prepare_migrate_persons(size: int) -> Operation:
+    people = ", ".join(f'"Person {i} <p{i}@example.com>"' for i in range(size))
+    document = parse(
+        f"[tool.poetry]\nauthors = [{people}]\nmaintainers = [{people}]\n\n[project]\n"
+    )
+    migrator = Migrator(StubCommand(), skip=True, literal=False)
+    tool_poetry = require_table(document["tool"]["poetry"], "tool.poetry")
+    project = require_table(document["project"], "project")
+    return lambda: migrator._migrate_persons(tool_poetry, project)
+
+
+LINEAR_SIZES = [100, 200, 400, 800]
+SMALL_SIZES = [25, 50, 100, 200]
+MIGRATOR_SIZES = [50, 100, 200, 400]
+# Rendering a dependency costs more calls than reindexing a short array, so
+# the quadratic term only shows once an array holds several hundred values.
+DEPENDENCY_SIZES = [200, 400, 800, 1600]
+
+
+@pytest.mark.parametrize(
+    ("prepare", "sizes", "bound"),
+    [
+        (prepare_comment_counts, LINEAR_SIZES, LINEAR),
+        (prepare_restore_missing_comments, LINEAR_SIZES, LINEAR),
+        (prepare_reorder_standard_tables, SMALL_SIZES, LINEAR),
+        (prepare_extend_array, LINEAR_SIZES, LINEAR),
+        (prepare_plain_snapshot, LINEAR_SIZES, LINEAR),
+        # tomlkit's Array.add_line reindexes the complete array for every
+        # appended value.
+        (prepare_append_array_values, MIGRATOR_SIZES, QUADRATIC),
+        # The migrators append each rendered dependency the same way.
+        (prepare_dependency_migrator, DEPENDENCY_SIZES, QUADRATIC),
+        (prepare_dependency_group_members, DEPENDENCY_SIZES, QUADRATIC),
+        # Duplicate detection for moved people uses a hashed index.
+        (prepare_migrate_persons, MIGRATOR_SIZES, LINEAR),
+        # tomlkit's Container.append scans the table body for every new group.
+        (prepare_dependency_groups, SMALL_SIZES, QUADRATIC),
+    ],
+    ids=lambda value: getattr(value, "__name__", "").removeprefix("prepare_") or None,
+)
+def test_operation_stays_within_its_complexity_class(
+    prepare: Callable[[int], Operation], sizes: list[int], bound: float
+) -> None:
+    calls = [count_calls(prepare, size) for size in sizes]
+
+    exponent = growth_exponent(sizes, calls)
+
+    assert exponent <= bound, (
+        f"function calls grow as n^{exponent:.2f} over sizes {sizes}: "
+        + ", ".join(str(count) for count in calls)
+    )
+
+
+@pytest.mark.parametrize("exponent", [1.0, 2.0, 3.0])
+def test_growth_exponent_recovers_power_laws(exponent: float) -> None:
+    sizes = [10, 20, 40, 80]
+
+    fitted = growth_exponent(sizes, [0.003 * size**exponent for size in sizes])
+
+    assert fitted == pytest.approx(exponent)
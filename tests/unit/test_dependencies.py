@@ -656,6 +656,30 @@ dummy = [
     ]
 
 
+def test_multi_constraints_declared_as_an_array_of_tables_migrate() -> None:
+    result, _ = migrate(
+        """\
+[tool.poetry.dependencies]
+python = ">=3.10"
+
+[[tool.poetry.dependencies.dummy]]
+version = "^1"
+python = "<3.12"
+
+[[tool.poetry.dependencies.dummy]]
+version = "^2"
+python = ">=3.12"
+"""
+    )
+
+    project = require_table(result["project"], "project")
+    dependencies = require_array(project["dependencies"], "project.dependencies")
+    assert [str(value) for value in dependencies] == [
+        'dummy>=1,<2 ; python_version < "3.12"',
+        'dummy>=2,<3 ; python_version >= "3.12"',
+    ]
+
+
 def test_multi_constraint_comments_stay_with_their_generated_requirements() -> None:
     result, migrator = migrate(
         """\
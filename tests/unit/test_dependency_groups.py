@@ -213,6 +213,26 @@ dummy = [
     assert not any("Restored" in warning for warning in migrator.warnings)
 
 
+def test_group_multi_constraints_declared_as_an_array_of_tables_migrate() -> None:
+    result, _ = migrate(
+        """\
+[[tool.poetry.group.qa.dependencies.dummy]]
+version = "^1"
+platform = "win32"
+
+[[tool.poetry.group.qa.dependencies.dummy]]
+version = "^2"
+platform = "linux"
+"""
+    )
+
+    groups = require_table(result["dependency-groups"], "dependency-groups")
+    assert [str(value) for value in require_array(groups["qa"], "qa")] == [
+        'dummy>=1,<2 ; sys_platform == "win32"',
+        'dummy>=2,<3 ; sys_platform == "linux"',
+    ]
+
+
 def test_include_group_comments_stay_with_generated_include_objects() -> None:
     result, migrator = migrate(
         """\
@@ -0,0 +1,279 @@
+"""Compare optimized migrations with a reference configuration.
+
+The reference configuration disables every optimization of the migration
+engine: the version fast path of the requirement renderer, the no-op short
+circuit, the license canonicalization memo and template replay. Both
+configurations migrate the same fixture-based and generated corpus serially,
+and every project must produce byte-identical output, warnings and errors.
+
+Run ``python -m tests.unit.test_differential`` to also compare their speed.
+"""
+
+from __future__ import annotations
+
+import random
+import shutil
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import pytest
+
+from poetry_plugin_migrate import migrator as migrator_module
+from poetry_plugin_migrate import requirements
+from poetry_plugin_migrate.batch import ProjectResult, migrate_project
+from poetry_plugin_migrate.migrator import Migrator
+from poetry_plugin_migrate.templates import TemplateCache
+from tests.conftest import FIXTURES_DIR, PYPROJECT_TEMPLATE_SUFFIX, from_template
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+
+class StubCommand:
+    def line(self, _message: str = "") -> None:
+        pass
+
+    def confirm(self, _question: str, default: bool = False) -> bool:
+        return default
+
+    def choice(
+        self,
+        _question: str,
+        choices: list[str],
+        default: int,
+        _attempts: int | None = None,
+        _multiple: bool = False,
+    ) -> str:
+        return choices[default]
+
+
+LICENSES = ["MIT", "mit", "Apache-2.0 OR MIT", "GPL-3.0-or-later", "Proprietary"]
+CONSTRAINTS = [
+    '"^1.2"',
+    '"~2.0.1"',
+    '"3.*"',
+    '">=1.0,<2.0"',
+    '"==1.4.2"',
+    '"*"',
+    '">=1.0a1"',
+    '{ version = "^0.5", extras = ["speed"] }',
+    '{ version = "^1.0", python = "<3.12" }',
+    '{ version = "^2.0", markers = "sys_platform == \'linux\'" }',
+    '{ version = "^1.0", optional = true }',
+    '{ git = "https://example.com/dummy.git", tag = "v1.0" }',
+    '{ url = "https://example.com/dummy-1.0.tar.gz" }',
+    '{ version = "^1.0", source = "private" }',
+    '[{ version = "^1.0", python = "<3.11" }, { version = "^2.0", python = ">=3.11" }]',
+]
+
+
+def generated_source(generator: random.Random, index: int) -> str:
+    """Return a legacy project exercising a random mix of migration paths."""
+    lines = ["[tool.poetry]"]
+    if generator.random() < 0.95:
+        lines.append(f'name = "dummy-{index}"')
+    if generator.random() < 0.9:
+        lines.append(f'version = "{generator.randint(0, 3)}.{index}.0"')
+    lines.append(f'description = "Generated project {index}"')
+    if generator.random() < 0.3:
+        lines.append("package-mode = false")
+    if generator.random() < 0.8:
+        lines.append(f'license = "{generator.choice(LICENSES)}"')
+    if generator.random() < 0.7:
+        lines.append('authors = ["Dummy Author <dummy@example.com>", "Nobody"]')
+    if generator.random() < 0.3:
+        lines.append('keywords = ["dummy", "generated"]')
+    if generator.random() < 0.3:
+        lines.append('classifiers = ["Topic :: Software Development"]')
+    if generator.random() < 0.3:
+        lines.append('homepage = "https://example.com/"')
+
+    optional = []
+    lines += ["", "[tool.poetry.dependencies]", 'python = "^3.10"']
+    for number in range(generator.randint(0, 6)):
+        constraint = generator.choice(CONSTRAINTS)
+        lines.append(f"dummy-dep-{number} = {constraint}")
+        if "optional" in constraint:
+            optional.append(f'"dummy-dep-{number}"')
+    if optional and generator.random() < 0.8:
+        lines += ["", "[tool.poetry.extras]", f"extra = [{', '.join(optional)}]"]
+
+    if generator.random() < 0.5:
+        lines += ["", "[tool.poetry.group.dev.dependencies]"]
+        lines += [
+            f"dummy-dev-{number} = {generator.choice(CONSTRAINTS[:7])}"
+            for number in range(generator.randint(1, 3))
+        ]
+    if generator.random() < 0.2:
+        lines += ["", "[tool.poetry.dev-dependencies]", 'dummy-legacy-dev = "^1.0"']
+    if generator.random() < 0.2:
+        lines += ["", "[project]", f'name = "dummy-{index + 1}"']
+    if generator.random() < 0.7:
+        lines += [
+            "",
+            "[build-system]",
+            'requires = ["poetry-core>=1.0.0"]',
+            'build-backend = "poetry.core.masonry.api"',
+        ]
+    if generator.random() < 0.3:
+        lines += ["", "# trailing comment", "[tool.ruff]", "line-length = 88"]
+    return "\n".join(lines) + "\n"
+
+
+def write_corpus(root: Path, *, generated: int = 120, seed: int = 0) -> list[Path]:
+    """Write the fixture projects and generated projects below ``root``."""
+    paths = []
+    for fixture in sorted(FIXTURES_DIR.iterdir()):
+        target = root / fixture.name
+        shutil.copytree(fixture, target)
+        for template in target.glob(f"*{PYPROJECT_TEMPLATE_SUFFIX}"):
+            if ".expected" in template.name:
+                continue
+            (target / "pyproject.toml").write_text(from_template(template.read_text()))
+        if (target / "pyproject.toml").exists():
+            paths.append(target / "pyproject.toml")
+
+    generator = random.Random(seed)
+    for index in range(generated):
+        path = root / "generated" / f"project-{index}" / "pyproject.toml"
+        path.parent.mkdir(parents=True)
+        # Runs of projects share a template with different values, so
+        # template replay takes part.
+        base = index - index % 6 + 2
+        if index > base:
+            source = generated_source(random.Random(base), base).replace(
+                f"-{base}", f"-{index}"
+            )
+        else:
+            source = generated_source(generator, index)
+        path.write_text(source)
+        paths.append(path)
+    return paths
+
+
+@contextmanager
+def reference_configuration() -> Iterator[None]:
+    """Disable the engine's optimizations.
+
+    poetry-core's compiled schema validators stay cached: they do not affect
+    output and compiling them for every project dominates the run.
+    """
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setattr(
+            requirements, "render_version_requirement", lambda *_, **__: None
+        )
+        monkeypatch.setattr(Migrator, "_needs_migration", lambda *_: True)
+        monkeypatch.setattr(
+            migrator_module,
+            "canonical_license_expression",
+            migrator_module.canonical_license_expression.__wrapped__,
+        )
+        yield
+
+
+def migrate_corpus(
+    paths: list[Path],
+    *,
+    reference: bool,
+    literal: bool = True,
+    templates: TemplateCache | None = None,
+) -> tuple[list[ProjectResult], float]:
+    """Migrate ``paths`` in one configuration and return the elapsed time."""
+    command = StubCommand()
+    start = time.perf_counter()
+    if reference:
+        with reference_configuration():
+            results = [
+                migrate_project(path, command, literal=literal) for path in paths
+            ]
+    else:
+        templates = templates or TemplateCache()
+        results = [
+            migrate_project(path, command, literal=literal, templates=templates)
+            for path in paths
+        ]
+    return results, time.perf_counter() - start
+
+
+def outcome(result: ProjectResult) -> tuple[object, ...]:
+    return (
+        result.status,
+        result.migrated,
+        result.warnings,
+        result.errors,
+    )
+
+
+@pytest.mark.parametrize("literal", [True, False])
+def test_optimized_migration_matches_reference(tmp_path: Path, literal: bool) -> None:
+    paths = write_corpus(tmp_path)
+
+    templates = TemplateCache()
+
+    expected, _ = migrate_corpus(paths, reference=True, literal=literal)
+    actual, _ = migrate_corpus(
+        paths, reference=False, literal=literal, templates=templates
+    )
+
+    for path, reference_result, optimized_result in zip(
+        paths, expected, actual, strict=True
+    ):
+        assert outcome(optimized_result) == outcome(reference_result), path
+    statuses = {result.status for result in expected}
+    assert {"migrated", "unchanged", "failed"} <= statuses
+    assert templates.hits > 0
+
+
+def test_reused_sections_match_reference(tmp_path: Path) -> None:
+    from poetry_plugin_migrate.requirement_cache import (
+        close_requirement_cache,
+        open_requirement_cache,
+    )
+
+    paths = write_corpus(tmp_path)
+    expected, _ = migrate_corpus(paths, reference=True)
+
+    cache = open_requirement_cache(tmp_path / "cache.sqlite")
+    try:
+        cold, _ = migrate_corpus(paths, reference=False)
+        close_requirement_cache()
+        cache = open_requirement_cache(tmp_path / "cache.sqlite")
+        warm, _ = migrate_corpus(paths, reference=False)
+    finally:
+        close_requirement_cache()
+
+    for path, reference_result, cold_result, warm_result in zip(
+        paths, expected, cold, warm, strict=True
+    ):
+        assert outcome(cold_result) == outcome(reference_result), path
+        assert outcome(warm_result) == outcome(reference_result), path
+    assert cache.misses == 0
+
+
+def test_reference_configuration_disables_the_optimizations() -> None:
+    with reference_configuration():
+        assert (
+            requirements.render_version_requirement(
+                "dummy", "^1.0", keep_version_brackets=False
+            )
+            is None
+        )
+        assert not hasattr(migrator_module.canonical_license_expression, "cache_info")
+
+    assert hasattr(migrator_module.canonical_license_expression, "cache_info")
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as directory:
+        corpus = write_corpus(Path(directory), generated=400)
+        # Warm up imports and poetry-core's validators before timing.
+        migrate_corpus(corpus[:5], reference=True)
+        _, reference_seconds = migrate_corpus(corpus, reference=True)
+        _, optimized_seconds = migrate_corpus(corpus, reference=False)
+    print(f"{len(corpus)} projects")
+    print(f"reference: {reference_seconds * 1000:.0f} ms")
+    print(f"optimized: {optimized_seconds * 1000:.0f} ms")
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import TYPE_CHECKING
+
+import pytest
+
+from poetry_plugin_migrate.fileio import FileIOStage
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+def test_concurrency_must_be_positive() -> None:
+    with pytest.raises(ValueError, match="at least one file, got 0"):
+        FileIOStage(0)
+
+
+def test_read_ahead_yields_contents_and_errors_in_order(tmp_path: Path) -> None:
+    paths = [tmp_path / f"{index}.toml" for index in range(10)]
+    for index, path in enumerate(paths[:-1]):
+        path.write_text(f"index = {index}\n")
+
+    with FileIOStage(2) as io:
+        contents = list(io.read_ahead(paths))
+
+    assert [path for path, _ in contents] == paths
+    assert [content for _, content in contents[:-1]] == [
+        f"index = {index}\n".encode() for index in range(9)
+    ]
+    assert isinstance(contents[-1][1], FileNotFoundError)
+
+
+def test_operations_overlap_up_to_the_concurrency_limit() -> None:
+    lock = threading.Lock()
+    running = 0
+    peak = 0
+
+    def operation(value: int) -> int:
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        time.sleep(0.02)
+        with lock:
+            running -= 1
+        return value
+
+    def failing() -> int:
+        raise OSError("stale file handle")
+
+    with FileIOStage(3) as io:
+        results = io.run_all(
+            [*(lambda value=value: operation(value) for value in range(9)), failing]
+        )
+
+    assert results[:9] == list(range(9))
+    assert isinstance(results[9], OSError)
+    assert peak == 3
+
+
+def test_stage_can_be_used_after_draining() -> None:
+    with FileIOStage(1) as io:
+        assert io.submit(lambda: 1).result() == 1
+        io.drain()
+        assert io.submit(lambda: 2).result() == 2
+    assert io.run_all([lambda: 3]) == [3]
+    io.close()
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import os
+import shutil
+import subprocess
+from typing import TYPE_CHECKING
+
+import pytest
+
+from poetry_plugin_migrate.gitstore import GitObjectReader, tree_projects
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+pytestmark = pytest.mark.skipif(shutil.which("git") is None, reason="requires git")
+
+
+def git(repository: Path, *args: str) -> str:
+    return subprocess.run(
+        [
+            "git",
+            "-c",
+            "user.name=Dummy",
+            "-c",
+            "user.email=dummy@example.com",
+            *args,
+        ],
+        cwd=repository,
+        capture_output=True,
+        check=True,
+        text=True,
+    ).stdout.strip()
+
+
+def commit_files(repository: Path, files: dict[str, str]) -> None:
+    for name, content in files.items():
+        path = repository / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content)
+    git(repository, "add", "--all")
+    git(repository, "commit", "--quiet", "--message", "dummy")
+
+
+def test_tree_projects_lists_owned_pyproject_blobs(tmp_path: Path) -> None:
+    git(tmp_path, "init", "--quiet")
+    commit_files(
+        tmp_path,
+        {
+            "pyproject.toml": "[tool.poetry]\n",
+            "packages/a/pyproject.toml": "[project]\n",
+            "packages/a/not-pyproject.toml": "",
+            ".github/pyproject.toml": "",
+            "node_modules/b/pyproject.toml": "",
+        },
+    )
+    if os.name != "nt":
+        (tmp_path / "linked").mkdir()
+        (tmp_path / "linked" / "pyproject.toml").symlink_to("../pyproject.toml")
+        git(tmp_path, "add", "--all")
+        git(tmp_path, "commit", "--quiet", "--message", "link")
+    git(tmp_path, "tag", "v1")
+    (tmp_path / "pyproject.toml").write_text("[project]\n")
+
+    projects = tree_projects(tmp_path / "packages", "v1")
+
+    assert projects == [
+        (
+            "packages/a/pyproject.toml",
+            git(tmp_path, "rev-parse", "v1:packages/a/pyproject.toml"),
+        ),
+        ("pyproject.toml", git(tmp_path, "rev-parse", "v1:pyproject.toml")),
+    ]
+
+
+@pytest.mark.parametrize("ref", ["missing", "--output=file", ""])
+def test_tree_projects_rejects_unknown_refs(tmp_path: Path, ref: str) -> None:
+    git(tmp_path, "init", "--quiet")
+    commit_files(tmp_path, {"pyproject.toml": ""})
+
+    with pytest.raises(ValueError, match="git ref"):
+        tree_projects(tmp_path, ref)
+
+
+def test_object_reader_streams_blobs_through_one_process(tmp_path: Path) -> None:
+    git(tmp_path, "init", "--quiet")
+    commit_files(tmp_path, {"a.toml": "a = 1\n", "b.toml": "b = 2"})
+    a = git(tmp_path, "rev-parse", "HEAD:a.toml")
+    b = git(tmp_path, "rev-parse", "HEAD:b.toml")
+
+    with GitObjectReader(tmp_path) as reader:
+        assert reader.read(a) == b"a = 1\n"
+        process = reader._process
+        with pytest.raises(ValueError, match="missing"):
+            reader.read("0" * len(a))
+        with pytest.raises(ValueError, match="not a blob"):
+            reader.read(git(tmp_path, "rev-parse", "HEAD^{tree}"))
+        assert reader.read(b) == b"b = 2"
+        assert reader._process is process
+
+    assert reader._process is None
+    assert process is not None
+    assert process.returncode == 0
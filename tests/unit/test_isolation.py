@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import multiprocessing
+import pstats
+import sys
+from typing import TYPE_CHECKING
+
+import pytest
+
+from poetry_plugin_migrate import isolation
+from poetry_plugin_migrate.isolation import IsolatedMigrator
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+LEGACY_SOURCE = """\
+[tool.poetry]
+name = "dummy-legacy"
+version = "1.0.0"
+description = ""
+authors = []
+
+[tool.poetry.dependencies]
+python = ">=3.10"
+dummy-runtime = "^2.0"
+"""
+
+
+@pytest.fixture
+def project(tmp_path: Path) -> Path:
+    path = tmp_path / "pyproject.toml"
+    path.write_text(LEGACY_SOURCE)
+    return path
+
+
+def test_stalled_project_is_stopped_and_its_worker_replaced(project: Path) -> None:
+    # Spawning a worker and validating with freshly compiled schemas cannot
+    # finish within a millisecond.
+    with IsolatedMigrator(literal=True, timeout=0.001) as migrator:
+        stopped = migrator.migrate(project)
+        migrator.timeout = None
+        migrated = migrator.migrate(project)
+
+    assert stopped.status == "timeout"
+    assert stopped.errors == ["Exceeded the time budget of 0.001 seconds"]
+    assert migrator.recycled == 1
+    assert migrated.status == "migrated"
+    assert migrated.migrated is not None
+    assert "dummy-runtime>=2.0,<3.0" in migrated.migrated
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="requires resource limits")
+def test_project_exceeding_the_memory_budget_is_stopped(project: Path) -> None:
+    with IsolatedMigrator(literal=True, memory_limit=1024 * 1024) as migrator:
+        result = migrator.migrate(project)
+
+    assert result.status == "timeout"
+    assert migrator.recycled == 1
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="requires fork")
+def test_exception_in_the_worker_is_reported_as_a_failure(
+    project: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    def broken_migration(*args: object, **kwargs: object) -> None:
+        raise RuntimeError("broken engine")
+
+    # Forked workers inherit the patched migration.
+    monkeypatch.setattr(isolation, "migrate_project", broken_migration)
+    with IsolatedMigrator(literal=True, timeout=60) as migrator:
+        monkeypatch.setattr(migrator, "_context", multiprocessing.get_context("fork"))
+        first = migrator.migrate(project)
+        second = migrator.migrate(project)
+
+    assert first.status == "failed"
+    assert first.errors == ["RuntimeError: broken engine"]
+    assert second.status == "failed"
+    assert migrator.recycled == 0
+
+
+def test_profile_is_recorded_in_the_worker(project: Path, tmp_path: Path) -> None:
+    dump = tmp_path / "migration.pstats"
+
+    with IsolatedMigrator(literal=True, timeout=0.001) as migrator:
+        stopped = migrator.profile(project, dump)
+        migrator.timeout = None
+        profiled = migrator.profile(project, dump)
+
+    assert stopped is not None
+    assert stopped.status == "timeout"
+    assert profiled is None
+    functions = pstats.Stats(str(dump)).stats  # type: ignore[attr-defined]
+    assert any(name == "run" and "migrator" in file for file, _, name in functions)
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from poetry_plugin_migrate.batch import ProjectResult
+from poetry_plugin_migrate.journal import Journal, read_journal
+
+
+def test_resumed_journal_matches_only_unchanged_contents(tmp_path: Path) -> None:
+    journal_path = tmp_path / "journal.jsonl"
+    result = ProjectResult(tmp_path / "pyproject.toml", "failed", errors=["broken"])
+    with Journal(journal_path) as journal:
+        journal.record("pyproject.toml", b"old", result)
+
+    with Journal(journal_path, resume=True) as journal:
+        entry = journal.lookup("pyproject.toml", b"old")
+        assert journal.lookup("pyproject.toml", b"new") is None
+        assert journal.lookup("other/pyproject.toml", b"old") is None
+
+    assert entry is not None
+    assert (entry.status, entry.errors) == ("failed", ["broken"])
+
+
+def test_migrated_entries_match_their_input_and_written_contents(
+    tmp_path: Path,
+) -> None:
+    journal_path = tmp_path / "journal.jsonl"
+    result = ProjectResult(tmp_path / "pyproject.toml", "migrated", migrated="new\n")
+    with Journal(journal_path) as journal:
+        journal.record("pyproject.toml", b"old", result, written=b"new\r\n")
+
+    with Journal(journal_path, resume=True) as journal:
+        pending = journal.lookup("pyproject.toml", b"old")
+        written = journal.lookup("pyproject.toml", b"new\r\n")
+        assert journal.lookup("pyproject.toml", b"new\n") is None
+
+    assert pending is not None
+    assert pending.migrated == "new\n"
+    assert pending.is_pending(b"old")
+    assert written is not None
+    assert not written.is_pending(b"new\r\n")
+
+
+def test_interrupted_last_line_is_ignored_and_dropped_on_resume(
+    tmp_path: Path,
+) -> None:
+    journal_path = tmp_path / "journal.jsonl"
+    with Journal(journal_path) as journal:
+        journal.record("a/pyproject.toml", b"a", ProjectResult(tmp_path, "unchanged"))
+    with journal_path.open("a") as journal_file:
+        journal_file.write('{"path": "b/pyp')
+
+    with Journal(journal_path, resume=True) as journal:
+        journal.record("b/pyproject.toml", b"b", ProjectResult(tmp_path, "unchanged"))
+
+    assert list(read_journal(journal_path)) == ["a/pyproject.toml", "b/pyproject.toml"]
+
+
+def test_starting_without_resume_discards_the_old_journal(tmp_path: Path) -> None:
+    journal_path = tmp_path / "journal.jsonl"
+    with Journal(journal_path) as journal:
+        journal.record("pyproject.toml", b"a", ProjectResult(tmp_path, "unchanged"))
+
+    with Journal(journal_path) as journal:
+        assert journal.completed == {}
+
+    assert read_journal(journal_path) == {}
+
+
+def test_malformed_journal_lines_are_rejected(tmp_path: Path) -> None:
+    journal_path = tmp_path / "journal.jsonl"
+    journal_path.write_text('not json\n{"path": "x", "hash": "y", "status": "z"}\n')
+
+    with pytest.raises(ValueError, match="Line 1 of journal"):
+        read_journal(journal_path)
+
+    journal_path.write_text('{"path": "x"}\n')
+
+    with pytest.raises(TypeError, match="path, hash and status"):
+        read_journal(journal_path)
@@ -4,7 +4,7 @@ from pathlib import Path
 
 import pytest
 from poetry.factory import Factory
-from tomlkit import TOMLDocument, parse
+from tomlkit import TOMLDocument, array, parse
 
 from poetry_plugin_migrate.migrator import Migrator
 from poetry_plugin_migrate.toml import (
@@ -285,6 +285,47 @@ maintainers = ["Maria <maria@example.com>"]
     assert maintainer["name"] == "Maria"
 
 
+def test_duplicate_array_values_are_moved_once() -> None:
+    document = parse(
+        """\
+[tool.poetry]
+authors = ["Alice <alice@example.com>", "Bob", "Alice <alice@example.com>"]
+
+[tool.poetry.urls]
+first = "https://example.invalid/a"
+second = "https://example.invalid/b"
+third = "https://example.invalid/a"
+"""
+    )
+    tool = require_table(document["tool"], "tool")
+    tool_poetry = require_table(tool["poetry"], "tool.poetry")
+    migrator = Migrator(StubCommand(), skip=True, literal=False)
+    migrator._migrate_persons(tool_poetry, document.setdefault("project", {}))
+    urls = array()
+    migrator._move_sub_container(
+        "urls",
+        tool_poetry,
+        urls,
+        from_container_key="tool.poetry",
+        to_container_key="target",
+    )
+
+    project = require_table(document["project"], "project")
+    assert project["authors"] == [
+        {"name": "Alice", "email": "alice@example.com"},
+        {"name": "Bob"},
+    ]
+    assert urls == ["https://example.invalid/a", "https://example.invalid/b"]
+    assert migrator.warnings == [
+        (
+            "Value https://example.invalid/a is already in [target] "
+            "and will be removed from [tool.poetry.urls]."
+        )
+    ]
+    assert "urls" not in tool_poetry
+    assert "authors" not in tool_poetry
+
+
 @pytest.mark.parametrize(
     ("license_expression", "expected"),
     [
@@ -346,6 +387,36 @@ license = "MIT License"
     )
 
 
+def test_field_migration_table_names_existing_methods() -> None:
+    for method_name, fields in Migrator.FIELD_MIGRATIONS:
+        assert callable(getattr(Migrator, method_name))
+        assert fields <= Migrator.PROJECT_FIELDS
+    assert "dependencies" in Migrator.PROJECT_FIELDS
+
+
+def test_license_canonicalization_is_memoized_across_documents() -> None:
+    from poetry_plugin_migrate.migrator import canonical_license_expression
+    from poetry_plugin_migrate.profiling import cache_statistics
+
+    canonical_license_expression.cache_clear()
+    for license_text in ("mit", "mit", "Proprietary", "Proprietary"):
+        result, _ = migrate(
+            f"""\
+[tool.poetry]
+name = "dummy-license"
+version = "1.0.0"
+license = "{license_text}"
+"""
+        )
+        project = require_table(result["project"], "project")
+        if license_text == "mit":
+            assert project["license"] == "MIT"
+        else:
+            assert project["dynamic"] == ["license"]
+
+    assert ("license canonicalization", 2, 2) in cache_statistics()
+
+
 def test_different_target_value_preserves_legacy_source() -> None:
     result, migrator = migrate(
         """\
@@ -521,6 +592,49 @@ dummy-runtime = "^2.0" # inline dependency comment
     assert second.as_string() == rendered
 
 
+def test_split_table_consolidation_walks_the_document_once(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    from tomlkit.container import Container
+
+    def split_document(size: int) -> TOMLDocument:
+        parts = ['[tool.poetry]\nname = "dummy-split"\nversion = "1.0.0"\n']
+        for index in range(size):
+            parts.append(f"[dummy-other-{index}]\nvalue = {index}\n")
+            parts.append(
+                f'[tool.poetry.group.g{index}.dependencies]\ndummy-{index} = "^1.0"\n'
+            )
+        return parse("\n".join(parts))
+
+    body_property = Container.body
+    assert isinstance(body_property, property) and body_property.fget is not None
+    body_getter = body_property.fget
+    visited_entries = 0
+
+    def counting_body(container: Container) -> list[object]:
+        nonlocal visited_entries
+        body: list[object] = body_getter(container)
+        visited_entries += len(body)
+        return body
+
+    visits: dict[int, int] = {}
+    for size in (25, 100):
+        document = split_document(size)
+        monkeypatch.setattr(Container, "body", property(counting_body))
+        visited_entries = 0
+        Migrator._consolidate_tool_poetry(document)
+        monkeypatch.setattr(Container, "body", body_property)
+        visits[size] = visited_entries
+
+        tool = require_table(document["tool"], "tool")
+        tool_poetry = require_table(tool["poetry"], "tool.poetry")
+        groups = require_table(tool_poetry["group"], "tool.poetry.group")
+        assert len(groups) == size
+
+    # Four times as many split tables must not cost sixteen times the walk.
+    assert visits[100] <= 5 * visits[25]
+
+
 def test_split_poetry_tables_are_not_consolidated_without_a_real_edit() -> None:
     source = """\
 [project]
@@ -542,6 +656,76 @@ optional = true
     assert result.as_string() == source
 
 
+ALREADY_MIGRATED = """\
+[project]
+name = "already-modern"
+version = "1.0.0"
+dependencies = ["requests>=2.0"]
+
+[tool.poetry]
+packages = [{ include = "dummy" }]
+
+[tool.poetry.group.dev]
+optional = true
+
+[build-system]
+requires = ["poetry-core>=2.0.0,<3.0.0"]
+build-backend = "poetry.core.masonry.api"
+"""
+
+
+def test_already_migrated_document_is_returned_without_copying() -> None:
+    document = parse(ALREADY_MIGRATED)
+    migrator = Migrator(StubCommand(), skip=True, literal=False)
+
+    result = migrator.run(document)
+
+    assert result is document
+    assert not migrator.changed
+    assert migrator.warnings == []
+
+
+def test_prompted_migration_is_not_short_circuited() -> None:
+    migrator = Migrator(StubCommand(), skip=False, literal=False)
+
+    result = migrator.run(parse(ALREADY_MIGRATED))
+
+    assert migrator.changed
+    assert result.as_string() == ALREADY_MIGRATED
+
+
+@pytest.mark.parametrize(
+    "source",
+    [
+        ALREADY_MIGRATED,
+        ALREADY_MIGRATED.replace(
+            'dependencies = ["requests>=2.0"]', "dependencies = []"
+        ),
+        ALREADY_MIGRATED.replace("version = ", "dynamic = []\nversion = "),
+        ALREADY_MIGRATED + '\n[dependency-groups]\ndev = ["pytest"]\n',
+        ALREADY_MIGRATED.replace("[tool.poetry]\n", '[tool.poetry]\nname = "x"\n'),
+        """\
+[tool.poetry]
+package-mode = false
+""",
+    ],
+)
+def test_no_op_short_circuit_matches_full_migration(
+    source: str, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    short_circuit = Migrator(StubCommand(), skip=True, literal=False)
+    expected = short_circuit.run(parse(source))
+
+    monkeypatch.setattr(Migrator, "_needs_migration", lambda *_: True)
+    full = Migrator(StubCommand(), skip=True, literal=False)
+    actual = full.run(parse(source))
+
+    assert expected.as_string() == actual.as_string()
+    assert short_circuit.warnings == full.warnings
+    # The flag is conservative: only ``False`` is a promise about the output.
+    assert short_circuit.changed or actual.as_string() == source
+
+
 def test_canonical_layout_is_opt_in_and_preserves_table_contents() -> None:
     source = """\
 # document header
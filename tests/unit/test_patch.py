@@ -0,0 +1,23 @@
+from __future__ import annotations
+
+from poetry_plugin_migrate.patch import unified_text_diff
+
+
+def test_identical_texts_have_an_empty_diff() -> None:
+    text = "[tool.poetry]\nname = 'dummy'\n"
+
+    assert unified_text_diff(text, text, "pyproject.toml") == ""
+
+
+def test_diff_marks_a_missing_final_newline() -> None:
+    diff = unified_text_diff("a = 1\nb = 2", "a = 1\nb = 3\n", "main:pyproject.toml")
+
+    assert diff == (
+        "--- a/main:pyproject.toml\n"
+        "+++ b/main:pyproject.toml\n"
+        "@@ -1,2 +1,2 @@\n"
+        " a = 1\n"
+        "-b = 2\n"
+        "\\ No newline at end of file\n"
+        "+b = 3\n"
+    )
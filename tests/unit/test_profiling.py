@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import json
+import os
+from typing import TYPE_CHECKING
+
+from poetry_plugin_migrate.profiling import (
+    allocation_sites,
+    memory_statistics,
+    record_allocation_sites,
+    start_memory_profile,
+    start_trace,
+    stop_memory_profile,
+    trace_span,
+    write_trace,
+)
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+def test_spans_are_only_recorded_while_tracing(tmp_path: Path) -> None:
+    with trace_span("ignored"):
+        pass
+    start_trace()
+    with trace_span("outer", "project", path="a"), trace_span("inner"):
+        pass
+
+    assert write_trace(tmp_path / "trace.json") == 2
+    with trace_span("after"):
+        pass
+
+    events = json.loads((tmp_path / "trace.json").read_text())["traceEvents"]
+    metadata, inner, outer = events
+    assert metadata["ph"] == "M"
+    assert metadata["pid"] == os.getpid()
+    assert (outer["name"], outer["cat"], outer["args"]) == (
+        "outer",
+        "project",
+        {"path": "a"},
+    )
+    assert inner["name"] == "inner"
+    assert outer["ts"] <= inner["ts"]
+    assert inner["ts"] + inner["dur"] <= outer["ts"] + outer["dur"]
+    assert inner["pid"] == outer["pid"] and inner["tid"] == outer["tid"]
+
+
+def test_memory_profile_measures_nested_phases() -> None:
+    start_memory_profile()
+    try:
+        with trace_span("outer"):
+            kept = [bytearray(1000) for _ in range(100)]
+            with trace_span("inner"):
+                discarded = bytearray(200_000)
+                del discarded
+            with trace_span("project", "project"):
+                pass
+            record_allocation_sites()
+    finally:
+        stop_memory_profile()
+
+    statistics = {name: rest for name, *rest in memory_statistics()}
+    assert set(statistics) == {"outer", "inner"}
+    inner_calls, inner_peak, inner_net = statistics["inner"]
+    outer_calls, outer_peak, outer_net = statistics["outer"]
+    assert inner_calls == outer_calls == 1
+    assert inner_peak >= 200_000
+    assert abs(inner_net) < 10_000
+    assert outer_peak >= inner_peak
+    assert outer_net >= 100_000
+    sites = allocation_sites(limit=3)
+    assert sites
+    assert sites[0][0].startswith(__file__)
+    assert sites[0][1] >= 100_000
+    assert len(kept) == 100
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from poetry_plugin_migrate.batch import ProjectResult
+from poetry_plugin_migrate.reports import (
+    build_report,
+    load_report,
+    merge_reports,
+    write_report,
+)
+
+ROOT = Path("/checkout")
+
+
+def shard_report(index: int, count: int, *results: ProjectResult) -> dict[str, object]:
+    return build_report(ROOT, results, shard=(index, count))
+
+
+def test_report_round_trips_with_relative_paths(tmp_path: Path) -> None:
+    report = shard_report(
+        1,
+        2,
+        ProjectResult(ROOT / "a" / "pyproject.toml", "failed", errors=["broken"]),
+    )
+
+    write_report(tmp_path / "report.json", report)
+
+    assert load_report(tmp_path / "report.json") == report
+    assert report["projects"] == [
+        {
+            "path": "a/pyproject.toml",
+            "status": "failed",
+            "warnings": [],
+            "errors": ["broken"],
+            "resumed": False,
+            "migration_ms": None,
+        }
+    ]
+    assert report["summary"] == {
+        "migrated": 0,
+        "unchanged": 0,
+        "failed": 1,
+        "timeout": 0,
+    }
+
+
+def test_merge_reports_sorts_projects_and_lists_missing_shards() -> None:
+    merged = merge_reports(
+        [
+            shard_report(
+                3, 3, ProjectResult(ROOT / "b" / "pyproject.toml", "unchanged")
+            ),
+            shard_report(
+                1, 3, ProjectResult(ROOT / "a" / "pyproject.toml", "migrated")
+            ),
+        ]
+    )
+
+    assert [project["path"] for project in merged["projects"]] == [  # type: ignore[attr-defined]
+        "a/pyproject.toml",
+        "b/pyproject.toml",
+    ]
+    assert merged["summary"] == {
+        "migrated": 1,
+        "unchanged": 1,
+        "failed": 0,
+        "timeout": 0,
+    }
+    assert merged["missing_shards"] == [2]
+
+
+@pytest.mark.parametrize(
+    ("reports", "message"),
+    [
+        ([shard_report(1, 2), shard_report(1, 3)], "2 and 3 shards"),
+        ([shard_report(1, 2), shard_report(1, 2)], "more than once"),
+        ([shard_report(3, 2)], "Invalid shard 3/2"),
+        ([shard_report(0, 2), shard_report(1, 2)], "Invalid shard 0/2"),
+        ([build_report(ROOT, [])], "sharded runs"),
+        ([], "No reports"),
+        (
+            [
+                shard_report(1, 2, ProjectResult(ROOT / "pyproject.toml", "migrated")),
+                shard_report(2, 2, ProjectResult(ROOT / "pyproject.toml", "migrated")),
+            ],
+            "more than one shard",
+        ),
+    ],
+)
+def test_merge_reports_rejects_inconsistent_reports(
+    reports: list[dict[str, object]], message: str
+) -> None:
+    with pytest.raises(ValueError, match=message):
+        merge_reports(reports)
@@ -0,0 +1,234 @@
+from __future__ import annotations
+
+import sqlite3
+from contextlib import closing
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import pytest
+from poetry.core.factory import Factory
+
+from poetry_plugin_migrate.batch import migrate_source
+from poetry_plugin_migrate.dependencies import DependencyGroupMigrator
+from poetry_plugin_migrate.requirement_cache import (
+    RequirementCache,
+    active_requirement_cache,
+    close_requirement_cache,
+    open_requirement_cache,
+)
+from poetry_plugin_migrate.requirements import (
+    UnrepresentableRequirementError,
+    render_dependency_requirement,
+    render_pep508_requirement,
+)
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator, Mapping
+
+    from tomlkit.items import Array
+
+    from poetry_plugin_migrate.toml import TomlTable
+
+
+SPECS: list[str | dict[str, object]] = [
+    "^1.0",
+    ">=1.0a1",
+    ">=1.0,<2.0,!=1.5",
+    {"version": "^1.0", "extras": ["speed"]},
+    {"version": "^2.0", "markers": "sys_platform == 'linux'"},
+    {"git": "https://example.com/dummy.git", "tag": "v1.0"},
+    {"url": "https://example.com/dummy-1.0.whl"},
+    "^1.0 || ^2.0",
+]
+
+
+class StubCommand:
+    def line(self, _message: str = "") -> None:
+        pass
+
+    def confirm(self, _question: str, default: bool = False) -> bool:
+        return default
+
+    def choice(
+        self,
+        _question: str,
+        choices: list[str],
+        default: int,
+        _attempts: int | None = None,
+        _multiple: bool = False,
+    ) -> str:
+        return choices[default]
+
+
+@pytest.fixture
+def cache_path(tmp_path: Path) -> Iterator[Path]:
+    yield tmp_path / "requirements.sqlite"
+    close_requirement_cache()
+
+
+def render(spec: str | Mapping[str, object], *, cached: bool) -> str:
+    dependency = Factory.create_dependency("dummy", spec)
+    if cached:
+        return render_dependency_requirement(
+            "dummy", spec, dependency, keep_version_brackets=False
+        )
+    return render_pep508_requirement(dependency, keep_version_brackets=False)
+
+
+def outcome(spec: str | Mapping[str, object], *, cached: bool) -> str:
+    try:
+        return render(spec, cached=cached)
+    except UnrepresentableRequirementError as error:
+        return f"error: {error}"
+
+
+def test_cached_rendering_matches_and_persists_across_runs(cache_path: Path) -> None:
+    expected = [outcome(spec, cached=False) for spec in SPECS]
+
+    cache = open_requirement_cache(cache_path)
+    assert [outcome(spec, cached=True) for spec in SPECS] == expected
+    # Simple version constraints never reach the cache.
+    assert cache.cache_info() == (0, 7, 100_000, 7)
+    close_requirement_cache()
+
+    cache = open_requirement_cache(cache_path)
+    assert [outcome(spec, cached=True) for spec in SPECS] == expected
+    assert (cache.hits, cache.misses) == (7, 0)
+    assert active_requirement_cache() is cache
+    close_requirement_cache()
+    assert active_requirement_cache() is None
+
+
+def test_cache_keys_cover_versions_and_exclude_local_paths(cache_path: Path) -> None:
+    with RequirementCache(cache_path) as cache:
+        spec = {"version": "^1.0", "extras": ["a"]}
+        key = cache.key("dummy", spec, keep_version_brackets=False)
+
+        assert key == cache.key(
+            "dummy", {"extras": ["a"], "version": "^1.0"}, keep_version_brackets=False
+        )
+        assert key != cache.key("dummy", spec, keep_version_brackets=True)
+        assert key != cache.key("Dummy", spec, keep_version_brackets=False)
+        assert cache.key("dummy", {"path": "../a"}, keep_version_brackets=False) is None
+        assert (
+            cache.key("dummy", {"file": "a.whl"}, keep_version_brackets=False) is None
+        )
+        cache.store(key or "", "dummy[a]>=1.0,<2.0", None)
+
+    with RequirementCache(cache_path) as cache:
+        cache._versions = "0.0.0/0.0.0"
+
+        assert (
+            cache.lookup(cache.key("dummy", spec, keep_version_brackets=False) or "")
+            is None
+        )
+
+
+def test_least_recently_used_entries_are_evicted(cache_path: Path) -> None:
+    with RequirementCache(cache_path, max_entries=2) as cache:
+        cache.store("a", "a", None)
+        cache.store("b", "b", None)
+        cache.flush()
+        assert cache.lookup("a") == ("a", None)
+        cache.flush()
+        cache.store("c", "c", None)
+
+    with RequirementCache(cache_path, max_entries=2) as cache:
+        assert cache.lookup("a") == ("a", None)
+        assert cache.lookup("b") is None
+        assert cache.lookup("c") == ("c", None)
+
+
+def test_concurrent_caches_share_one_database(cache_path: Path) -> None:
+    with RequirementCache(cache_path) as first, RequirementCache(cache_path) as second:
+        first.store("a", None, "unrepresentable")
+        first.flush()
+
+        assert second.lookup("a") == (None, "unrepresentable")
+
+    with closing(sqlite3.connect(cache_path)) as connection:
+        assert connection.execute("PRAGMA journal_mode").fetchone() == ("wal",)
+
+
+def test_cache_must_hold_entries(cache_path: Path) -> None:
+    with pytest.raises(ValueError, match="at least one entry"):
+        RequirementCache(cache_path, max_entries=0)
+
+
+PARTIALLY_MIGRATED = """\
+[project]
+name = "dummy"
+version = "1.0.0"
+dynamic = ["dependencies"]
+
+[tool.poetry.dependencies]
+python = "^3.10"
+dummy-runtime = { version = "^1.0", source = "private" }
+
+[tool.poetry.group.dev.dependencies]
+dummy-test = { version = "^8.0", extras = ["cov"] }  # test runner
+dummy-lint = "^0.5"
+
+[tool.poetry.group.docs.dependencies]
+dummy-docs = { version = ">=1.0,<2.0", markers = "python_version >= '3.11'" }
+"""
+
+
+def test_unchanged_sections_are_reused_after_partial_edits(
+    cache_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    converted: list[str] = []
+    build_group = DependencyGroupMigrator._build_group
+
+    def spy(
+        self: DependencyGroupMigrator, group_name: str, group: TomlTable
+    ) -> tuple[Array, set[str]] | None:
+        converted.append(group_name)
+        return build_group(self, group_name, group)
+
+    monkeypatch.setattr(DependencyGroupMigrator, "_build_group", spy)
+    edited = PARTIALLY_MIGRATED.replace('"^0.5"', '"^0.6"')
+
+    def migrate(source: str) -> tuple[object, ...]:
+        result = migrate_source(
+            Path("pyproject.toml"), source, StubCommand(), literal=True
+        )
+        return result.status, result.migrated, result.warnings, result.errors
+
+    expected = migrate(edited)
+    open_requirement_cache(cache_path)
+    migrate(PARTIALLY_MIGRATED)
+    close_requirement_cache()
+    open_requirement_cache(cache_path)
+    converted.clear()
+
+    assert migrate(edited) == expected
+    # Only the edited group is converted again.
+    assert converted == ["dev"]
+    converted.clear()
+    assert migrate(edited) == expected
+    assert converted == []
+
+
+def test_sections_with_local_paths_are_not_cacheable(cache_path: Path) -> None:
+    with RequirementCache(cache_path) as cache:
+
+        def key(*specs: object) -> str | None:
+            return cache.section_key(
+                "group",
+                "dev",
+                ["dummy = 1"],
+                specs,
+                literal=True,
+                keep_version_brackets=False,
+            )
+
+        assert key("^1.0", [{"version": "^1.0"}]) is not None
+        assert key("^1.0", [{"version": "^1.0"}]) == key("^1.0", [{"version": "^1.0"}])
+        assert key({"path": "../a"}) is None
+        assert key([{"file": "a.whl", "python": "<3.11"}, "^1.0"]) is None
+        cache.store_section(key("^1.0") or "", {"array": None, "warnings": ["w"]})
+        assert cache.lookup_section(key("^1.0") or "") == {
+            "array": None,
+            "warnings": ["w"],
+        }
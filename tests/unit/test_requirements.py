@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import itertools
 from collections.abc import Mapping
 
 import pytest
@@ -9,7 +10,9 @@ from poetry.core.packages.dependency import Dependency
 
 from poetry_plugin_migrate.requirements import (
     UnrepresentableRequirementError,
+    _render_round_trip,
     render_pep508_requirement,
+    render_version_requirement,
 )
 
 DependencySpec = str | Mapping[str, object]
@@ -171,3 +174,61 @@ def test_wheel_url_rejects_fragment_dropped_by_poetry_round_trip() -> None:
         match="changes dependency semantics",
     ):
         render_pep508_requirement(dependency, keep_version_brackets=False)
+
+
+def generated_version_constraints() -> list[str]:
+    releases = [
+        "0", "1", "10", "0.0", "0.1", "1.0", "1.2", "10.20", "0.0.0",
+        "0.0.1", "0.1.0", "1.2.3", "2.0.0", "0.0.0.0", "0.0.0.1", "1.2.3.4",
+    ]  # fmt: skip
+    operators = ["", "^", "~", "==", "!=", ">=", "<=", ">", "<"]
+    constraints = ["*"]
+    for operator, release in itertools.product(operators, releases):
+        constraints += [f"{operator}{release}", f"{operator}{release}.*"]
+    lower = [f"{operator}{release}" for operator in (">=", ">") for release in releases]
+    upper = [f"{operator}{release}" for operator in ("<", "<=") for release in releases]
+    constraints += [f"{low},{high}" for low, high in itertools.product(lower, upper)]
+    constraints += [f"{high},{low}" for low, high in itertools.product(lower, upper)]
+    return constraints
+
+
+def test_version_fast_path_matches_the_round_trip_renderer() -> None:
+    handled = 0
+    for name, constraint, keep_version_brackets in itertools.product(
+        ["Dummy_Pkg", "x.y-z"], generated_version_constraints(), [False, True]
+    ):
+        fast = render_version_requirement(
+            name, constraint, keep_version_brackets=keep_version_brackets
+        )
+        if fast is None:
+            continue
+        handled += 1
+        dependency = Factory.create_dependency(name, constraint)
+        slow = _render_round_trip(
+            dependency, keep_version_brackets=keep_version_brackets
+        )
+        assert fast == slow, (name, constraint, keep_version_brackets)
+
+    assert handled > 2000
+
+
+@pytest.mark.parametrize(
+    "constraint",
+    [
+        ">=1.0a1",
+        "^1.2.3.4",
+        "~=1.2",
+        ">= 1.0",
+        ">=2,<1",
+        "<2,>=1",
+        ">=1,!=1.5,<2",
+        ">=1,<2 || >=3",
+        "^01.2",
+        ">=1.*",
+    ],
+)
+def test_version_fast_path_falls_back_for_other_constraints(constraint: str) -> None:
+    assert (
+        render_version_requirement("dummy", constraint, keep_version_brackets=False)
+        is None
+    )
@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from tomlkit import parse
+
+from poetry_plugin_migrate.batch import ProjectResult, migrate_project
+from poetry_plugin_migrate.templates import TemplateCache, document_skeleton
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+class StubCommand:
+    def line(self, _message: str = "") -> None:
+        pass
+
+    def confirm(self, _question: str, default: bool = False) -> bool:
+        return default
+
+    def choice(
+        self,
+        _question: str,
+        choices: list[str],
+        default: int,
+        _attempts: int | None = None,
+        _multiple: bool = False,
+    ) -> str:
+        return choices[default]
+
+
+TEMPLATE = """\
+[tool.poetry]
+name = "{name}"
+version = "{version}"
+description = '{description}'  # from the service template
+authors = ["Team <team@example.com>"]
+license = "MIT"
+
+[tool.poetry.dependencies]
+python = "^3.10"
+dummy-runtime = "{runtime}"
+
+[build-system]
+requires = ["poetry-core>=1.0.0"]
+build-backend = "poetry.core.masonry.api"
+"""
+
+
+def render(
+    name: str = "service-a",
+    version: str = "1.0.0",
+    description: str = "Service A",
+    runtime: str = "^2.0",
+) -> str:
+    return TEMPLATE.format(
+        name=name, version=version, description=description, runtime=runtime
+    )
+
+
+def skeleton_digest(source: str) -> str | None:
+    skeleton = document_skeleton(parse(source), source)
+    return None if skeleton is None else skeleton.digest
+
+
+def test_fingerprint_ignores_only_template_values() -> None:
+    source = render()
+    document = parse(source)
+
+    skeleton = document_skeleton(document, source)
+
+    assert skeleton is not None
+    assert document.as_string() == source
+    assert sorted(skeleton.values.values()) == ["1.0.0", "Service A", "service-a"]
+    assert skeleton_digest(render("service-b", "2.1", "Service B")) == skeleton.digest
+    assert skeleton_digest(render(runtime="^3.0")) != skeleton.digest
+    assert skeleton_digest(render(description=r"C:\service")) != skeleton.digest
+    assert skeleton_digest(render(version="not a version")) != skeleton.digest
+
+
+def test_fields_defined_in_project_are_not_abstracted() -> None:
+    with_project = render() + '\n[project]\nname = "service-a"\n'
+
+    assert skeleton_digest(with_project) != skeleton_digest(
+        with_project.replace('name = "service-a"', 'name = "service-b"', 1)
+    )
+
+
+def test_documents_containing_a_placeholder_have_no_skeleton() -> None:
+    assert skeleton_digest(render(description="poetry-migrate-template-name")) is None
+    assert skeleton_digest('[project]\nname = "a"\n') is None
+
+
+def test_templated_projects_are_replayed_like_full_migrations(
+    tmp_path: Path,
+) -> None:
+    paths = []
+    for index in range(4):
+        path = tmp_path / f"service-{index}" / "pyproject.toml"
+        path.parent.mkdir()
+        path.write_text(
+            render(f"service-{index}", f"1.{index}.0", f"Service number {index}")
+        )
+        paths.append(path)
+    command = StubCommand()
+    templates = TemplateCache()
+
+    for path in paths:
+        expected = migrate_project(path, command, literal=True)
+        result = migrate_project(path, command, literal=True, templates=templates)
+
+        assert result.status == expected.status == "migrated"
+        assert result.migrated == expected.migrated
+        assert result.warnings == expected.warnings
+        assert result.migration_seconds is not None
+
+    assert templates.cache_info() == (2, 2, None, 1)
+
+
+def test_templates_that_disagree_are_never_replayed(tmp_path: Path) -> None:
+    source = render()
+    skeleton = document_skeleton(parse(source), source)
+    assert skeleton is not None
+    path = tmp_path / "pyproject.toml"
+    result = ProjectResult(path, "migrated", migrated="migrated", warnings=[])
+    calls = []
+
+    def migrate(text: str) -> ProjectResult:
+        calls.append(text)
+        return ProjectResult(path, "migrated", migrated="different", warnings=[])
+
+    templates = TemplateCache()
+    for _ in range(3):
+        templates.learn(skeleton, result, migrate)
+
+    assert calls == [skeleton.text]
+    assert templates.replay(path, source, skeleton) is None
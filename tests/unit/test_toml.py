@@ -3,13 +3,19 @@ from __future__ import annotations
 from collections import Counter
 
 import pytest
-from tomlkit import TOMLDocument, parse
+from tomlkit import TOMLDocument, array, parse
+from tomlkit.items import Item
 
 from poetry_plugin_migrate.migrator import Migrator
 from poetry_plugin_migrate.toml import (
     comment_counts,
+    extend_array_preserving_comments,
     make_string,
+    plain_get,
+    plain_snapshot,
+    require_array,
     restore_missing_comments,
+    value_key,
 )
 
 
@@ -119,3 +125,102 @@ def test_literal_string_factory_falls_back_to_basic_toml_syntax() -> None:
     generated = make_string(value, literal=True)
 
     assert parse(f"value = {generated.as_string()}\n")["value"] == value
+
+
+def test_extending_arrays_keeps_comments_and_reuses_replacements() -> None:
+    document = parse(
+        """\
+first = [
+    # first note
+    "a", # a note
+    "b",
+]
+second = ["c", "d"] # trailing note
+"""
+    )
+    target = array()
+    target.multiline(True)
+    replacements: list[Item] = []
+    for key in ("first", "second"):
+        source = require_array(document[key], key)
+        generated: list[Item] = [
+            make_string(f"{value}-new", literal=False) for value in source
+        ]
+        extend_array_preserving_comments(target, source, generated)
+        replacements.extend(generated)
+
+    assert target == ["a-new", "b-new", "c-new", "d-new"]
+    assert all(target[index] is item for index, item in enumerate(replacements))
+    assert "# first note" in target.as_string()
+    assert "# a note" in target.as_string()
+    index_map = dict(target._index_map)
+    target._reindex()
+    assert index_map == target._index_map
+    assert parse(f"value = {target.as_string()}\n")["value"] == target
+
+
+def test_extending_arrays_rejects_mismatched_replacements() -> None:
+    source = require_array(parse('value = ["a", "b"]\n')["value"], "value")
+
+    with pytest.raises(ValueError, match="one replacement"):
+        extend_array_preserving_comments(
+            array(), source, [make_string("a", literal=False)]
+        )
+
+
+def test_plain_snapshot_contains_no_tomlkit_items() -> None:
+    document = parse(
+        """\
+[tool.poetry]
+name = "dummy-snapshot"
+
+[tool.other]
+value = 1
+
+[tool.poetry.dependencies]
+dummy = { version = "^1", extras = ["a"] }
+"""
+    )
+
+    snapshot = plain_snapshot(document)
+
+    def contains_items(value: object) -> bool:
+        if isinstance(value, Item):
+            return True
+        if isinstance(value, dict):
+            return any(contains_items(item) for item in value.values())
+        if isinstance(value, list):
+            return any(contains_items(item) for item in value)
+        return False
+
+    assert not contains_items(snapshot)
+    assert plain_get(snapshot, "tool", "poetry", "dependencies", "dummy") == {
+        "version": "^1",
+        "extras": ["a"],
+    }
+    assert plain_get(snapshot, "tool", "poetry", "name", "missing") is None
+    assert plain_get(snapshot, "tool", "absent", "table") is None
+
+
+def test_value_keys_compare_like_toml_values() -> None:
+    document = parse(
+        """\
+people = [
+  { name = "Alice", email = "alice@example.com" },
+  { email = "alice@example.com", name = "Alice" },
+  { name = "Alice" },
+]
+nested = [["a", 1], ["a", 1.0], ["a", 2]]
+"""
+    )
+    people = require_array(document["people"], "people")
+    nested = require_array(document["nested"], "nested")
+
+    assert value_key(people[0]) == value_key(people[1])
+    assert value_key(people[0]) != value_key(people[2])
+    assert value_key(people[2]) == value_key({"name": "Alice"})
+    assert value_key(nested[0]) == value_key(nested[1])
+    assert value_key(nested[0]) != value_key(nested[2])
+    assert {value_key(value) for value in people} == {
+        value_key(value) for value in (people[0], people[2])
+    }
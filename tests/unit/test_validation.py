@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+from poetry_plugin_migrate.profiling import cache_statistics, timing_statistics
+from poetry_plugin_migrate.validation import validate_pyproject
+
+
+def statistics(name: str) -> tuple[int, int]:
+    return next(
+        (hits, misses)
+        for cache_name, hits, misses in cache_statistics()
+        if cache_name == name
+    )
+
+
+def timed_calls(name: str) -> int:
+    return next(
+        (calls for stage, calls, _seconds in timing_statistics() if stage == name), 0
+    )
+
+
+def test_compiled_schema_validators_are_reused_and_timed() -> None:
+    document = {"project": {"name": "dummy", "version": "1.0.0"}}
+    validate_pyproject({"project": dict(document["project"])})
+    _hits, misses = statistics("schema validator compilation")
+    calls = timed_calls("validation")
+
+    errors = validate_pyproject({"project": dict(document["project"])})
+
+    assert errors == []
+    assert statistics("schema validator compilation")[1] == misses
+    assert timed_calls("validation") == calls + 1
@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from poetry_plugin_migrate.batch import migrate_project
+from poetry_plugin_migrate.whatif import build_what_if_report, explore_project
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+class StubCommand:
+    def line(self, _message: str = "") -> None:
+        pass
+
+    def confirm(self, _question: str, default: bool = False) -> bool:
+        raise AssertionError("what-if runs must not prompt")
+
+    def choice(
+        self,
+        _question: str,
+        choices: list[str],
+        default: int,
+        _attempts: int | None = None,
+        _multiple: bool = False,
+    ) -> str:
+        raise AssertionError("what-if runs must not prompt")
+
+
+LEGACY = """\
+[tool.poetry]
+name = "dummy"
+version = "1.0.0"
+description = ""
+authors = []
+
+[build-system]
+requires = ["poetry-core"]
+build-backend = "poetry.core.masonry.api"
+"""
+
+
+def test_every_answer_is_explored_once(tmp_path: Path) -> None:
+    path = tmp_path / "pyproject.toml"
+    path.write_text(LEGACY)
+
+    exploration = explore_project(path, StubCommand(), literal=True)
+
+    questions = [
+        (decision.prompt.question, decision.context)
+        for decision in exploration.decisions
+    ]
+    build_question = "Update [build-system.requires.poetry-core] to which constraint?"
+    assert questions == [
+        (
+            "Keeps Poetry managing version in [tool.poetry] with dynamic versioning?",
+            [],
+        ),
+        ("Update [tool.poetry.requires-poetry] to which constraint?", []),
+        (build_question, []),
+        ("Reorder standardized top-level tables into the canonical layout?", []),
+        # Only a new build requirement is rendered, so the output style is
+        # asked after a non-default answer.
+        (
+            "Remove brackets from PEP 508 version specifiers?",
+            [(build_question, ">=2.0")],
+        ),
+    ]
+    # One run with default answers and one for every other answer.
+    assert exploration.runs == 1 + sum(
+        len(decision.prompt.choices) - 1 for decision in exploration.decisions
+    )
+    defaults = migrate_project(path, StubCommand(), literal=True)
+    assert exploration.result.migrated == defaults.migrated
+    version = exploration.decisions[0]
+    assert version.prompt.choices == ["yes", "no"]
+    assert version.prompt.default == 1
+    dynamic, static = version.outcomes
+    assert static is exploration.result
+    assert dynamic.status == "migrated"
+    assert dynamic.migrated is not None
+    assert '"version",' in dynamic.migrated.partition("[project]")[2]
+    build = exploration.decisions[2]
+    assert [result.status for result in build.outcomes] == ["migrated"] * 5
+    assert build.outcomes[0].migrated is not None
+    assert "requires = ['poetry-core>=2.0']" in build.outcomes[0].migrated
+    assert path.read_text() == LEGACY
+
+
+def test_unchanged_projects_still_explore_their_prompts(tmp_path: Path) -> None:
+    path = tmp_path / "pyproject.toml"
+    path.write_text('[project]\nname = "dummy"\nversion = "1"\n\n[tool.poetry]\n')
+
+    exploration = explore_project(path, StubCommand(), literal=True)
+
+    assert exploration.result.status == "unchanged"
+    (decision,) = (
+        decision
+        for decision in exploration.decisions
+        if "requires-poetry" in decision.prompt.question
+    )
+    assert [result.status for result in decision.outcomes] == [
+        "migrated",
+        "migrated",
+        "unchanged",
+    ]
+
+
+def test_report_lists_each_answer(tmp_path: Path) -> None:
+    path = tmp_path / "broken" / "pyproject.toml"
+    path.parent.mkdir()
+    path.write_text("[tool.poetry\n")
+    explorations = [explore_project(path, StubCommand(), literal=True)]
+
+    report = build_what_if_report(tmp_path, explorations, shard=(1, 2))
+
+    assert report["what_if"] is True
+    assert report["shard"] == {"index": 1, "count": 2}
+    assert report["projects"] == [
+        {
+            "path": "broken/pyproject.toml",
+            "status": "failed",
+            "warnings": [],
+            "errors": explorations[0].result.errors,
+            "runs": 0,
+            "prompts": [],
+        }
+    ]
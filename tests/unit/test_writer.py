@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import sys
+import tarfile
+from io import BytesIO
+from typing import TYPE_CHECKING
+
+import pytest
+
+from poetry_plugin_migrate.fileio import FileIOStage
+from poetry_plugin_migrate.writer import (
+    BatchWriter,
+    atomic_write,
+    restore_backup_archive,
+)
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="POSIX permission bits")
+def test_atomic_write_replaces_content_and_keeps_permissions(tmp_path: Path) -> None:
+    target = tmp_path / "pyproject.toml"
+    target.write_text("old")
+    target.chmod(0o640)
+
+    atomic_write(target, b"new")
+
+    assert target.read_bytes() == b"new"
+    assert target.stat().st_mode & 0o777 == 0o640
+    assert [path.name for path in tmp_path.iterdir()] == ["pyproject.toml"]
+
+
+def test_batch_writer_archives_originals_once(tmp_path: Path) -> None:
+    first = tmp_path / "pyproject.toml"
+    second = tmp_path / "nested" / "pyproject.toml"
+    second.parent.mkdir()
+    first.write_text("first = 1\n")
+    second.write_text("second = 2\n")
+
+    writer = BatchWriter(tmp_path)
+    writer.stage(first, "first = 10\n")
+    writer.stage(second, "second = 20\n")
+    archive = writer.commit()
+
+    assert archive is not None
+    assert archive.parent == tmp_path
+    assert first.read_text() == "first = 10\n"
+    assert second.read_text() == "second = 20\n"
+    assert not list(tmp_path.rglob("*.bak*"))
+    with tarfile.open(archive, "r:gz") as tar:
+        assert tar.getnames() == ["pyproject.toml", "nested/pyproject.toml"]
+
+    assert restore_backup_archive(archive) == [first, second]
+    assert first.read_text() == "first = 1\n"
+    assert second.read_text() == "second = 2\n"
+
+
+def test_batch_writer_never_overwrites_an_archive(tmp_path: Path) -> None:
+    target = tmp_path / "pyproject.toml"
+    target.write_text("value = 1\n")
+
+    archives = []
+    for value in (2, 3):
+        writer = BatchWriter(tmp_path)
+        writer.stage(target, f"value = {value}\n")
+        archives.append(writer.commit())
+
+    assert archives[0] != archives[1]
+    assert all(archive is not None and archive.exists() for archive in archives)
+
+
+def test_batch_writer_commits_concurrently_on_an_io_stage(tmp_path: Path) -> None:
+    paths = [tmp_path / f"p{index}" / "pyproject.toml" for index in range(20)]
+    for index, path in enumerate(paths):
+        path.parent.mkdir()
+        path.write_text(f"value = {index}\n")
+
+    with FileIOStage(4) as io:
+        writer = BatchWriter(tmp_path, io=io)
+        for index, path in enumerate(paths):
+            writer.stage(path, f"value = {index * 10}\n")
+        archive = writer.commit()
+
+    assert archive is not None
+    assert [path.read_text() for path in paths] == [
+        f"value = {index * 10}\n" for index in range(20)
+    ]
+    with tarfile.open(archive, "r:gz") as tar:
+        assert tar.getnames() == [
+            path.relative_to(tmp_path).as_posix() for path in paths
+        ]
+        extracted = tar.extractfile("p3/pyproject.toml")
+        assert extracted is not None
+        assert extracted.read() == b"value = 3\n"
+
+
+def test_batch_writer_without_backup_creates_no_archive(tmp_path: Path) -> None:
+    target = tmp_path / "pyproject.toml"
+    target.write_text("value = 1\n")
+
+    writer = BatchWriter(tmp_path, backup=False)
+    writer.stage(target, "value = 2\n")
+
+    assert writer.commit() is None
+    assert target.read_text() == "value = 2\n"
+    assert [path.name for path in tmp_path.iterdir()] == ["pyproject.toml"]
+
+
+@pytest.mark.parametrize("concurrency", [None, 4])
+def test_batch_writer_restores_replaced_files_after_a_failure(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, concurrency: int | None
+) -> None:
+    first = tmp_path / "pyproject.toml"
+    second = tmp_path / "nested" / "pyproject.toml"
+    second.parent.mkdir()
+    first.write_text("first = 1\n")
+    second.write_text("second = 2\n")
+
+    io = FileIOStage(concurrency) if concurrency is not None else None
+    writer = BatchWriter(tmp_path, backup=False, io=io)
+    writer.stage(first, "first = 10\n")
+    writer.stage(second, "second = 20\n")
+
+    from poetry_plugin_migrate import writer as writer_module
+
+    original_atomic_write = writer_module.atomic_write
+
+    def failing_atomic_write(
+        path: Path, content: bytes, *, mode: int | None = None
+    ) -> None:
+        if path == second and content == b"second = 20\n":
+            raise OSError("disk full")
+        original_atomic_write(path, content, mode=mode)
+
+    monkeypatch.setattr(writer_module, "atomic_write", failing_atomic_write)
+
+    with pytest.raises(OSError, match="disk full"):
+        writer.commit()
+    if io is not None:
+        io.close()
+
+    assert first.read_text() == "first = 1\n"
+    assert second.read_text() == "second = 2\n"
+
+
+@pytest.mark.parametrize("name", ["../pyproject.toml", "/pyproject.toml", "setup.py"])
+def test_restore_rejects_unexpected_members(tmp_path: Path, name: str) -> None:
+    archive = tmp_path / "backup.tar.gz"
+    with tarfile.open(archive, "w:gz") as tar:
+        member = tarfile.TarInfo(name)
+        member.size = 1
+        tar.addfile(member, BytesIO(b"x"))
+
+    with pytest.raises(ValueError, match="Unexpected member"):
+        restore_backup_archive(archive)